@@ -1,2 +1,5 @@
 from .factory import CloudProviderFactory  # noqa
 from .factory import ProviderList  # noqa
+from .pool import FloatingIPPool  # noqa
+from .pool import InstancePool  # noqa
+from .replication import replicate  # noqa
@@ -0,0 +1,193 @@
+"""
+A local, read-through disk cache for the content of bucket objects
+"""
+import hashlib
+import io
+import logging
+import mmap
+import os
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# Suffix of the temporary files written while an object is being cached
+PART_SUFFIX = '.cbpart'
+# Size of the chunks returned when iterating over cached content
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class CachedContent(object):
+    """
+    A read-only, file-like view of a cached object, backed by a memory map
+    of the cache file.
+
+    Iterating over it returns the content in chunks, in the same way as the
+    provider's ``iter_content`` streams do.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size:
+                self._content = mmap.mmap(f.fileno(), 0,
+                                          access=mmap.ACCESS_READ)
+            else:
+                # Empty files cannot be memory mapped
+                self._content = io.BytesIO()
+
+    def read(self, size=-1):
+        return self._content.read(size)
+
+    def __iter__(self):
+        return iter(lambda: self.read(READ_CHUNK_SIZE), b'')
+
+    def close(self):
+        self._content.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ObjectCache(object):
+    """
+    Caches the content of bucket objects in a local directory.
+
+    Entries are keyed by provider, bucket, object name and etag, so a
+    changed object is never served from the cache. An object whose etag was
+    checked less than ``ttl`` seconds ago is served without contacting the
+    provider at all. Otherwise, its current etag is fetched with a single
+    HEAD request, and the object is only downloaded if that version is not
+    cached yet. The entry is stored under the etag of the content actually
+    downloaded, in case the object changed after the HEAD request. When the
+    cache grows beyond ``max_size`` bytes, the least recently read entries
+    are evicted.
+
+    The directory can be shared by several processes. Entries are written
+    to a temporary file and renamed into place once complete.
+    """
+
+    def __init__(self, directory, max_size, ttl):
+        self.directory = directory
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # Maps (provider, bucket, name) to (etag, time of last validation)
+        self._validated = {}
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    @staticmethod
+    def _entry_name(key, etag):
+        digest = hashlib.sha256(
+            u'\n'.join(key + (etag or u'',)).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _current_etag(self, obj, key):
+        with self._lock:
+            etag, validated = self._validated.get(key, (None, 0))
+        if etag is not None and time.time() - validated < self.ttl:
+            return etag
+        # pylint:disable=protected-access
+        etag = obj._remote_etag()
+        if etag is not None:
+            with self._lock:
+                self._validated[key] = (etag, time.time())
+        return etag
+
+    def open(self, obj):
+        """
+        Return the content of a bucket object, reading it from the cache if
+        possible and storing it in the cache otherwise.
+
+        :type obj: :class:`.BaseBucketObject`
+        :param obj: The object to read.
+
+        :rtype: :class:`.CachedContent`
+        :return: A file-like object with the object's content.
+        """
+        # pylint:disable=protected-access
+        key = (obj._provider.PROVIDER_ID, obj._bucket_name, obj.name)
+        etag = self._current_etag(obj, key)
+        if etag is None:
+            # Let the provider report the missing object in its usual way
+            return obj._fetch_content()
+        path = os.path.join(self.directory, self._entry_name(key, etag))
+        try:
+            # Record the access for LRU eviction
+            os.utime(path, None)
+            log.debug("Serving object %s from the cache", obj.name)
+            return CachedContent(path)
+        except (IOError, OSError):
+            pass
+        path = self._fetch(obj, key, etag, path)
+        # Map the entry before evicting, in case it is evicted itself
+        content = CachedContent(path)
+        self._evict()
+        return content
+
+    def _fetch(self, obj, key, etag, path):
+        """
+        Download an object into the cache, and return the path of the
+        entry, which is keyed by the etag returned with the content.
+        """
+        log.debug("Caching object %s in %s", obj.name, path)
+        tmp_path = '%s.%s.%s%s' % (path, os.getpid(),
+                                   threading.current_thread().ident,
+                                   PART_SUFFIX)
+        try:
+            with open(tmp_path, 'wb') as f:
+                # pylint:disable=protected-access
+                for chunk in obj._fetch_content():
+                    f.write(chunk)
+            fetched_etag = obj._content_etag()
+            if fetched_etag is not None and fetched_etag != etag:
+                # The object was overwritten since its etag was checked
+                log.debug("Object %s changed while being cached", obj.name)
+                path = os.path.join(self.directory,
+                                    self._entry_name(key, fetched_etag))
+                with self._lock:
+                    self._validated[key] = (fetched_etag, time.time())
+            getattr(os, 'replace', os.rename)(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return path
+
+    def _evict(self):
+        """
+        Remove the least recently used entries until the cache fits within
+        ``max_size``.
+        """
+        entries = []
+        cached = set()
+        total = 0
+        for entry in os.listdir(self.directory):
+            if entry.endswith(PART_SUFFIX):
+                continue
+            path = os.path.join(self.directory, entry)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            cached.add(entry)
+            total += stat.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                cached.discard(os.path.basename(path))
+                log.debug("Evicted %s from the object cache", path)
+            except OSError:
+                pass
+        with self._lock:
+            # Forget the etags of the objects no longer cached, here or by
+            # another process sharing the directory
+            for key, (etag, _) in list(self._validated.items()):
+                if self._entry_name(key, etag) not in cached:
+                    del self._validated[key]
@@ -0,0 +1,141 @@
+"""
+Streaming compression of object content
+"""
+import zlib
+
+from cloudbridge.cloud.interfaces.exceptions \
+    import InvalidConfigurationException
+from cloudbridge.cloud.interfaces.resources import ContentEncoding
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Name of the user metadata entry recording how an object's content is
+# encoded
+ENCODING_METADATA_KEY = 'cb-content-encoding'
+# Size of the chunks read from the source while compressing
+READ_CHUNK_SIZE = 64 * 1024
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def _check_encoding(encoding):
+    if encoding not in (ContentEncoding.GZIP, ContentEncoding.ZSTD):
+        raise InvalidConfigurationException(
+            "Unsupported content encoding: %s" % encoding)
+    if encoding == ContentEncoding.ZSTD and zstandard is None:
+        raise InvalidConfigurationException(
+            "The zstandard package is required for zstd content encoding")
+
+
+def _compressor(encoding):
+    _check_encoding(encoding)
+    if encoding == ContentEncoding.GZIP:
+        return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED,
+                                16 + zlib.MAX_WBITS)
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+
+def _decompressor(encoding):
+    _check_encoding(encoding)
+    if encoding == ContentEncoding.GZIP:
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    return zstandard.ZstdDecompressor().decompressobj()
+
+
+class CompressingReader(object):
+    """
+    A file-like object returning the compressed content of ``fp``.
+
+    The source is read in chunks of ``READ_CHUNK_SIZE`` bytes as the
+    compressed content is consumed, so only about one chunk of either is
+    held in memory at a time, besides what ``read`` was asked for.
+    """
+
+    def __init__(self, fp, encoding):
+        self._fp = fp
+        self._compressor = _compressor(encoding)
+        self._buffer = b''
+        self._eof = False
+
+    def _fill(self, size):
+        parts = [self._buffer]
+        available = len(self._buffer)
+        while not self._eof and (size < 0 or available < size):
+            data = self._fp.read(READ_CHUNK_SIZE)
+            if data:
+                data = self._compressor.compress(data)
+            else:
+                data = self._compressor.flush()
+                self._eof = True
+            parts.append(data)
+            available += len(data)
+        self._buffer = b''.join(parts)
+
+    def read(self, size=-1):
+        """
+        Read up to ``size`` bytes of compressed content. Fewer bytes are
+        only returned at the end of the content.
+        """
+        if size is None:
+            size = -1
+        self._fill(size)
+        if size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class DecompressingStream(object):
+    """
+    Decompresses downloaded content, an iterable of compressed chunks, as it
+    is read.
+    """
+
+    def __init__(self, content, encoding):
+        self._content = content
+        self._chunks = iter(content)
+        self._decompressor = _decompressor(encoding)
+        self._buffer = b''
+        self._eof = False
+
+    def _next(self):
+        for chunk in self._chunks:
+            data = self._decompressor.decompress(chunk)
+            if data:
+                return data
+        self._eof = True
+        flush = getattr(self._decompressor, 'flush', None)
+        return flush() if flush else b''
+
+    def read(self, size=-1):
+        if size is None:
+            size = -1
+        parts = [self._buffer]
+        available = len(self._buffer)
+        while not self._eof and (size < 0 or available < size):
+            data = self._next()
+            parts.append(data)
+            available += len(data)
+        data = b''.join(parts)
+        if size < 0:
+            self._buffer = b''
+        else:
+            data, self._buffer = data[:size], data[size:]
+        return data
+
+    def __iter__(self):
+        if self._buffer:
+            data, self._buffer = self._buffer, b''
+            yield data
+        while not self._eof:
+            data = self._next()
+            if data:
+                yield data
+
+    def close(self):
+        if hasattr(self._content, 'close'):
+            self._content.close()
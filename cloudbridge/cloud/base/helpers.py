@@ -0,0 +1,294 @@
+"""
+Helper functions shared by the provider implementations
+"""
+import calendar
+import email.utils
+import hashlib
+import itertools
+import json
+import logging
+import os
+import re
+
+from collections import deque
+from datetime import datetime
+from multiprocessing.pool import ThreadPool
+
+import six
+
+log = logging.getLogger(__name__)
+
+# Number of worker threads used by bulk operations when the caller does not
+# request a specific level of concurrency.
+DEFAULT_MAX_WORKERS = 10
+# Number of elements per worker that parallel_map reads ahead of the
+# results being collected
+INFLIGHT_PER_WORKER = 2
+
+# Size of the blocks read when computing file checksums
+HASH_BLOCK_SIZE = 1024 * 1024
+
+MD5_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# Code point treated as the upper end of the keyspace when splitting an
+# unbounded key range. Object names are mostly ASCII, so splitting below
+# this point balances the work best; names above it still fall into the
+# last, unbounded, range.
+KEY_SPLIT_CEILING = 0x80
+
+
+def chunked(iterable, size):
+    """
+    Split an iterable into lists of at most ``size`` elements.
+
+    The iterable is consumed lazily, so this is safe to use on very large
+    generators (e.g. a paged bucket listing).
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parallel_map(func, items, max_workers=None):
+    """
+    Apply ``func`` to every element of ``items`` using a pool of threads.
+
+    An exception raised by ``func`` does not abort the remaining calls;
+    the exception is returned in place of the result for that element
+    instead, so that callers can report partial failures.
+
+    ``items`` is consumed lazily: at most ``INFLIGHT_PER_WORKER`` elements
+    per worker are read ahead of the calls that have completed, so a large
+    generator is never buffered in full. Only the results are kept.
+
+    :type func: ``callable``
+    :param func: A function accepting a single element of ``items``.
+
+    :type items: ``iterable``
+    :param items: The elements to process.
+
+    :type max_workers: ``int``
+    :param max_workers: Maximum number of threads to use. Defaults to
+                        ``DEFAULT_MAX_WORKERS``.
+
+    :rtype: ``list``
+    :return: The results (or exceptions) in the same order as ``items``.
+    """
+    def _call(item):
+        try:
+            return func(item)
+        except Exception as e:
+            log.debug("Parallel call to %s failed: %s", func, e)
+            return e
+
+    workers = max_workers or DEFAULT_MAX_WORKERS
+    if workers <= 1:
+        return [_call(item) for item in items]
+    pool = ThreadPool(workers)
+    try:
+        # ThreadPool.imap would drain ``items`` into its task queue at once,
+        # so submit a bounded window of calls instead
+        results = []
+        inflight = deque()
+        for item in items:
+            if len(inflight) >= workers * INFLIGHT_PER_WORKER:
+                results.append(inflight.popleft().get())
+            inflight.append(pool.apply_async(_call, (item,)))
+        while inflight:
+            results.append(inflight.popleft().get())
+        return results
+    finally:
+        pool.close()
+        pool.join()
+
+
+def iter_map(func, items, max_workers=None):
+    """
+    Apply ``func`` to every element of ``items`` using a pool of threads,
+    yielding the results in order as they become available.
+
+    Unlike :func:`parallel_map`, only ``max_workers`` calls are made ahead
+    of the consumer, so that the results do not pile up in memory, and the
+    first exception raised by ``func`` is raised to the consumer. Closing
+    the returned generator abandons the calls still in progress.
+
+    :rtype: ``generator``
+    :return: The results in the same order as ``items``.
+    """
+    workers = max_workers or DEFAULT_MAX_WORKERS
+    pool = ThreadPool(workers)
+    try:
+        inflight = deque()
+        for item in items:
+            if len(inflight) >= workers:
+                yield inflight.popleft().get()
+            inflight.append(pool.apply_async(func, (item,)))
+        while inflight:
+            yield inflight.popleft().get()
+    finally:
+        pool.terminate()
+
+
+def key_midpoint(lower, upper=None, keep=0):
+    """
+    Find an object name roughly halfway between two names in lexicographic
+    (code point) order, which is the order in which object stores list
+    their contents.
+
+    :type lower: ``str``
+    :param lower: The lower end of the range.
+
+    :type upper: ``str``
+    :param upper: The upper end of the range, or ``None`` if the range is
+                  unbounded.
+
+    :type keep: ``int``
+    :param keep: Number of leading characters of ``lower`` to keep, such as
+                 the length of a listing prefix shared by all names in the
+                 range.
+
+    :rtype: ``str``
+    :return: A name strictly between ``lower`` and ``upper``, or ``None`` if
+             no such name can be found.
+    """
+    i = keep
+    while True:
+        low = ord(lower[i]) if i < len(lower) else -1
+        if upper is None:
+            high = max(KEY_SPLIT_CEILING, low + 2)
+        elif i < len(upper):
+            high = ord(upper[i])
+        else:
+            return None
+        if high - low > 1:
+            middle = (low + high) // 2
+            if 0xD800 <= middle <= 0xDFFF:
+                # Surrogates cannot be encoded in an object name
+                return None
+            return lower[:i] + six.unichr(middle)
+        if high < low or low < 0:
+            return None
+        if high - low == 1:
+            # Any name starting with lower[:i + 1] sorts before upper
+            upper = None
+        i += 1
+
+
+def file_md5(path):
+    """
+    Compute the hex encoded MD5 digest of a local file.
+    """
+    md5 = hashlib.md5()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+def is_md5(etag):
+    """
+    Check whether an object's etag is a plain MD5 digest of its content, as
+    opposed to the checksum of a multipart or segmented upload.
+    """
+    return bool(etag and MD5_PATTERN.match(etag.lower()))
+
+
+def to_epoch(last_modified):
+    """
+    Convert a ``BucketObject.last_modified`` string, which is in UTC, to
+    seconds since the epoch.
+
+    :rtype: ``float``
+    :return: The timestamp, or ``None`` if ``last_modified`` is not set.
+    """
+    if not last_modified:
+        return None
+    seconds, _, fraction = last_modified.partition('.')
+    # Slicing the fixed-width fields is much cheaper than strptime, which
+    # matters when converting the dates of millions of listed objects
+    timestamp = calendar.timegm((
+        int(seconds[0:4]), int(seconds[5:7]), int(seconds[8:10]),
+        int(seconds[11:13]), int(seconds[14:16]), int(seconds[17:19])))
+    if fraction:
+        timestamp += float("0." + fraction.rstrip('Z'))
+    return timestamp
+
+
+def epoch_to_iso(timestamp):
+    """
+    Convert seconds since the epoch to the format used by
+    ``BucketObject.last_modified``.
+
+    :rtype: ``str``
+    :return: The date in UTC, formatted as %Y-%m-%dT%H:%M:%S.%f, or ``None``
+             if ``timestamp`` is not set.
+    """
+    if timestamp is None:
+        return None
+    return datetime.utcfromtimestamp(timestamp).strftime(
+        "%Y-%m-%dT%H:%M:%S.%f")
+
+
+def http_date_to_iso(value):
+    """
+    Convert an HTTP date header (e.g. ``Last-Modified``) to the format used
+    by ``BucketObject.last_modified``.
+
+    :rtype: ``str``
+    :return: The date in UTC, formatted as %Y-%m-%dT%H:%M:%S.%f, or ``None``
+             if the value cannot be parsed.
+    """
+    parsed = email.utils.parsedate_tz(value) if value else None
+    if not parsed:
+        return None
+    return datetime.utcfromtimestamp(email.utils.mktime_tz(parsed)).strftime(
+        "%Y-%m-%dT%H:%M:%S.%f")
+
+
+def upload_identity(path, container, name):
+    """
+    Describe a local file and its upload target, so that a checkpoint can be
+    matched against a later attempt to upload the same, unchanged, file.
+    """
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size,
+            'mtime': stat.st_mtime, 'target': '%s/%s' % (container, name)}
+
+
+def load_checkpoint(checkpoint, identity):
+    """
+    Load the state saved in an upload checkpoint file.
+
+    :rtype: ``dict``
+    :return: The saved state, or an empty dict if the file does not exist,
+             cannot be read or belongs to a different upload.
+    """
+    try:
+        with open(checkpoint) as f:
+            state = json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+    if any(state.get(key) != value for key, value in identity.items()):
+        log.debug("Ignoring checkpoint %s for a different upload", checkpoint)
+        return {}
+    return state
+
+
+def save_checkpoint(checkpoint, state):
+    """
+    Atomically replace the contents of an upload checkpoint file.
+    """
+    tmp_path = checkpoint + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    getattr(os, 'replace', os.rename)(tmp_path, checkpoint)
+
+
+def remove_checkpoint(checkpoint):
+    try:
+        os.remove(checkpoint)
+    except OSError:
+        pass
@@ -1,12 +1,17 @@
 """Base implementation of a provider interface."""
 import functools
+import logging
 import os
+import threading
 from os.path import expanduser
 try:
     from configparser import ConfigParser
 except ImportError:  # Python 2
     from ConfigParser import SafeConfigParser as ConfigParser
 
+from cloudbridge.cloud.base import helpers as cbhelpers
+from cloudbridge.cloud.base.cache import ObjectCache
+from cloudbridge.cloud.base.transfer import TransferManager
 from cloudbridge.cloud.interfaces import CloudProvider
 from cloudbridge.cloud.interfaces.exceptions import ProviderConnectionException
 from cloudbridge.cloud.interfaces.resources import Configuration
@@ -15,6 +20,8 @@ from cloudbridge.cloud.interfaces.resources import Configuration
 DEFAULT_RESULT_LIMIT = 50
 DEFAULT_WAIT_TIMEOUT = 600
 DEFAULT_WAIT_INTERVAL = 5
+DEFAULT_OBJECT_CACHE_SIZE = 10 * 1024 ** 3
+DEFAULT_OBJECT_CACHE_TTL = 300
 
 # By default, use two locations for CloudBridge configuration
 CloudBridgeConfigPath = '/etc/cloudbridge.ini'
@@ -22,6 +29,8 @@ CloudBridgeConfigLocations = [CloudBridgeConfigPath]
 UserConfigPath = os.path.join(expanduser('~'), '.cloudbridge')
 CloudBridgeConfigLocations.append(UserConfigPath)
 
+log = logging.getLogger(__name__)
+
 
 class BaseConfiguration(Configuration):
 
@@ -68,18 +77,107 @@ class BaseConfiguration(Configuration):
         """
         return self.get('cb_debug', os.environ.get('CB_DEBUG', False))
 
+    @property
+    def object_cache_dir(self):
+        """
+        The directory in which the content of bucket objects is cached.
+        Caching is disabled unless this is set, either through the
+        ``object_cache_dir`` config value or the ``CB_OBJECT_CACHE_DIR``
+        environment variable.
+
+        :rtype: ``str``
+        :return: The cache directory, or ``None``.
+        """
+        return self.get('object_cache_dir',
+                        os.environ.get('CB_OBJECT_CACHE_DIR'))
+
+    @property
+    def object_cache_size(self):
+        """
+        Gets the maximum size, in bytes, of the object cache.
+        """
+        return self.get('object_cache_size',
+                        os.environ.get('CB_OBJECT_CACHE_SIZE',
+                                       DEFAULT_OBJECT_CACHE_SIZE))
+
+    @property
+    def transfer_max_rate(self):
+        """
+        Gets the cap on the combined rate of object transfers, in bytes per
+        second.
+        """
+        return self.get('transfer_max_rate',
+                        os.environ.get('CB_TRANSFER_MAX_RATE'))
+
+    @property
+    def transfer_max_inflight_bytes(self):
+        """
+        Gets the bound on the combined size of the object transfers in
+        progress, in bytes.
+        """
+        return self.get('transfer_max_inflight_bytes',
+                        os.environ.get('CB_TRANSFER_MAX_INFLIGHT_BYTES'))
+
+    @property
+    def object_cache_ttl(self):
+        """
+        Gets the number of seconds for which a cached object is served
+        without checking whether it has changed.
+        """
+        return self.get('object_cache_ttl',
+                        os.environ.get('CB_OBJECT_CACHE_TTL',
+                                       DEFAULT_OBJECT_CACHE_TTL))
+
 
 class BaseCloudProvider(CloudProvider):
 
+    # Number of resources tagged concurrently by tag_many
+    TAG_WORKERS = 32
+
     def __init__(self, config):
         self._config = BaseConfiguration(config)
         self._config_parser = ConfigParser()
         self._config_parser.read(CloudBridgeConfigLocations)
+        self._object_cache = None
+        self._object_cache_lock = threading.Lock()
+        self._transfers = TransferManager(
+            int(self.config.transfer_max_rate or 0) or None,
+            int(self.config.transfer_max_inflight_bytes or 0) or None)
 
     @property
     def config(self):
         return self._config
 
+    @property
+    def transfers(self):
+        """
+        The manager through which all object uploads and downloads are
+        scheduled, to apply bandwidth caps and priorities and to report
+        progress.
+
+        :rtype: :class:`.TransferManager`
+        :return: The provider's transfer manager.
+        """
+        return self._transfers
+
+    @property
+    def object_cache(self):
+        """
+        The local disk cache through which bucket object content is read.
+
+        :rtype: :class:`.ObjectCache`
+        :return: The cache, or ``None`` if no ``object_cache_dir`` is
+                 configured.
+        """
+        if self._object_cache is None and self.config.object_cache_dir:
+            with self._object_cache_lock:
+                if self._object_cache is None:
+                    self._object_cache = ObjectCache(
+                        self.config.object_cache_dir,
+                        int(self.config.object_cache_size),
+                        float(self.config.object_cache_ttl))
+        return self._object_cache
+
     @property
     def name(self):
         return str(self.__class__.__name__)
@@ -97,6 +195,37 @@ class BaseCloudProvider(CloudProvider):
             raise ProviderConnectionException(
                 "Authentication with cloud provider failed: %s" % (e,))
 
+    def tag_many(self, resources, tags):
+        """
+        Tag each resource concurrently with ``_tag_resource``.
+        """
+        resources = list(resources)
+        results = cbhelpers.parallel_map(
+            lambda resource: self._tag_resource(resource, tags), resources,
+            self.TAG_WORKERS)
+        return self._report_tag_results(resources, results)
+
+    def _tag_resource(self, resource, tags):
+        """
+        Apply ``tags`` to a single resource. Only the ``Name`` tag is
+        supported unless a provider overrides this.
+        """
+        unsupported = set(tags) - set(['Name'])
+        if unsupported:
+            raise NotImplementedError(
+                "Tags %s are not supported for %s" % (sorted(unsupported),
+                                                      resource))
+        if 'Name' in tags:
+            resource.name = tags['Name']
+        return True
+
+    @staticmethod
+    def _report_tag_results(resources, results):
+        for resource, result in zip(resources, results):
+            if isinstance(result, Exception):
+                log.warning("Could not tag %s: %s", resource, result)
+        return results
+
     def _deepgetattr(self, obj, attr):
         """Recurses through an attribute chain to get the ultimate value."""
         return functools.reduce(getattr, attr.split('.'), obj)
@@ -1,14 +1,21 @@
 """
 Base implementation for data objects exposed through a provider or service
 """
+import copy
 import inspect
 import itertools
 import logging
 import os
 import re
 import shutil
+import threading
 import time
 
+from collections import deque
+from collections import namedtuple
+
+from cloudbridge.cloud.base import compression as cbcompression
+from cloudbridge.cloud.base import helpers as cbhelpers
 from cloudbridge.cloud.interfaces.exceptions \
     import InvalidConfigurationException
 from cloudbridge.cloud.interfaces.exceptions import InvalidNameException
@@ -25,6 +32,7 @@ from cloudbridge.cloud.interfaces.resources import InstanceType
 from cloudbridge.cloud.interfaces.resources import InternetGateway
 from cloudbridge.cloud.interfaces.resources import KeyPair
 from cloudbridge.cloud.interfaces.resources import LaunchConfig
+from cloudbridge.cloud.interfaces.resources import LaunchPlan
 from cloudbridge.cloud.interfaces.resources import MachineImage
 from cloudbridge.cloud.interfaces.resources import MachineImageState
 from cloudbridge.cloud.interfaces.resources import Network
@@ -472,6 +480,74 @@ class BaseLaunchConfig(LaunchConfig):
             is_volume=True, source=source, is_root=is_root, size=size,
             delete_on_terminate=delete_on_terminate)
 
+    def compile(self, image, instance_type, subnet, zone=None,
+                key_pair=None, security_groups=None, user_data=None):
+        # pylint:disable=protected-access
+        return self.provider.compute.instances._compile(
+            image, instance_type, subnet, zone, key_pair, security_groups,
+            user_data, self)
+
+
+class BaseLaunchPlan(LaunchPlan):
+    """
+    Holds the provider specific arguments of the launch request, as built by
+    the instance service's ``_compile`` method, along with the resolved IDs.
+    """
+
+    def __init__(self, provider, image_id, instance_type_id, subnet_id,
+                 zone_id, launch_args, port_template=None):
+        values = dict(
+            _provider_id=provider.PROVIDER_ID, _image_id=image_id,
+            _instance_type_id=instance_type_id, _subnet_id=subnet_id,
+            _zone_id=zone_id, _launch_args=copy.deepcopy(launch_args),
+            _port_template=port_template)
+        for attr, value in values.items():
+            object.__setattr__(self, attr, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("A launch plan cannot be modified")
+
+    @property
+    def provider_id(self):
+        return self._provider_id
+
+    @property
+    def image_id(self):
+        return self._image_id
+
+    @property
+    def instance_type_id(self):
+        return self._instance_type_id
+
+    @property
+    def subnet_id(self):
+        return self._subnet_id
+
+    @property
+    def zone_id(self):
+        return self._zone_id
+
+    @property
+    def launch_args(self):
+        """
+        A copy of the keyword arguments of the provider's launch request, so
+        that the request cannot alter the plan.
+        """
+        return copy.deepcopy(self._launch_args)
+
+    @property
+    def port_template(self):
+        """
+        The arguments for creating the network port of each instance, on
+        providers that create one, or ``None``.
+        """
+        return self._port_template
+
+    def __repr__(self):
+        return "<CB-{0}: {1}, {2}, {3}>".format(
+            self.__class__.__name__, self.image_id, self.instance_type_id,
+            self.subnet_id)
+
 
 class BaseMachineImage(
         BaseCloudResource, BaseObjectLifeCycleMixin, MachineImage):
@@ -755,6 +831,11 @@ class BaseBucketObject(BaseCloudResource, BucketObject):
     # s/537772/what-is-the-most-correct-regular-expression-for-a-unix-file-path
     CB_NAME_PATTERN = re.compile(r"[^\0]+")
 
+    # Objects larger than this are copied between providers by downloading
+    # ranges of ``COPY_PART_SIZE`` bytes concurrently
+    COPY_PARALLEL_THRESHOLD = 64 * 1024 ** 2
+    COPY_PART_SIZE = 8 * 1024 ** 2
+
     def __init__(self, provider):
         super(BaseBucketObject, self).__init__(provider)
 
@@ -770,6 +851,126 @@ class BaseBucketObject(BaseCloudResource, BucketObject):
                 "in: http://docs.aws.amazon.com/AmazonS3/latest/dev/UsingMeta"
                 "data.html#object-key-guidelines" % name)
 
+    @property
+    def _bucket_name(self):
+        """
+        The name of the bucket this object belongs to.
+        """
+        raise NotImplementedError(
+            "_bucket_name not implemented by this provider")
+
+    def _remote_etag(self):
+        """
+        Fetch this object's current etag from the provider, with a single
+        HEAD request.
+
+        :rtype: ``str``
+        :return: The etag, or ``None`` if the object no longer exists.
+        """
+        raise NotImplementedError(
+            "_remote_etag not implemented by this provider")
+
+    def _iter_remote_content(self):
+        """
+        Download this object's content from the provider, as an iterable.
+        """
+        raise NotImplementedError(
+            "_iter_remote_content not implemented by this provider")
+
+    def _content_etag(self):
+        """
+        The etag returned with the content by the last call to
+        ``_iter_remote_content``.
+
+        :rtype: ``str``
+        :return: The etag, or ``None`` if it is not known.
+        """
+        return None
+
+    def _iter_remote_range(self, start, end):
+        """
+        Download the bytes from ``start`` to ``end``, inclusive, of this
+        object's content as stored, as an iterable. Like
+        ``_iter_remote_content``, this records the object's content
+        encoding.
+        """
+        raise NotImplementedError(
+            "_iter_remote_range not implemented by this provider")
+
+    def _iter_remote_parts(self, size):
+        """
+        Download this object's content as consecutive parts of
+        ``COPY_PART_SIZE`` bytes, several of which are fetched concurrently
+        ahead of the consumer. The first part is fetched before this
+        returns, so that the content encoding is known.
+        """
+        part_size = self.COPY_PART_SIZE
+
+        def _fetch(start):
+            end = min(start + part_size, size) - 1
+            return b''.join(self._iter_remote_range(start, end))
+
+        first = _fetch(0)
+        rest = cbhelpers.iter_map(self._provider.transfers.bind(_fetch),
+                                  range(part_size, size, part_size))
+        return itertools.chain([first], rest), rest
+
+    def _content_encoding(self):
+        """
+        The :class:`.ContentEncoding` recorded in this object's metadata by
+        the last call to ``_iter_remote_content``, if any.
+        """
+        return None
+
+    def _upload_stream(self, stream, encoding):
+        """
+        Upload content of unknown length from a file-like object, recording
+        ``encoding`` in the object's metadata.
+        """
+        raise NotImplementedError(
+            "_upload_stream not implemented by this provider")
+
+    def _upload_compressed(self, fp, compression):
+        """
+        Compress the content read from ``fp`` as it is uploaded.
+        """
+        stream = cbcompression.CompressingReader(fp, compression)
+        # The size of the compressed content is only known once it is sent
+        with self._provider.transfers.transfer(None) as transfer:
+            self._upload_stream(transfer.reader(stream), compression)
+        return True
+
+    def _fetch_content(self):
+        """
+        Download this object's content through the provider's transfer
+        manager, decompressing it if it was uploaded compressed.
+        """
+        transfers = self._provider.transfers
+        if not transfers.managed:
+            content = self._iter_remote_content()
+        else:
+            transfer = transfers.begin(self.size)
+            try:
+                content = transfer.stream(self._iter_remote_content())
+            except Exception:
+                transfer.finish()
+                raise
+        encoding = self._content_encoding()
+        if encoding:
+            return cbcompression.DecompressingStream(content, encoding)
+        return content
+
+    def iter_content(self):
+        """
+        Returns this object's content as an iterable, reading it through the
+        provider's object cache if one is configured. The cache holds the
+        decompressed content of compressed objects.
+        """
+        cache = self._provider.object_cache
+        if cache is None:
+            return self._fetch_content()
+        return cache.open(self)
+
     def save_content(self, target_stream):
         """
         Download this object and write its
@@ -777,6 +978,32 @@ class BaseBucketObject(BaseCloudResource, BucketObject):
         """
         shutil.copyfileobj(self.iter_content(), target_stream)
 
+    def copy_to(self, target_bucket, name=None):
+        """
+        Copy this object by streaming its content, as stored, into the
+        target object, so that compressed content is not decompressed on
+        the way. Objects larger than ``COPY_PARALLEL_THRESHOLD`` are
+        downloaded as ranges fetched concurrently. Providers override this
+        to copy server side where possible.
+        """
+        target = target_bucket.create_object(name or self.name)
+        size = self.size
+        with self._provider.transfers.transfer(size) as transfer:
+            if size and size > self.COPY_PARALLEL_THRESHOLD:
+                chunks, content = self._iter_remote_parts(size)
+            else:
+                content = self._iter_remote_content()
+                chunks = content
+            try:
+                # pylint:disable=protected-access
+                target._upload_stream(
+                    transfer.reader(_ChunkReader(chunks)),
+                    self._content_encoding())
+            finally:
+                if hasattr(content, 'close'):
+                    content.close()
+        return target
+
     def __eq__(self, other):
         return (isinstance(other, BucketObject) and
                 # pylint:disable=protected-access
@@ -790,6 +1017,226 @@ class BaseBucketObject(BaseCloudResource, BucketObject):
                                       self.name)
 
 
+class _ChunkReader(object):
+    """
+    A file-like view of downloaded content, which providers return as an
+    iterable of chunks.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = b''
+        self._eof = False
+
+    def read(self, size=-1):
+        if size is None:
+            size = -1
+        parts = [self._buffer]
+        available = len(self._buffer)
+        while not self._eof and (size < 0 or available < size):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._eof = True
+            else:
+                parts.append(chunk)
+                available += len(chunk)
+        data = b''.join(parts)
+        if size < 0:
+            self._buffer = b''
+        else:
+            data, self._buffer = data[:size], data[size:]
+        return data
+
+
+class BucketObjectRecord(namedtuple('BucketObjectRecord',
+                                    ['name', 'size', 'etag',
+                                     'last_modified'])):
+    """
+    A compact, read-only summary of a bucket object, as returned by
+    ``Bucket.list(lightweight=True)``.
+
+    ``last_modified`` is expressed in seconds since the epoch. A full
+    :class:`.BucketObject` can be built from a record with
+    :meth:`.Bucket.from_record`.
+    """
+    __slots__ = ()
+
+    @property
+    def id(self):
+        return self.name
+
+
+class _ListingShard(object):
+    """
+    A range of object names, ``(start, end]``, listed by a single worker.
+    """
+    __slots__ = ('start', 'end', 'items', 'done')
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.items = deque()
+        self.done = False
+
+
+class _ShardedListing(object):
+    """
+    Lists the objects in a bucket using several workers, each of which
+    pages through a lexicographic range of object names (a shard).
+
+    Listing starts with a single shard covering the whole keyspace. Whenever
+    a worker is idle, a busy worker hands over the upper half of the range
+    it has left to list, so the work spreads out within a few pages,
+    whatever the distribution of object names.
+    """
+
+    # Maximum number of listed objects held for the consumer before the
+    # workers pause
+    MAX_BUFFERED = 10000
+
+    def __init__(self, bucket, prefix, parallelism, ordered, page_size,
+                 lightweight=False):
+        self._bucket = bucket
+        self._prefix = prefix or ''
+        self._parallelism = parallelism
+        self._ordered = ordered
+        self._page_size = page_size
+        self._lightweight = lightweight
+        self._cond = threading.Condition()
+        # All unfinished shards (or shards with unconsumed results), in
+        # key order
+        self._shards = []
+        self._pending = deque()
+        self._active = 0
+        self._idle = 0
+        self._buffered = 0
+        self._error = None
+        self._stopped = False
+
+    def __iter__(self):
+        root = _ListingShard(None, None)
+        self._shards.append(root)
+        self._pending.append(root)
+        self._active = 1
+        for _ in range(self._parallelism):
+            worker = threading.Thread(target=self._work)
+            worker.daemon = True
+            worker.start()
+        try:
+            while True:
+                with self._cond:
+                    batch = self._take()
+                    while not batch:
+                        if self._error:
+                            raise self._error
+                        if not self._active:
+                            return
+                        self._cond.wait()
+                        batch = self._take()
+                for obj in batch:
+                    yield obj
+        finally:
+            with self._cond:
+                self._stopped = True
+                self._cond.notify_all()
+
+    def _take(self):
+        """
+        Remove and return the results that can be handed to the consumer.
+        Must be called with the lock held.
+        """
+        batch = []
+        removed = False
+        for shard in list(self._shards):
+            batch.extend(shard.items)
+            shard.items.clear()
+            if shard.done:
+                self._shards.remove(shard)
+                removed = True
+            elif self._ordered:
+                # Later shards have to wait until this one is finished
+                break
+        self._buffered -= len(batch)
+        if batch or removed:
+            # Wake the workers waiting for room, or for their shard to come
+            # first
+            self._cond.notify_all()
+        return batch
+
+    def _work(self):
+        while True:
+            with self._cond:
+                self._idle += 1
+                while not (self._pending or self._stopped) and self._active:
+                    self._cond.wait()
+                self._idle -= 1
+                if self._stopped or not self._pending:
+                    return
+                shard = self._pending.popleft()
+            try:
+                self._list_shard(shard)
+            except Exception as e:
+                with self._cond:
+                    self._error = e
+                    self._stopped = True
+                    self._cond.notify_all()
+                return
+
+    def _list_shard(self, shard):
+        marker = shard.start
+        while True:
+            page = self._bucket.list(limit=self._page_size, marker=marker,
+                                     prefix=self._prefix or None,
+                                     lightweight=self._lightweight)
+            items = [obj for obj in page
+                     if shard.end is None or obj.name <= shard.end]
+            finished = len(items) < len(page) or not page.is_truncated
+            with self._cond:
+                while not self._stopped and self._must_wait(shard):
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                shard.items.extend(items)
+                self._buffered += len(items)
+                if finished:
+                    shard.done = True
+                    self._active -= 1
+                else:
+                    marker = page.marker
+                    if self._idle > len(self._pending):
+                        self._split(shard, marker)
+                self._cond.notify_all()
+            if finished:
+                return
+
+    def _must_wait(self, shard):
+        """
+        Whether a worker must wait for the consumer before adding a page of
+        results to ``shard``. Must be called with the lock held.
+        """
+        if self._buffered < self.MAX_BUFFERED:
+            return False
+        # In order, only the first shard's results can be consumed, so it
+        # may add a page whenever the consumer has taken its results
+        return not (self._ordered and shard is self._shards[0] and
+                    not shard.items)
+
+    def _split(self, shard, marker):
+        """
+        Hand over the upper half of the names left in ``shard``, which are
+        those after ``marker``, to a new shard. Must be called with the lock
+        held.
+        """
+        middle = cbhelpers.key_midpoint(marker, shard.end, len(self._prefix))
+        if middle is None:
+            return
+        upper = _ListingShard(middle, shard.end)
+        shard.end = middle
+        self._shards.insert(self._shards.index(shard) + 1, upper)
+        self._pending.append(upper)
+        self._active += 1
+
+
 class BaseBucket(BaseCloudResource, BasePageableObjectMixin, Bucket):
 
     # Regular expression for valid bucket names.
@@ -800,6 +1247,13 @@ class BaseBucket(BaseCloudResource, BasePageableObjectMixin, Bucket):
     # ns/2063213/regular-expression-for-validating-dns-label-host-name
     CB_NAME_PATTERN = re.compile(r"^(?![0-9]+$)(?!-)[a-z0-9-]{3,63}(?<!-)$")
 
+    # Number of objects requested per listing call by bulk operations
+    LIST_PAGE_SIZE = 1000
+    # Suffix of the temporary files written while a download is in progress
+    SYNC_PART_SUFFIX = '.cbpart'
+    # Default number of concurrent uploads in upload_many
+    UPLOAD_MANY_WORKERS = 32
+
     def __init__(self, provider):
         super(BaseBucket, self).__init__(provider)
 
@@ -815,6 +1269,249 @@ class BaseBucket(BaseCloudResource, BasePageableObjectMixin, Bucket):
                 "in: http://docs.aws.amazon.com/awscloudtrail/latest/userguide"
                 "/cloudtrail-s3-bucket-naming-requirements.html" % name)
 
+    def exists(self, name):
+        return self.get(name) is not None
+
+    def iter_all(self, prefix=None, parallelism=None, ordered=False,
+                 lightweight=False):
+        workers = parallelism or cbhelpers.DEFAULT_MAX_WORKERS
+        if workers <= 1:
+            return self._iter_objects(prefix=prefix, lightweight=lightweight)
+        return iter(_ShardedListing(self, prefix, workers, ordered,
+                                    self.LIST_PAGE_SIZE, lightweight))
+
+    def _iter_objects(self, prefix=None, page_size=None, lightweight=False):
+        """
+        Iterate over the objects in this bucket whose names start with
+        ``prefix``, fetching one page of results at a time.
+        """
+        page_size = page_size or self.LIST_PAGE_SIZE
+        result_list = self.list(limit=page_size, prefix=prefix,
+                                lightweight=lightweight)
+        if not result_list.supports_server_paging:
+            for obj in result_list.data:
+                yield obj
+            return
+        while True:
+            for obj in result_list:
+                yield obj
+            if not result_list.is_truncated:
+                return
+            result_list = self.list(limit=page_size,
+                                    marker=result_list.marker, prefix=prefix,
+                                    lightweight=lightweight)
+
+    @staticmethod
+    def _sync_prefix(prefix):
+        if prefix and not prefix.endswith('/'):
+            return prefix + '/'
+        return prefix or ''
+
+    @staticmethod
+    def _iter_local_files(local_dir, rel_dir=''):
+        """
+        Walk ``local_dir`` and yield each file's relative path, using ``/``
+        as the separator, with its ``(path, size, mtime)``. The files are
+        yielded in the code point order of their relative paths, which is
+        the order in which buckets list objects, and only the listing of
+        one directory per level is held at a time.
+        """
+        entries = []
+        for name in os.listdir(local_dir):
+            path = os.path.join(local_dir, name)
+            if os.path.isdir(path):
+                # Like os.walk, do not follow links to directories
+                if not os.path.islink(path):
+                    # A directory sorts as the prefix of its files' paths
+                    entries.append((name + '/', path))
+            elif not name.endswith(BaseBucket.SYNC_PART_SUFFIX):
+                entries.append((name, path))
+        for name, path in sorted(entries):
+            if name.endswith('/'):
+                for entry in BaseBucket._iter_local_files(path,
+                                                          rel_dir + name):
+                    yield entry
+            else:
+                stat = os.stat(path)
+                yield rel_dir + name, (path, stat.st_size, stat.st_mtime)
+
+    @staticmethod
+    def _merge_sync(local_files, remote_objects):
+        """
+        Join two streams of ``(rel_path, item)`` pairs, both sorted by
+        relative path, into a stream of ``(rel_path, local_entry, obj)``,
+        with ``None`` on the side where the path is missing.
+        """
+        local = next(local_files, None)
+        remote = next(remote_objects, None)
+        while local or remote:
+            if remote is None or (local and local[0] < remote[0]):
+                yield local[0], local[1], None
+                local = next(local_files, None)
+            elif local is None or remote[0] < local[0]:
+                yield remote[0], None, remote[1]
+                remote = next(remote_objects, None)
+            else:
+                yield local[0], local[1], remote[1]
+                local = next(local_files, None)
+                remote = next(remote_objects, None)
+
+    def _iter_sync_pairs(self, local_dir, prefix):
+        remote = ((obj.name[len(prefix):], obj)
+                  for obj in self.iter_all(prefix=prefix, ordered=True))
+        return self._merge_sync(self._iter_local_files(local_dir), remote)
+
+    def _map_sync(self, func, pairs):
+        """
+        Apply ``func`` to each ``(rel_path, local_entry, obj)`` of ``pairs``
+        from a pool of threads, yielding each one with its result, or the
+        exception raised, as soon as they are available.
+        """
+        def _call(pair):
+            try:
+                return pair, func(pair)
+            except Exception as e:
+                return pair, e
+
+        return cbhelpers.iter_map(self._provider.transfers.bind(_call),
+                                  pairs)
+
+    @staticmethod
+    def _is_in_sync(local_entry, obj, upload):
+        """
+        Decide whether a local file and a bucket object hold the same data.
+
+        Size and modification times are compared first, so that the common
+        case of an unchanged file requires no hashing. If the times suggest
+        that the file has changed, the file's MD5 digest is compared against
+        the object's etag where possible.
+        """
+        path, size, mtime = local_entry
+        if size != obj.size:
+            return False
+        remote_mtime = cbhelpers.to_epoch(obj.last_modified)
+        if remote_mtime is not None:
+            if upload and mtime <= remote_mtime:
+                return True
+            if not upload and mtime >= remote_mtime:
+                return True
+        etag = obj.etag
+        return cbhelpers.is_md5(etag) and cbhelpers.file_md5(path) == etag
+
+    @staticmethod
+    def _report_sync_result(action, name, result):
+        if isinstance(result, Exception) or result is False:
+            log.warning("Could not %s %s: %s", action, name, result)
+            return False
+        return True
+
+    @staticmethod
+    def _read_source(source):
+        return source.read() if hasattr(source, 'read') else source
+
+    def _report_upload_results(self, names, results):
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                log.warning("Could not upload object %s to bucket %s: %s",
+                            name, self.name, result)
+        return results
+
+    def upload_many(self, items, max_workers=None):
+        """
+        Upload each object with ``create_object`` and ``upload`` from a pool
+        of threads. Providers whose connections cannot be shared between
+        threads override this.
+        """
+        def _upload(item):
+            name, source = item
+            obj = self.create_object(name)
+            obj.upload(self._read_source(source))
+            return obj
+
+        items = list(items)
+        results = cbhelpers.parallel_map(
+            self._provider.transfers.bind(_upload), items,
+            max_workers or self.UPLOAD_MANY_WORKERS)
+        return self._report_upload_results(
+            [name for name, _ in items], results)
+
+    def sync_from(self, local_dir, prefix=None, delete=False):
+        prefix = self._sync_prefix(prefix)
+
+        def _upload(pair):
+            _, local_entry, obj = pair
+            if obj and self._is_in_sync(local_entry, obj, upload=True):
+                return True
+            obj = obj or self.create_object(prefix + pair[0])
+            return obj.upload_from_file(local_entry[0])
+
+        success = True
+        extras = []
+        pairs = self._iter_sync_pairs(local_dir, prefix)
+        for pair, result in self._map_sync(
+                _upload, (pair for pair in pairs if pair[1] or delete)):
+            if pair[1]:
+                success = self._report_sync_result(
+                    "upload", pair[0], result) and success
+                continue
+            # Delete the objects with no local file in batches, as the
+            # listing goes
+            extras.append(prefix + pair[0])
+            if len(extras) >= self.LIST_PAGE_SIZE:
+                success = self.delete_objects(extras) and success
+                extras = []
+        if extras:
+            success = self.delete_objects(extras) and success
+        return success
+
+    def sync_to(self, local_dir, prefix=None, delete=False):
+        prefix = self._sync_prefix(prefix)
+        if not os.path.isdir(local_dir):
+            os.makedirs(local_dir)
+
+        def _download(pair):
+            rel_path, local_entry, obj = pair
+            if obj is None:
+                os.remove(local_entry[0])
+                return True
+            if local_entry and self._is_in_sync(local_entry, obj,
+                                                upload=False):
+                return True
+            path = os.path.join(local_dir, *rel_path.split('/'))
+            try:
+                os.makedirs(os.path.dirname(path))
+            except OSError:
+                # The directory already exists, possibly because it was
+                # created concurrently by another worker
+                pass
+            part_path = path + self.SYNC_PART_SUFFIX
+            with open(part_path, 'wb') as f:
+                obj.save_content(f)
+            getattr(os, 'replace', os.rename)(part_path, path)
+            remote_mtime = cbhelpers.to_epoch(obj.last_modified)
+            if remote_mtime is not None:
+                os.utime(path, (remote_mtime, remote_mtime))
+            return True
+
+        def _wanted(pair):
+            rel_path, _, obj = pair
+            if obj is None:
+                return delete
+            # Skip pseudo-directory markers
+            return rel_path and not rel_path.endswith('/')
+
+        success = True
+        pairs = self._iter_sync_pairs(local_dir, prefix)
+        for pair, result in self._map_sync(
+                _download, (pair for pair in pairs if _wanted(pair))):
+            if pair[2] is None:
+                success = self._report_sync_result(
+                    "delete", pair[1][0], result) and success
+            else:
+                success = self._report_sync_result(
+                    "download", pair[0], result) and success
+        return success
+
     def __eq__(self, other):
         return (isinstance(other, Bucket) and
                 # pylint:disable=protected-access
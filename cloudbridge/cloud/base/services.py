@@ -1,6 +1,16 @@
 """
 Base implementation for services available through a provider
 """
+import logging
+import threading
+import time
+
+from cloudbridge.cloud.base import helpers as cbhelpers
+from cloudbridge.cloud.interfaces.exceptions \
+    import InvalidConfigurationException
+from cloudbridge.cloud.interfaces.exceptions import WaitStateException
+from cloudbridge.cloud.interfaces.resources import Instance
+from cloudbridge.cloud.interfaces.resources import InstanceState
 from cloudbridge.cloud.interfaces.resources import Router
 
 from cloudbridge.cloud.interfaces.services import BlockStoreService
@@ -22,8 +32,13 @@ from cloudbridge.cloud.interfaces.services import SnapshotService
 from cloudbridge.cloud.interfaces.services import SubnetService
 from cloudbridge.cloud.interfaces.services import VolumeService
 
+from six.moves import queue
+
+from .resources import BaseLaunchPlan
 from .resources import BasePageableObjectMixin
 
+log = logging.getLogger(__name__)
+
 
 class BaseCloudService(CloudService):
 
@@ -134,8 +149,376 @@ class BaseInstanceTypesService(
 class BaseInstanceService(
         BasePageableObjectMixin, InstanceService, BaseCloudService):
 
+    # Number of instances listed per request by watch
+    WATCH_PAGE_SIZE = 1000
+
     def __init__(self, provider):
         super(BaseInstanceService, self).__init__(provider)
+        # Shared by all the watch generators of this service
+        self._watcher = _StateWatcher(self)
+
+    @staticmethod
+    def _instance_ids(instances):
+        return [instance.id if isinstance(instance, Instance) else instance
+                for instance in instances]
+
+    @staticmethod
+    def _report_results(action, instance_ids, results):
+        for instance_id, result in zip(instance_ids, results):
+            if isinstance(result, Exception):
+                log.warning("Could not %s instance %s: %s", action,
+                            instance_id, result)
+        return results
+
+    def _check_plan(self, plan):
+        if not (isinstance(plan, BaseLaunchPlan) and
+                plan.provider_id == self.provider.PROVIDER_ID):
+            raise InvalidConfigurationException(
+                "The launch plan was not compiled for this provider")
+
+    @staticmethod
+    def _spread_counts(count, weights):
+        """
+        Divide ``count`` in proportion to ``weights``, handing the remainder
+        out by largest fraction, and otherwise to the first entries.
+        """
+        total = float(sum(weights))
+        exact = [count * weight / total for weight in weights]
+        counts = [int(share) for share in exact]
+        by_fraction = sorted(range(len(weights)),
+                             key=lambda i: counts[i] - exact[i])
+        for i in by_fraction[:count - sum(counts)]:
+            counts[i] += 1
+        return counts
+
+    def create_spread(self, count, name_prefix, image, instance_type,
+                      subnets, weights=None, key_pair=None,
+                      security_groups=None, user_data=None,
+                      launch_config=None, **kwargs):
+        subnets = list(subnets)
+        if weights is None:
+            weights = [1] * len(subnets)
+        if (not subnets or len(weights) != len(subnets) or
+                any(weight < 0 for weight in weights) or not sum(weights)):
+            raise InvalidConfigurationException(
+                "Each subnet must have a non-negative weight, and at least"
+                " one weight must be positive")
+        launch_config = launch_config or self.create_launch_config()
+
+        plans = cbhelpers.parallel_map(
+            lambda subnet: launch_config.compile(
+                image, instance_type, subnet, key_pair=key_pair,
+                security_groups=security_groups, user_data=user_data),
+            subnets)
+        errors = [plan for plan in plans if isinstance(plan, Exception)]
+        if errors:
+            raise errors[0]
+        counts = self._spread_counts(count, weights)
+
+        def _launch(item):
+            group, placement = item
+            return self.launch_many(
+                counts[group], '{0}-{1}'.format(name_prefix, group + 1),
+                plans[placement])
+
+        launched = {}
+        failed = set()
+        # (group, subnet index) pairs, each group starting in its own subnet
+        pending = [(group, group) for group in range(len(subnets))
+                   if counts[group]]
+        while pending:
+            retry = []
+            error = None
+            for item, result in zip(pending, cbhelpers.parallel_map(
+                    _launch, pending)):
+                group, placement = item
+                if not isinstance(result, Exception):
+                    launched[group] = result
+                elif self._is_capacity_error(result):
+                    log.warning("Could not launch %d instances of %s in "
+                                "subnet %s: %s", counts[group], name_prefix,
+                                subnets[placement], result)
+                    failed.add(placement)
+                    retry.append((group, result))
+                else:
+                    # Launching in another subnet would fail the same way
+                    error = error or result
+            candidates = [placement for placement in range(len(subnets))
+                          if weights[placement] and placement not in failed]
+            if retry and not candidates:
+                error = error or retry[0][1]
+            if error:
+                log.warning("Could not launch instances %s; terminating "
+                            "them", name_prefix)
+                instances = [instance for group in launched.values()
+                             for instance in group]
+                if instances:
+                    self.terminate_many(instances)
+                raise error
+            pending = [(group, candidates[i % len(candidates)])
+                       for i, (group, _) in enumerate(retry)]
+        return [instance for group in sorted(launched)
+                for instance in launched[group]]
+
+    def _is_capacity_error(self, error):
+        """
+        Whether ``error``, raised by ``launch_many``, is specific to the
+        subnet or zone it was launched in, such as a lack of capacity, so
+        that the launch may succeed in another subnet. Providers override
+        this to recognize their own errors.
+        """
+        return False
+
+    @staticmethod
+    def _instance_names(count, name_prefix):
+        return ['{0}-{1}'.format(name_prefix, index)
+                for index in range(1, count + 1)]
+
+    def _refresh_many(self, instances):
+        """
+        Refresh the state of several instances. Providers override this to
+        query all of them with a single request.
+        """
+        for instance in instances:
+            instance.refresh()
+
+    def _wait_for_many(self, instances, target_states, terminal_states=None,
+                       timeout=None, interval=None):
+        """
+        Wait until all of ``instances`` are in one of ``target_states``,
+        refreshing those still pending together on each poll.
+        """
+        if timeout is None:
+            timeout = self.provider.config.default_wait_timeout
+        if interval is None:
+            interval = self.provider.config.default_wait_interval
+        end_time = time.time() + timeout
+        pending = [inst for inst in instances
+                   if inst.state not in target_states]
+        while pending:
+            failed = [inst for inst in pending
+                      if inst.state in (terminal_states or [])]
+            if failed:
+                raise WaitStateException(
+                    "Instances: {0} are in a terminal state and cannot be "
+                    "waited on.".format(failed))
+            if time.time() >= end_time:
+                raise WaitStateException(
+                    "Waited too long for instances: {0} to reach target "
+                    "state(s): {1}.".format(pending, target_states))
+            log.debug("Waiting for %d instances to reach target state(s): "
+                      "%s...", len(pending), target_states)
+            time.sleep(interval)
+            self._refresh_many(pending)
+            pending = [inst for inst in pending
+                       if inst.state not in target_states]
+
+    def _wait_for_launch(self, instances, name_prefix):
+        """
+        Wait until the provider reports all of the newly launched
+        ``instances``, as ``create`` does with ``wait=True``. If any of them
+        fails, they are all terminated, so that the launch remains
+        all-or-nothing.
+        """
+        try:
+            self._wait_for_many(
+                instances, [InstanceState.PENDING, InstanceState.RUNNING],
+                terminal_states=[InstanceState.TERMINATED,
+                                 InstanceState.ERROR])
+        except Exception:
+            log.warning("Instances %s did not launch; terminating them",
+                        name_prefix)
+            self.terminate_many(instances)
+            raise
+
+    def wait_till_ready(self, instances, timeout=None, interval=None):
+        self._wait_for_many(
+            instances, [InstanceState.RUNNING],
+            terminal_states=[InstanceState.TERMINATED, InstanceState.ERROR],
+            timeout=timeout, interval=interval)
+
+    def _iter_states(self):
+        """
+        Yield the ID and state of every instance, along with the provider's
+        own description of it, listing them in pages of
+        ``WATCH_PAGE_SIZE``. Providers override this, together with
+        ``_wrap_state``, so that :class:`.Instance` objects are only built
+        for the instances whose state changed.
+
+        :rtype: generator of (``str``, ``str``, ``object``)
+        """
+        page = self.list(limit=self.WATCH_PAGE_SIZE)
+        while True:
+            for instance in page:
+                yield instance.id, instance.state, instance
+            if not page.is_truncated:
+                return
+            page = self.list(limit=self.WATCH_PAGE_SIZE, marker=page.marker)
+
+    def _wrap_state(self, instance_id, raw):
+        """
+        Build the :class:`.Instance` reported by ``watch`` from the
+        description yielded by ``_iter_states``, or, when ``raw`` is
+        ``None``, for an instance that is no longer listed.
+
+        :rtype: :class:`.Instance`
+        :return: The instance, or ``None`` if it cannot be described.
+        """
+        return raw if raw is not None else self.get(instance_id)
+
+    def watch(self, filter=None, interval=None, max_interval=None,
+              timeout=None, initial=False):
+        # pylint:disable=redefined-builtin
+        if interval is None:
+            interval = self.provider.config.default_wait_interval
+        if max_interval is None:
+            max_interval = interval * 8
+        end_time = time.time() + timeout if timeout is not None else None
+
+        subscriber = self._watcher.subscribe(interval, max_interval, initial)
+        try:
+            # The existing instances are reported even if the timeout is
+            # shorter than the first poll
+            first = initial
+            while True:
+                remaining = None
+                if end_time is not None and not first:
+                    remaining = end_time - time.time()
+                    if remaining <= 0:
+                        return
+                try:
+                    events = subscriber.get(remaining)
+                except queue.Empty:
+                    return
+                if isinstance(events, Exception):
+                    raise events
+                first = False
+                for event in events:
+                    if filter is None or filter(event[0]):
+                        yield event
+        finally:
+            self._watcher.unsubscribe(subscriber)
+
+
+class _WatchSubscriber(object):
+    """
+    The events of a single ``watch`` generator, queued by the poller.
+    """
+
+    def __init__(self, interval, max_interval, initial):
+        self.interval = interval
+        self.max_interval = max_interval
+        self.initial = initial
+        # Whether the subscriber has been included in a poll yet
+        self.primed = False
+        self._events = queue.Queue()
+
+    def put(self, events):
+        self._events.put(events)
+
+    def get(self, timeout):
+        """
+        Wait for the events of the next poll with changes, or the error
+        raised by the poll.
+        """
+        return self._events.get(timeout=timeout)
+
+
+class _StateWatcher(object):
+    """
+    Polls the states of the instances of a service in a background thread,
+    on behalf of all the ``watch`` generators active on it, so that they
+    share one listing per poll. Between polls, only the state of each
+    instance is kept, by ID.
+    """
+
+    def __init__(self, service):
+        self._service = service
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._subscribers = []
+        self._thread = None
+
+    def subscribe(self, interval, max_interval, initial):
+        subscriber = _WatchSubscriber(interval, max_interval, initial)
+        with self._lock:
+            self._subscribers.append(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+        # Poll at once, with the new subscriber's interval taken into account
+        self._wake.set()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.remove(subscriber)
+            if not self._subscribers:
+                # Let the poller exit without waiting for its next poll
+                self._wake.set()
+
+    def _run(self):
+        snapshot = None
+        delay = 0
+        while True:
+            with self._lock:
+                subscribers = list(self._subscribers)
+                if not subscribers:
+                    self._thread = None
+                    return
+            try:
+                snapshot, changed = self._poll(snapshot, subscribers)
+            except Exception as e:
+                for subscriber in subscribers:
+                    subscriber.put(e)
+                changed = False
+            interval = min(sub.interval for sub in subscribers)
+            max_interval = min(sub.max_interval for sub in subscribers)
+            delay = interval if changed else min(delay * 2 or interval,
+                                                 max_interval)
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def _poll(self, snapshot, subscribers):
+        """
+        List the instances once, and queue the events for each subscriber.
+
+        :rtype: ``tuple``
+        :return: The new snapshot, and whether any state changed since the
+                 previous one.
+        """
+        service = self._service
+        # pylint:disable=protected-access
+        initial = [sub for sub in subscribers
+                   if sub.initial and not sub.primed]
+        current = {}
+        changes = []
+        existing = []
+        for instance_id, state, raw in service._iter_states():
+            current[instance_id] = state
+            old_state = snapshot.get(instance_id) if snapshot else None
+            is_change = snapshot is not None and state != old_state
+            if not (is_change or initial):
+                continue
+            instance = service._wrap_state(instance_id, raw)
+            if is_change:
+                changes.append((instance, old_state, state))
+            if initial:
+                existing.append((instance, None, state))
+        for instance_id, state in (snapshot or {}).items():
+            if (instance_id not in current and
+                    state != InstanceState.UNKNOWN):
+                instance = service._wrap_state(instance_id, None)
+                if instance is not None:
+                    changes.append((instance, state, InstanceState.UNKNOWN))
+        for subscriber in subscribers:
+            if subscriber in initial:
+                subscriber.put(existing)
+            elif subscriber.primed and changes:
+                subscriber.put(changes)
+            subscriber.primed = True
+        return current, bool(changes)
 
 
 class BaseRegionService(
@@ -0,0 +1,324 @@
+"""
+Bandwidth and concurrency control for the transfer of object content
+"""
+import functools
+import logging
+import threading
+import time
+
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+
+class TransferPriority(object):
+    """
+    Priority classes for transfers. Lower values are more urgent.
+    """
+    HIGH = 0
+    NORMAL = 1
+    BACKGROUND = 2
+
+
+class TransferManager(object):
+    """
+    Schedules the bytes sent and received by object uploads and downloads.
+
+    ``max_rate`` caps the combined rate of all transfers, in bytes per
+    second. Bandwidth is handed to the most urgent waiting transfers first,
+    so lower priority transfers only run at full speed when nothing more
+    urgent is waiting. ``max_inflight_bytes`` bounds the combined size of
+    the transfers in progress; a transfer larger than that is started once
+    nothing else is in flight.
+
+    The priority, rate cap and progress callback of individual transfers
+    are set for the calling thread with :meth:`settings`.
+    """
+
+    # Longest time a waiting transfer sleeps before checking again whether
+    # it may proceed
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, max_rate=None, max_inflight_bytes=None):
+        self.max_rate = max_rate
+        self.max_inflight_bytes = max_inflight_bytes
+        self._cond = threading.Condition()
+        self._tokens = 0.0
+        self._refilled = time.time()
+        self._inflight = 0
+        # Number of transfers waiting at each priority, to be admitted and
+        # for bandwidth. These are counted separately, so that a transfer
+        # waiting to be admitted cannot hold up those already in flight.
+        self._waiting_admission = {}
+        self._waiting_bandwidth = {}
+        self._local = threading.local()
+
+    @contextmanager
+    def settings(self, priority=TransferPriority.NORMAL, max_rate=None,
+                 callback=None):
+        """
+        Set the parameters of the transfers started by the calling thread
+        within a ``with`` block.
+
+        Example:
+
+        .. code-block:: python
+
+            def progress(transferred, total):
+                print("%d of %s bytes" % (transferred, total))
+
+            with provider.transfers.settings(
+                    priority=TransferPriority.BACKGROUND,
+                    max_rate=10 * 1024 ** 2, callback=progress):
+                bucket.sync_from('/data/backups')
+
+        :type priority: ``int``
+        :param priority: One of the :class:`.TransferPriority` classes.
+
+        :type max_rate: ``int``
+        :param max_rate: Maximum rate of each transfer, in bytes per second.
+
+        :type callback: ``callable``
+        :param callback: Called as ``callback(transferred, total)`` as each
+                         transfer progresses. ``total`` is ``None`` if the
+                         size of the transfer is not known.
+        """
+        previous = getattr(self._local, 'settings', None)
+        self._local.settings = (priority, max_rate, callback)
+        try:
+            yield
+        finally:
+            self._local.settings = previous
+
+    def bind(self, func):
+        """
+        Wrap ``func`` so that it applies the calling thread's transfer
+        settings when it runs in another thread, such as a worker pool.
+        """
+        current = getattr(self._local, 'settings', None)
+        if current is None:
+            return func
+
+        @functools.wraps(func)
+        def _bound(*args, **kwargs):
+            with self.settings(*current):
+                return func(*args, **kwargs)
+        return _bound
+
+    @property
+    def managed(self):
+        """
+        Whether the transfers started by the calling thread are subject to
+        any limit or have a progress callback.
+        """
+        return bool(self.max_rate or self.max_inflight_bytes or
+                    getattr(self._local, 'settings', None))
+
+    def begin(self, size):
+        """
+        Start a transfer of ``size`` bytes, waiting until the in-flight
+        bytes bound allows it. :meth:`.Transfer.finish` must be called once
+        it is complete.
+
+        :rtype: :class:`.Transfer`
+        :return: The transfer, through which its bytes must be accounted.
+        """
+        priority, max_rate, callback = (
+            getattr(self._local, 'settings', None) or
+            (TransferPriority.NORMAL, None, None))
+        reserved = self._admit(size or 0, priority)
+        return Transfer(self, size, priority, max_rate, callback, reserved)
+
+    @contextmanager
+    def transfer(self, size):
+        """
+        A ``with`` block form of :meth:`begin`.
+        """
+        transfer = self.begin(size)
+        try:
+            yield transfer
+        finally:
+            transfer.finish()
+
+    def _wait(self, waiting, priority, ready):
+        """
+        Wait, with the lock held, until ``ready()`` returns ``True`` and no
+        more urgent transfer is counted in ``waiting``.
+        """
+        waiting[priority] = waiting.get(priority, 0) + 1
+        try:
+            while (any(count for other, count in waiting.items()
+                       if other < priority) or not ready()):
+                self._cond.wait(self.POLL_INTERVAL)
+        finally:
+            waiting[priority] -= 1
+            self._cond.notify_all()
+
+    def _admit(self, size, priority):
+        if not self.max_inflight_bytes:
+            return 0
+        size = min(size, self.max_inflight_bytes)
+        with self._cond:
+            self._wait(self._waiting_admission, priority, lambda: (
+                not self._inflight or
+                self._inflight + size <= self.max_inflight_bytes))
+            self._inflight += size
+        return size
+
+    def _release(self, reserved):
+        if reserved:
+            with self._cond:
+                self._inflight -= reserved
+                self._cond.notify_all()
+
+    def _refill(self):
+        now = time.time()
+        # Allow bursts of up to a second's worth of bytes
+        self._tokens = min(self.max_rate, self._tokens +
+                           (now - self._refilled) * self.max_rate)
+        self._refilled = now
+        return self._tokens >= 0
+
+    def _consume(self, priority, nbytes):
+        if not self.max_rate:
+            return
+        with self._cond:
+            self._wait(self._waiting_bandwidth, priority, self._refill)
+            # Chunks larger than the available tokens leave a debt, which
+            # later chunks wait for
+            self._tokens -= nbytes
+
+
+class Transfer(object):
+    """
+    A single upload or download, started with :meth:`.TransferManager.begin`.
+    """
+
+    def __init__(self, manager, size, priority, max_rate, callback,
+                 reserved):
+        self.size = size
+        self.priority = priority
+        self.max_rate = max_rate
+        self.callback = callback
+        self.transferred = 0
+        self._manager = manager
+        self._reserved = reserved
+        self._started = time.time()
+        self._lock = threading.Lock()
+
+    def consume(self, nbytes):
+        """
+        Account for ``nbytes`` bytes sent or received, waiting as required
+        by the global and per-transfer rate caps.
+        """
+        if nbytes <= 0:
+            return
+        # pylint:disable=protected-access
+        self._manager._consume(self.priority, nbytes)
+        self._progress(nbytes)
+        if self.max_rate:
+            delay = (self.transferred / float(self.max_rate) -
+                     (time.time() - self._started))
+            if delay > 0:
+                time.sleep(delay)
+
+    def skip(self, nbytes):
+        """
+        Account for ``nbytes`` bytes that did not need to be transferred,
+        such as parts already uploaded by an earlier attempt.
+        """
+        if nbytes > 0:
+            self._progress(nbytes)
+
+    def _progress(self, nbytes):
+        with self._lock:
+            self.transferred += nbytes
+            transferred = self.transferred
+        if self.callback:
+            self.callback(transferred, self.size)
+
+    def finish(self):
+        """
+        Mark the transfer as complete, releasing its share of the in-flight
+        bytes bound. Calling this more than once has no effect.
+        """
+        with self._lock:
+            reserved, self._reserved = self._reserved, 0
+        # pylint:disable=protected-access
+        self._manager._release(reserved)
+
+    def reader(self, fp):
+        """
+        Wrap a file-like object whose content is being uploaded, so that the
+        bytes read from it are accounted to this transfer.
+        """
+        return _TransferReader(fp, self)
+
+    def stream(self, content):
+        """
+        Wrap downloaded content, either a file-like object or an iterable of
+        chunks, so that the bytes received are accounted to this transfer.
+        The transfer finishes when the content is exhausted or closed.
+        """
+        return _TransferStream(content, self)
+
+    def boto_callback(self):
+        """
+        Return a callback for the ``cb`` argument of boto's transfer methods
+        (used with ``num_cb=-1``), which accounts each chunk as it is sent.
+        """
+        sent = [0]
+
+        def _callback(transmitted, _):
+            if transmitted < sent[0]:
+                # boto restarted the request
+                sent[0] = 0
+            self.consume(transmitted - sent[0])
+            sent[0] = transmitted
+        return _callback
+
+
+class _TransferReader(object):
+
+    def __init__(self, fp, transfer):
+        self._fp = fp
+        self._transfer = transfer
+
+    def read(self, *args):
+        data = self._fp.read(*args)
+        self._transfer.consume(len(data))
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._fp, name)
+
+
+class _TransferStream(object):
+
+    def __init__(self, content, transfer):
+        self._content = content
+        self._transfer = transfer
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            data = self._content.read()
+        else:
+            data = self._content.read(size)
+        if data:
+            self._transfer.consume(len(data))
+        else:
+            self._transfer.finish()
+        return data
+
+    def __iter__(self):
+        try:
+            for chunk in self._content:
+                self._transfer.consume(len(chunk))
+                yield chunk
+        finally:
+            self._transfer.finish()
+
+    def close(self):
+        self._transfer.finish()
+        if hasattr(self._content, 'close'):
+            self._content.close()
@@ -4,8 +4,10 @@ Public interface exports
 from .provider import CloudProvider  # noqa
 from .provider import TestMockHelperMixin  # noqa
 from .resources import CloudServiceType  # noqa
+from .resources import ContentEncoding  # noqa
 from .resources import InstanceState  # noqa
 from .resources import LaunchConfig  # noqa
+from .resources import LaunchPlan  # noqa
 from .resources import MachineImageState  # noqa
 from .resources import NetworkState  # noqa
 from .resources import Region  # noqa
@@ -207,6 +207,36 @@ class CloudProvider(object):
         """
         pass
 
+    @abstractmethod
+    def tag_many(self, resources, tags):
+        """
+        Apply the same tags to several resources at once.
+
+        The ``Name`` tag sets the name of each resource. Providers without
+        general tagging support store the other tags as resource metadata
+        where the resource type allows it. The tags are applied with as few
+        requests to the provider as it allows, or concurrently otherwise.
+
+        Example:
+
+        .. code-block:: python
+
+            results = provider.tag_many(volumes, {'Name': 'scratch',
+                                                  'project': 'genomics'})
+
+        :type resources: ``list`` of :class:`.CloudResource`
+        :param resources: The resources to tag, e.g. instances, volumes or
+                          networks.
+
+        :type tags: ``dict``
+        :param tags: The tag names and values.
+
+        :rtype: ``list``
+        :return: ``True`` for each resource tagged, or the exception raised
+                 for it, in the same order as ``resources``.
+        """
+        pass
+
 
 class TestMockHelperMixin(object):
     """
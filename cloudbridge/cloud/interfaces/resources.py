@@ -146,6 +146,73 @@ class Configuration(dict):
         :return: Whether debug mode is on.
         """
 
+    @abstractproperty
+    def object_cache_dir(self):
+        """
+        The directory in which the content of bucket objects read through
+        ``iter_content`` or ``save_content`` is cached. Caching is disabled
+        unless this is set.
+
+        The value can be set via the ``object_cache_dir`` config value or
+        the ``CB_OBJECT_CACHE_DIR`` environment variable.
+
+        :rtype: ``str``
+        :return: The cache directory, or ``None``.
+        """
+        pass
+
+    @abstractproperty
+    def object_cache_size(self):
+        """
+        The size, in bytes, beyond which the least recently read objects are
+        evicted from the object cache.
+
+        :rtype: ``int``
+        :return: The maximum size of the object cache.
+        """
+        pass
+
+    @abstractproperty
+    def transfer_max_rate(self):
+        """
+        The cap on the combined rate of all object uploads and downloads, in
+        bytes per second. Bandwidth is granted to the most urgent transfers
+        first. Unlimited unless set.
+
+        The value can be set via the ``transfer_max_rate`` config value or
+        the ``CB_TRANSFER_MAX_RATE`` environment variable.
+
+        :rtype: ``int``
+        :return: The maximum transfer rate, or ``None``.
+        """
+        pass
+
+    @abstractproperty
+    def transfer_max_inflight_bytes(self):
+        """
+        The bound on the combined size of the object transfers in progress.
+        Unlimited unless set.
+
+        The value can be set via the ``transfer_max_inflight_bytes`` config
+        value or the ``CB_TRANSFER_MAX_INFLIGHT_BYTES`` environment variable.
+
+        :rtype: ``int``
+        :return: The maximum number of bytes in flight, or ``None``.
+        """
+        pass
+
+    @abstractproperty
+    def object_cache_ttl(self):
+        """
+        The number of seconds for which a cached object is served without
+        checking with the provider whether it has changed. After that, the
+        object's etag is revalidated with a single HEAD request.
+
+        :rtype: ``int``
+        :return: The revalidation interval in seconds.
+        """
+        pass
+
 
 class ObjectLifeCycleMixin(object):
 
@@ -583,8 +650,10 @@ class Instance(ObjectLifeCycleMixin, CloudResource):
         """
         Add a public IP address to this instance.
 
-        :type ip_address: ``str``
+        :type ip_address: ``str`` or :class:`.FloatingIP`
         :param ip_address: The IP address to associate with the instance.
+                           Passing a ``FloatingIP`` object saves providers
+                           from looking the address up.
         """
         pass
 
@@ -744,6 +813,93 @@ class LaunchConfig(object):
         """
         pass
 
+    @abstractmethod
+    def compile(self, image, instance_type, subnet, zone=None,
+                key_pair=None, security_groups=None, user_data=None):
+        """
+        Resolves this launch configuration, together with the other launch
+        options, into a ``LaunchPlan``.
+
+        The image, instance type, subnet, security groups and block device
+        mappings are looked up once, when the plan is compiled. The plan
+        can then be launched any number of times with
+        ``provider.compute.instances.launch()`` or ``launch_many()``,
+        without any further lookups. Later changes to this launch
+        configuration do not affect plans compiled from it.
+
+        Example:
+
+        .. code-block:: python
+
+            lc = provider.compute.instances.create_launch_config()
+            plan = lc.compile(image, 'm4.large', subnet,
+                              security_groups=['web'])
+            for i in range(10):
+                provider.compute.instances.launch('web-%d' % i, plan)
+
+        The parameters are the same as those of
+        ``provider.compute.instances.create()``.
+
+        :rtype: :class:`.LaunchPlan`
+        :return: The compiled launch plan.
+
+        :raise InvalidConfigurationException: If the configuration cannot be
+                                              launched more than once.
+        """
+        pass
+
+
+class LaunchPlan(object):
+    """
+    An immutable, fully resolved set of launch options, returned by
+    :meth:`.LaunchConfig.compile`.
+
+    A plan only holds identifiers and the provider specific structures
+    passed to the launch request, so launching it requires no lookups. It
+    can only be launched by the provider it was compiled for.
+    """
+    __metaclass__ = ABCMeta
+
+    @abstractproperty
+    def image_id(self):
+        """
+        Get the ID of the image to boot from.
+
+        :rtype: ``str``
+        :return: ID of the image.
+        """
+        pass
+
+    @abstractproperty
+    def instance_type_id(self):
+        """
+        Get the ID of the instance type to launch.
+
+        :rtype: ``str``
+        :return: ID of the instance type.
+        """
+        pass
+
+    @abstractproperty
+    def subnet_id(self):
+        """
+        Get the ID of the subnet to launch in.
+
+        :rtype: ``str``
+        :return: ID of the subnet, or ``None``.
+        """
+        pass
+
+    @abstractproperty
+    def zone_id(self):
+        """
+        Get the ID of the placement zone to launch in.
+
+        :rtype: ``str``
+        :return: ID of the placement zone, or ``None``.
+        """
+        pass
+
 
 class MachineImage(ObjectLifeCycleMixin, CloudResource):
 
@@ -1845,6 +2001,19 @@ class SecurityGroupRule(CloudResource):
         pass
 
 
+class ContentEncoding(object):
+
+    """
+    Compression formats in which object content can be stored
+
+    :cvar GZIP: gzip, from the Python standard library.
+    :cvar ZSTD: Zstandard, which requires the ``zstandard`` package.
+
+    """
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+
 class BucketObject(CloudResource):
 
     """
@@ -1884,11 +2053,29 @@ class BucketObject(CloudResource):
         """
         pass
 
+    @abstractproperty
+    def etag(self):
+        """
+        Get the checksum the provider reports for this object's content.
+
+        For objects uploaded in a single request this is the hex encoded MD5
+        digest of the content. Objects uploaded in parts (e.g. S3 multipart
+        or Swift large objects) report a provider specific value instead.
+
+        :rtype: ``str``
+        :return: The object's checksum, without surrounding quotes, or
+                 ``None`` if it is not known.
+        """
+        pass
+
     @abstractmethod
     def iter_content(self):
         """
         Returns this object's content as an iterable.
 
+        Content uploaded with a ``compression`` is decompressed as it is
+        read.
+
         :rtype: Iterable
         :return: An iterable of the file contents
 
@@ -1903,23 +2090,50 @@ class BucketObject(CloudResource):
         pass
 
     @abstractmethod
-    def upload(self, source_stream):
+    def upload(self, source_stream, compression=None):
         """
         Set the contents of this object to the data read from the source
         stream.
 
+        If a ``compression`` is given, the data is compressed as it is
+        uploaded and the encoding is recorded in the object's metadata, so
+        that reads decompress it transparently. The object's ``size`` and
+        ``etag`` then refer to the compressed content.
+
+        :type compression: ``str``
+        :param compression: One of the :class:`.ContentEncoding` formats.
+
         :rtype: ``bool``
         :return: ``True`` if successful.
         """
         pass
 
     @abstractmethod
-    def upload_from_file(self, path):
+    def upload_from_file(self, path, checkpoint=None, compression=None):
         """
         Store the contents of the file pointed by the "path" variable.
 
+        Large files can be uploaded resumably by passing a ``checkpoint``
+        path. The upload is then split into parts which are sent
+        concurrently, and progress is recorded in the checkpoint file. If
+        the upload is interrupted, calling this method again with the same
+        file and checkpoint only uploads the parts missing on the server.
+        The checkpoint file is removed once the upload completes.
+
+        If a ``compression`` is given, the file is compressed as it is
+        streamed to the provider, without a temporary file, as described
+        for :meth:`upload`. Compressed uploads cannot be resumed, so the
+        ``checkpoint`` is then ignored.
+
         :type path: ``str``
         :param path: Absolute path to the file to be uploaded to S3.
+
+        :type checkpoint: ``str``
+        :param checkpoint: Path of a file in which to record the progress of
+                           the upload.
+
+        :type compression: ``str``
+        :param compression: One of the :class:`.ContentEncoding` formats.
         """
         pass
 
@@ -1950,6 +2164,28 @@ class BucketObject(CloudResource):
         """
         pass
 
+    @abstractmethod
+    def copy_to(self, target_bucket, name=None):
+        """
+        Copy this object into a bucket.
+
+        When the target bucket belongs to the same provider, the copy is
+        carried out server side and no object data passes through the
+        client. Copies to a bucket of another provider stream the data
+        through the client.
+
+        :type target_bucket: :class:`.Bucket`
+        :param target_bucket: The bucket to copy the object into. This may be
+                              the bucket containing this object.
+
+        :type name: ``str``
+        :param name: Name of the new object. Defaults to this object's name.
+
+        :rtype: :class:`.BucketObject`
+        :return: The new object.
+        """
+        pass
+
 
 class Bucket(PageableObjectMixin, CloudResource):
 
@@ -1981,7 +2217,23 @@ class Bucket(PageableObjectMixin, CloudResource):
         pass
 
     @abstractmethod
-    def list(self, limit=None, marker=None, prefix=None):
+    def exists(self, name):
+        """
+        Check whether an object exists in this bucket.
+
+        This costs a single request to the provider, regardless of the
+        number of objects in the bucket.
+
+        :type name: ``str``
+        :param name: The name of the object to look for.
+
+        :rtype: ``bool``
+        :return: ``True`` if the object exists.
+        """
+        pass
+
+    @abstractmethod
+    def list(self, limit=None, marker=None, prefix=None, lightweight=False):
         """
         List objects in this bucket.
 
@@ -1994,11 +2246,120 @@ class Bucket(PageableObjectMixin, CloudResource):
         :type prefix: ``str``
         :param prefix: Prefix criteria by which to filter listed objects.
 
+        :type lightweight: ``bool``
+        :param lightweight: If ``True``, return compact, immutable records
+                            with the ``name``, ``size``, ``etag`` and
+                            ``last_modified`` (in seconds since the epoch)
+                            of each object, instead of full BucketObjects.
+                            This greatly reduces the memory used by large
+                            listings. Use :meth:`from_record` to obtain the
+                            BucketObject for a record.
+
         :rtype: :class:``.BucketObject``
         :return: List of all available BucketObjects within this bucket.
         """
         pass
 
+    @abstractmethod
+    def from_record(self, record):
+        """
+        Build the BucketObject described by a record returned by a
+        lightweight listing, without contacting the provider.
+
+        :type record: :class:`.BucketObjectRecord`
+        :param record: A record returned by ``list(lightweight=True)``.
+
+        :rtype: :class:``.BucketObject``
+        :return: The corresponding BucketObject.
+        """
+        pass
+
+    @abstractmethod
+    def iter_all(self, prefix=None, parallelism=None, ordered=False,
+                 lightweight=False):
+        """
+        Iterate over all objects in this bucket, listing several ranges of
+        object names concurrently.
+
+        The keyspace is split into lexicographic ranges, which are listed
+        page by page by a pool of workers and merged into a single stream.
+        Ranges are split further while listing progresses, so all workers
+        stay busy even when object names are unevenly distributed. This
+        makes a full inventory of a very large bucket scale with the number
+        of workers, at the cost of a few extra listing requests.
+
+        Example:
+
+        .. code-block:: python
+
+            for obj in bucket.iter_all(prefix='logs/', parallelism=32):
+                print(obj.name, obj.size)
+
+        :type prefix: ``str``
+        :param prefix: Only objects whose names start with this prefix are
+                       returned.
+
+        :type parallelism: ``int``
+        :param parallelism: Number of listing requests to have in flight at
+                            once.
+
+        :type ordered: ``bool``
+        :param ordered: If ``True``, objects are returned in lexicographic
+                        order. Results from later ranges are then held in
+                        memory until all earlier ranges have been listed.
+                        Otherwise, objects are returned as soon as they are
+                        listed, in no particular order.
+
+        :type lightweight: ``bool``
+        :param lightweight: If ``True``, return compact records instead of
+                            full BucketObjects, as for :meth:`list`.
+
+        :rtype: ``iterator`` of :class:`.BucketObject`
+        :return: An iterator over the objects in the bucket.
+        """
+        pass
+
+    @abstractmethod
+    def list_prefixes(self, prefix=None, delimiter='/', limit=None,
+                      marker=None):
+        """
+        List one level of a hierarchy of objects, treating ``delimiter`` as
+        a directory separator.
+
+        Objects whose names contain ``delimiter`` after ``prefix`` are not
+        returned individually. Instead, they are rolled up into a single
+        common prefix, in the way a directory listing shows a subdirectory.
+        Both kinds of entry are returned in lexicographic order in a server
+        paged result list.
+
+        Example:
+
+        .. code-block:: python
+
+            # objects: 'a/1.txt', 'a/b/2.txt', 'a/b/3.txt', 'c.txt'
+            bucket.list_prefixes()      # ['a/', <c.txt>]
+            bucket.list_prefixes('a/')  # [<a/1.txt>, 'a/b/']
+
+        :type prefix: ``str``
+        :param prefix: The "directory" to list, typically ending with
+                       ``delimiter``.
+
+        :type delimiter: ``str``
+        :param delimiter: The separator used to group object names.
+
+        :type limit: ``int``
+        :param limit: Maximum number of entries to return.
+
+        :type marker: ``str``
+        :param marker: Fetch results after this marker.
+
+        :rtype: :class:`.ResultList` of :class:`.BucketObject` and ``str``
+        :return: The objects directly under ``prefix``, and the common
+                 prefixes (as strings ending with ``delimiter``) of the
+                 objects further down the hierarchy.
+        """
+        pass
+
     @abstractmethod
     def find(self, name):
         """
@@ -2023,12 +2384,155 @@ class Bucket(PageableObjectMixin, CloudResource):
         """
         pass
 
+    @abstractmethod
+    def delete_objects(self, names):
+        """
+        Delete several objects from this bucket at once.
+
+        Objects are deleted in batches using the provider's bulk delete
+        facility where available, with several batches in flight at a time.
+        Objects that do not exist are ignored.
+
+        :type names: ``iterable`` of ``str``
+        :param names: Names of the objects to delete. May be a generator.
+
+        :rtype: ``bool``
+        :return: ``True`` if all objects were deleted, ``False`` if one or
+                 more deletions failed. Failures are logged.
+        """
+        pass
+
+    @abstractmethod
+    def generate_urls(self, names, expires_in):
+        """
+        Generate URLs granting temporary read access to several objects in
+        this bucket.
+
+        The URLs are signed locally, without a request per object, so
+        thousands of them can be generated in milliseconds. AWS returns S3
+        presigned URLs (Signature Version 4) and OpenStack returns Swift
+        TempURLs. The first call may make a single request to look up the
+        bucket's region (AWS) or the account's TempURL key (OpenStack).
+
+        Example:
+
+        .. code-block:: python
+
+            names = [obj.name for obj in bucket.list(prefix='reports/')]
+            urls = bucket.generate_urls(names, expires_in=3600)
+
+        :type names: ``iterable`` of ``str``
+        :param names: Names of the objects. The objects are not checked for
+                      existence.
+
+        :type expires_in: ``int``
+        :param expires_in: Time to live of the generated URLs in seconds.
+
+        :rtype: ``list`` of ``str``
+        :return: The URLs, in the same order as ``names``.
+        """
+        pass
+
+    @abstractmethod
+    def sync_from(self, local_dir, prefix=None, delete=False):
+        """
+        Upload the contents of a local directory tree into this bucket.
+
+        Each file under ``local_dir`` is stored as an object named after its
+        path relative to ``local_dir``, using ``/`` as the separator. Only
+        files that are missing from the bucket, or whose size or content
+        differ from the stored object, are uploaded. Transfers are carried
+        out concurrently.
+
+        :type local_dir: ``str``
+        :param local_dir: The directory to upload.
+
+        :type prefix: ``str``
+        :param prefix: Prefix under which the objects are stored. A ``/`` is
+                       appended if the prefix does not already end with one.
+
+        :type delete: ``bool``
+        :param delete: If ``True``, objects under ``prefix`` that have no
+                       corresponding local file are deleted.
+
+        :rtype: ``bool``
+        :return: ``True`` if all required transfers and deletions succeeded.
+                 Failures are logged.
+        """
+        pass
+
+    @abstractmethod
+    def sync_to(self, local_dir, prefix=None, delete=False):
+        """
+        Download the objects in this bucket into a local directory tree.
+
+        This is the reverse of :meth:`sync_from`. Only objects that are
+        missing locally, or whose size or content differ from the local
+        file, are downloaded. Downloaded files have their modification time
+        set to the object's ``last_modified`` time.
+
+        :type local_dir: ``str``
+        :param local_dir: The directory to download into. It is created if
+                          it does not exist.
+
+        :type prefix: ``str``
+        :param prefix: Only objects under this prefix are downloaded, with
+                       the prefix stripped from the local file names.
+
+        :type delete: ``bool``
+        :param delete: If ``True``, local files that have no corresponding
+                       object are deleted.
+
+        :rtype: ``bool``
+        :return: ``True`` if all required transfers and deletions succeeded.
+                 Failures are logged.
+        """
+        pass
+
     @abstractmethod
     def create_object(self, name):
         """
         Create a new object within this bucket.
 
+        No request is made to the provider until content is uploaded to the
+        returned object.
+
         :rtype: :class:``.BucketObject``
         :return: The newly created bucket object
         """
         pass
+
+    @abstractmethod
+    def upload_many(self, items, max_workers=None):
+        """
+        Upload many small objects concurrently.
+
+        Each object is stored with a single PUT request. The requests are
+        spread over a pool of workers whose HTTP connections are kept alive
+        between uploads, so the cost of each upload is dominated by the
+        transfer rather than by connection setup and request latency.
+
+        Example:
+
+        .. code-block:: python
+
+            items = ((name, open(os.path.join(src, name), 'rb').read())
+                     for name in os.listdir(src))
+            results = bucket.upload_many(items)
+            failed = [r for r in results if isinstance(r, Exception)]
+
+        :type items: ``iterable`` of ``tuple``
+        :param items: ``(name, source)`` pairs, where ``source`` is the
+                      content of the object, as a string or a readable
+                      file-like object. Sources are read into memory, so
+                      this is only suitable for small objects.
+
+        :type max_workers: ``int``
+        :param max_workers: Maximum number of uploads in flight at once.
+
+        :rtype: ``list``
+        :return: For each item, in order, the uploaded
+                 :class:`.BucketObject`, or the exception that caused its
+                 upload to fail. Failures are also logged.
+        """
+        pass
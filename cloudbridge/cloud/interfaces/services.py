@@ -207,7 +207,7 @@ class InstanceService(PageableObjectMixin, CloudService):
     @abstractmethod
     def create(self, name, image, instance_type, subnet, zone=None,
                key_pair=None, security_groups=None, user_data=None,
-               launch_config=None,
+               launch_config=None, wait=True,
                **kwargs):
         """
         Creates a new virtual machine instance.
@@ -268,8 +268,323 @@ class InstanceService(PageableObjectMixin, CloudService):
                construct a launch configuration object, call
                provider.compute.instances.create_launch_config()
 
+        :type  wait: ``bool``
+        :param wait: If ``True``, wait until the provider reports the new
+                     instance before returning. If ``False``, return as soon
+                     as the launch request is accepted, so that launches can
+                     be sent back to back. The instance is named at launch
+                     and is usually still pending; use its
+                     ``wait_till_ready`` method, or :meth:`wait_till_ready`
+                     for several instances, to wait until it is running.
+
+        :rtype: ``object`` of :class:`.Instance`
+        :return:  an instance of Instance class
+        """
+        pass
+
+    @abstractmethod
+    def create_many(self, count, name_prefix, image, instance_type, subnet,
+                    zone=None, key_pair=None, security_groups=None,
+                    user_data=None, launch_config=None, wait=True,
+                    **kwargs):
+        """
+        Creates several identical virtual machine instances at once.
+
+        The instances are launched with as few requests to the provider as
+        it allows, and are named ``<name_prefix>-1`` to
+        ``<name_prefix>-<count>``. With ``wait``, all of them are then
+        waited for together, refreshing them with as few requests as
+        possible on each poll. Either all of the instances are launched,
+        or none: if some of them cannot be, those already created are
+        terminated and the error is raised.
+
+        Example:
+
+        .. code-block:: python
+
+            nodes = provider.compute.instances.create_many(
+                100, 'cluster-node', image, 'm4.large', subnet)
+
+        :type  count: ``int``
+        :param count: The number of instances to create.
+
+        :type  name_prefix: ``str``
+        :param name_prefix: The prefix of the names of the instances.
+
+        The remaining parameters are the same as for :meth:`create`, and
+        apply to every instance.
+
+        :rtype: ``list`` of :class:`.Instance`
+        :return:  The new instances, in the order of their names.
+        """
+        pass
+
+    @abstractmethod
+    def create_spread(self, count, name_prefix, image, instance_type,
+                      subnets, weights=None, key_pair=None,
+                      security_groups=None, user_data=None,
+                      launch_config=None, **kwargs):
+        """
+        Creates instances spread across several subnets, and therefore
+        placement zones.
+
+        The instances are divided into one group per subnet, in proportion
+        to ``weights``, or evenly by default. The groups are launched
+        concurrently, each with :meth:`launch_many`. A group that cannot be
+        launched because its subnet or zone is out of capacity or
+        addresses is retried in one of the subnets with a positive weight
+        that has not failed yet. If a group cannot be launched anywhere, or
+        fails for any other reason, such as an invalid name, the instances
+        already created are terminated and the error is raised. Which
+        errors are retried depends on the provider: OpenStack only retries
+        a subnet that has run out of addresses, since nova reports a lack
+        of hosts after accepting the servers.
+
+        The instances of the ``i``-th group are named
+        ``<name_prefix>-<i>-1`` to ``<name_prefix>-<i>-<n>``, whichever
+        subnet they end up in.
+
+        Example:
+
+        .. code-block:: python
+
+            nodes = provider.compute.instances.create_spread(
+                30, 'cluster-node', image, 'm4.large',
+                [subnet_a, subnet_b, subnet_c], weights=[2, 1, 1])
+
+        :type  count: ``int``
+        :param count: The number of instances to create.
+
+        :type  name_prefix: ``str``
+        :param name_prefix: The prefix of the names of the instances.
+
+        :type  subnets: ``list`` of ``Subnet`` or ``str``
+        :param subnets: The subnets to spread the instances across.
+
+        :type  weights: ``list`` of ``int``
+        :param weights: The relative number of instances to launch in each
+                        subnet.
+
+        The remaining parameters are the same as for :meth:`create`, and
+        apply to every instance.
+
+        :rtype: ``list`` of :class:`.Instance`
+        :return:  The new instances, in the order of their names.
+        """
+        pass
+
+    @abstractmethod
+    def launch(self, name, plan, wait=True):
+        """
+        Creates a new virtual machine instance from a compiled launch plan.
+
+        Unlike :meth:`create`, this does not look up any of the launch
+        options, so it is the cheapest way to launch many instances with the
+        same configuration.
+
+        Example:
+
+        .. code-block:: python
+
+            plan = provider.compute.instances.create_launch_config().compile(
+                image, 'm4.large', subnet)
+            inst = provider.compute.instances.launch('web-1', plan)
+
+        :type  name: ``str``
+        :param name: The name of the virtual machine instance.
+
+        :type  plan: :class:`.LaunchPlan`
+        :param plan: A plan returned by :meth:`.LaunchConfig.compile`.
+
+        :type  wait: ``bool``
+        :param wait: The same as for :meth:`create`.
+
         :rtype: ``object`` of :class:`.Instance`
         :return:  an instance of Instance class
+
+        :raise InvalidConfigurationException: If the plan was compiled for
+                                              another provider.
+        """
+        pass
+
+    @abstractmethod
+    def launch_many(self, count, name_prefix, plan, wait=True):
+        """
+        Creates several identical virtual machine instances at once from a
+        compiled launch plan, in the same way as :meth:`create_many`.
+
+        :type  count: ``int``
+        :param count: The number of instances to create.
+
+        :type  name_prefix: ``str``
+        :param name_prefix: The prefix of the names of the instances.
+
+        :type  plan: :class:`.LaunchPlan`
+        :param plan: A plan returned by :meth:`.LaunchConfig.compile`.
+
+        :type  wait: ``bool``
+        :param wait: The same as for :meth:`create`, but with a single wait
+                     for all of the instances.
+
+        :rtype: ``list`` of :class:`.Instance`
+        :return:  The new instances, in the order of their names.
+        """
+        pass
+
+    @abstractmethod
+    def wait_till_ready(self, instances, timeout=None, interval=None):
+        """
+        Wait until all of the given instances are running.
+
+        The instances still pending are refreshed together, with as few
+        requests to the provider as it allows, so this is much cheaper than
+        waiting for each instance in turn.
+
+        Example:
+
+        .. code-block:: python
+
+            nodes = [provider.compute.instances.create(
+                         'node-%d' % i, image, 'm4.large', subnet, wait=False)
+                     for i in range(20)]
+            provider.compute.instances.wait_till_ready(nodes)
+
+        :type  instances: ``list`` of :class:`.Instance`
+        :param instances: The instances to wait for.
+
+        :type  timeout: ``int``
+        :param timeout: The maximum length of time (in seconds) to wait for.
+                        Defaults to the provider's ``default_wait_timeout``.
+
+        :type  interval: ``int``
+        :param interval: How frequently to poll the instances' state.
+                         Defaults to the provider's
+                         ``default_wait_interval``.
+
+        :raise WaitStateException: If an instance fails, or the instances
+                                   are not all running before ``timeout``.
+        """
+        pass
+
+    @abstractmethod
+    def watch(self, filter=None, interval=None, max_interval=None,
+              timeout=None, initial=False):
+        """
+        Generate an event each time an instance changes state.
+
+        All instances are listed on each poll, with as few requests as the
+        provider's paging allows, and their states are compared with those
+        of the previous poll. One background poller is shared by all the
+        generators watching the same service, polling at the shortest of
+        their intervals. The polling interval starts at ``interval``,
+        doubles after each poll without changes up to ``max_interval``, and
+        drops back to ``interval`` as soon as a change is seen.
+
+        Instances that disappear from the listing, once deleted, are
+        reported with a new state of ``InstanceState.UNKNOWN``; only their
+        ``id`` is known.
+
+        Example:
+
+        .. code-block:: python
+
+            for inst, old, new in provider.compute.instances.watch(
+                    filter=lambda inst: inst.name.startswith('worker-')):
+                if new == InstanceState.ERROR:
+                    print("%s failed after being %s" % (inst.name, old))
+
+        :type  filter: ``callable``
+        :param filter: Called with each instance whose state changed; only
+                       the events for which it returns ``True`` are
+                       generated. All events are generated by default.
+
+        :type  interval: ``int``
+        :param interval: The shortest time between polls, in seconds.
+                         Defaults to the provider's
+                         ``default_wait_interval``.
+
+        :type  max_interval: ``int``
+        :param max_interval: The longest time between polls, in seconds.
+                             Defaults to eight times ``interval``.
+
+        :type  timeout: ``int``
+        :param timeout: Stop watching after this many seconds. By default,
+                        the generator never ends.
+
+        :type  initial: ``bool``
+        :param initial: Whether to first generate an event, with an old
+                        state of ``None``, for every existing instance.
+
+        :rtype: generator of (:class:`.Instance`, ``str``, ``str``)
+        :return: ``(instance, old_state, new_state)`` tuples, with states
+                 from :class:`.InstanceState`.
+        """
+        pass
+
+    @abstractmethod
+    def terminate_many(self, instances):
+        """
+        Permanently terminate several instances at once.
+
+        The instances are terminated with as few requests to the provider
+        as it allows, or concurrently otherwise. A failure to terminate one
+        instance does not prevent the others from being terminated.
+
+        Example:
+
+        .. code-block:: python
+
+            results = provider.compute.instances.terminate_many(nodes)
+            failed = [node for node, result in zip(nodes, results)
+                      if isinstance(result, Exception)]
+
+        :type  instances: ``list`` of :class:`.Instance` or ``str``
+        :param instances: The instances, or their IDs.
+
+        :rtype: ``list``
+        :return: ``True`` for each instance terminated, or the exception
+                 raised for it, in the same order as ``instances``.
+        """
+        pass
+
+    @abstractmethod
+    def reboot_many(self, instances):
+        """
+        Reboot several instances at once, as for :meth:`terminate_many`.
+
+        :type  instances: ``list`` of :class:`.Instance` or ``str``
+        :param instances: The instances, or their IDs.
+
+        :rtype: ``list``
+        :return: ``True`` or an exception for each instance.
+        """
+        pass
+
+    @abstractmethod
+    def stop_many(self, instances):
+        """
+        Stop (shut down without terminating) several instances at once, as
+        for :meth:`terminate_many`.
+
+        :type  instances: ``list`` of :class:`.Instance` or ``str``
+        :param instances: The instances, or their IDs.
+
+        :rtype: ``list``
+        :return: ``True`` or an exception for each instance.
+        """
+        pass
+
+    @abstractmethod
+    def start_many(self, instances):
+        """
+        Start several stopped instances at once, as for
+        :meth:`terminate_many`.
+
+        :type  instances: ``list`` of :class:`.Instance` or ``str``
+        :param instances: The instances, or their IDs.
+
+        :rtype: ``list``
+        :return: ``True`` or an exception for each instance.
         """
         pass
 
@@ -0,0 +1,490 @@
+"""
+Pools of pre-launched instances and pre-allocated floating IPs, handed out
+without waiting for the provider
+"""
+import logging
+import threading
+import time
+import uuid
+
+from collections import deque
+
+from cloudbridge.cloud.base import helpers as cbhelpers
+from cloudbridge.cloud.interfaces.exceptions \
+    import InvalidConfigurationException
+from cloudbridge.cloud.interfaces.resources import InstanceState
+
+log = logging.getLogger(__name__)
+
+
+class _MaintainedPool(object):
+    """
+    Runs ``_maintain`` in a background thread every ``interval`` seconds, or
+    as soon as the pool is woken up.
+    """
+
+    def __init__(self, provider, interval):
+        self._provider = provider
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._thread = None
+
+    def _start(self):
+        if self._closed.is_set():
+            raise InvalidConfigurationException("The pool has been closed")
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+        self._wake.set()
+
+    def _stop(self):
+        """
+        Stop the background thread, waiting for any work in progress.
+        """
+        self._closed.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._closed.is_set():
+            self._wake.clear()
+            try:
+                self._maintain()
+            except Exception as e:
+                log.warning("Could not maintain %s: %s", self, e)
+            self._wake.wait(self.interval)
+
+    def _maintain(self):
+        raise NotImplementedError()
+
+    def close(self):
+        raise NotImplementedError()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class _PoolProfile(object):
+
+    def __init__(self, name, plan, size, min_size, stopped):
+        self.name = name
+        self.plan = plan
+        self.size = size
+        self.min_size = min_size
+        self.stopped = stopped
+        # Instances waiting to be handed out, oldest first
+        self.ready = deque()
+        # Number of instances being launched to join them
+        self.launching = 0
+        self.last_acquired = time.time()
+
+    @property
+    def pooled_state(self):
+        return InstanceState.STOPPED if self.stopped else InstanceState.RUNNING
+
+
+class InstancePool(_MaintainedPool):
+    """
+    Keeps pre-launched instances ready for each of a set of launch profiles,
+    so that acquiring one takes seconds rather than a full launch.
+
+    Each profile is a :class:`.LaunchPlan` and the number of instances to
+    keep ready for it. Pooled instances are either kept running, or stopped
+    to save costs, in which case they are started when acquired. A
+    background thread launches replacements as instances are handed out.
+    When a profile has not been acquired from for ``idle_timeout`` seconds,
+    its pool shrinks to the profile's ``min_size``, and it grows back on
+    the next acquisition.
+
+    Pooled instances are named ``<name_prefix>-<profile>-...``, and are
+    renamed and tagged when they are acquired. Replacements are launched
+    in threads of their own, so that a slow launch does not hold up the
+    checks of the other pooled instances.
+
+    Example:
+
+    .. code-block:: python
+
+        from cloudbridge.cloud import InstancePool
+
+        lc = provider.compute.instances.create_launch_config()
+        plan = lc.compile(image, 'm4.large', subnet)
+        with InstancePool(provider) as pool:
+            pool.add_profile('notebook', plan, size=5, stopped=True)
+            ...
+            inst = pool.acquire('notebook', 'alice-notebook',
+                                tags={'Owner': 'alice'})
+
+    :type provider: :class:`.CloudProvider`
+    :param provider: The provider to launch the instances with.
+
+    :type name_prefix: ``str``
+    :param name_prefix: The prefix of the names of pooled instances.
+
+    :type idle_timeout: ``int``
+    :param idle_timeout: The number of seconds without any acquisition
+                         after which a profile's pool shrinks.
+
+    :type interval: ``int``
+    :param interval: The number of seconds between checks of the pooled
+                     instances, when no acquisition triggers one sooner.
+    """
+
+    def __init__(self, provider, name_prefix='cb-pool', idle_timeout=1800,
+                 interval=60):
+        super(InstancePool, self).__init__(provider, interval)
+        self.name_prefix = name_prefix
+        self.idle_timeout = idle_timeout
+        self._profiles = {}
+        # Threads launching instances for the pool
+        self._fills = set()
+
+    def add_profile(self, name, plan, size, min_size=0, stopped=False):
+        """
+        Start keeping ``size`` instances launched from ``plan`` ready.
+
+        :type name: ``str``
+        :param name: The name of the profile, passed to :meth:`acquire`.
+
+        :type plan: :class:`.LaunchPlan`
+        :param plan: The plan to launch the instances from.
+
+        :type size: ``int``
+        :param size: The number of instances to keep ready.
+
+        :type min_size: ``int``
+        :param min_size: The number of instances to keep ready while the
+                         profile is idle.
+
+        :type stopped: ``bool``
+        :param stopped: Whether to keep the instances stopped rather than
+                        running.
+        """
+        if not 0 <= min_size <= size:
+            raise InvalidConfigurationException(
+                "The pool size must be at least min_size, which must not be"
+                " negative")
+        with self._lock:
+            if name in self._profiles:
+                raise InvalidConfigurationException(
+                    "Instance pool profile %s already exists" % name)
+            self._profiles[name] = _PoolProfile(name, plan, size, min_size,
+                                                stopped)
+        self._start()
+
+    def available(self, profile):
+        """
+        Return the number of instances ready to be handed out for a
+        profile.
+        """
+        profile = self._get_profile(profile)
+        with self._lock:
+            return len(profile.ready)
+
+    def acquire(self, profile, name, tags=None, wait=True):
+        """
+        Hand out an instance of a profile, launching one if none is ready.
+
+        :type profile: ``str``
+        :param profile: The name of the profile.
+
+        :type name: ``str``
+        :param name: The new name of the instance.
+
+        :type tags: ``dict``
+        :param tags: Additional tags to set on the instance, such as its
+                     owner.
+
+        :type wait: ``bool``
+        :param wait: Whether to wait until the instance is running. A
+                     running pooled instance is returned straight away.
+
+        :rtype: :class:`.Instance`
+        :return: The instance, which no longer belongs to the pool. If it
+                 cannot be handed out, it is terminated.
+        """
+        profile = self._get_profile(profile)
+        instances = self._provider.compute.instances
+        with self._lock:
+            profile.last_acquired = time.time()
+            instance = profile.ready.popleft() if profile.ready else None
+        # Launch a replacement
+        self._wake.set()
+
+        tags = dict(tags or {})
+        tags['Name'] = name
+        if instance is None:
+            log.debug("No instance of profile %s is ready; launching %s",
+                      profile.name, name)
+            instance = instances.launch(name, profile.plan, wait=False)
+            del tags['Name']
+        try:
+            if tags:
+                result = self._provider.tag_many([instance], tags)[0]
+                if isinstance(result, Exception):
+                    raise result
+            if instance.state == InstanceState.STOPPED:
+                result = instances.start_many([instance])[0]
+                if isinstance(result, Exception):
+                    raise result
+            if wait:
+                instances.wait_till_ready([instance])
+        except Exception:
+            # The instance may already be partly renamed or tagged, so it
+            # cannot go back to the pool
+            log.warning("Could not hand out instance %s; terminating it",
+                        instance.id)
+            instances.terminate_many([instance])
+            raise
+        return instance
+
+    def close(self, terminate=True):
+        """
+        Stop maintaining the pool, waiting for any launch in progress, and
+        terminate the instances still in it.
+
+        :type terminate: ``bool``
+        :param terminate: Whether to terminate the remaining pooled
+                          instances, or leave them as they are.
+
+        :rtype: ``list`` of :class:`.Instance`
+        :return: The instances that were left in the pool.
+        """
+        self._stop()
+        with self._lock:
+            fills = list(self._fills)
+        for fill in fills:
+            fill.join()
+        with self._lock:
+            pooled = [instance for profile in self._profiles.values()
+                      for instance in profile.ready]
+            for profile in self._profiles.values():
+                profile.ready.clear()
+        if terminate and pooled:
+            self._provider.compute.instances.terminate_many(pooled)
+        return pooled
+
+    def _get_profile(self, name):
+        try:
+            return self._profiles[name]
+        except KeyError:
+            raise InvalidConfigurationException(
+                "No instance pool profile named %s" % name)
+
+    def _maintain(self):
+        with self._lock:
+            profiles = list(self._profiles.values())
+        results = cbhelpers.parallel_map(self._maintain_profile, profiles)
+        for profile, result in zip(profiles, results):
+            if isinstance(result, Exception):
+                log.warning("Could not maintain instance pool profile "
+                            "%s: %s", profile.name, result)
+
+    def _maintain_profile(self, profile):
+        """
+        Drop pooled instances that are no longer usable, then shrink the
+        pool of a profile to its current target size, or start launching
+        the instances it lacks.
+        """
+        instances = self._provider.compute.instances
+        with self._lock:
+            pooled = list(profile.ready)
+        if pooled:
+            # pylint:disable=protected-access
+            instances._refresh_many(pooled)
+        idle = time.time() - profile.last_acquired > self.idle_timeout
+        target = profile.min_size if idle else profile.size
+        with self._lock:
+            # Only instances still in the pool may be removed, since others
+            # may have just been acquired
+            usable = [instance for instance in profile.ready
+                      if instance.state == profile.pooled_state]
+            surplus = [instance for instance in profile.ready
+                       if instance.state != profile.pooled_state]
+            surplus.extend(usable[target:])
+            profile.ready = deque(usable[:target])
+            deficit = target - len(profile.ready) - profile.launching
+            fill = None
+            if deficit > 0 and not self._closed.is_set():
+                profile.launching += deficit
+                fill = threading.Thread(target=self._fill,
+                                        args=(profile, deficit))
+                fill.daemon = True
+                self._fills.add(fill)
+        if fill:
+            fill.start()
+        if surplus:
+            log.debug("Removing %d instances from pool profile %s",
+                      len(surplus), profile.name)
+            instances.terminate_many(surplus)
+
+    def _fill(self, profile, count):
+        launched = []
+        try:
+            launched = self._launch(profile, count)
+        except Exception as e:
+            log.warning("Could not launch instances for pool profile %s: "
+                        "%s", profile.name, e)
+        finally:
+            with self._lock:
+                profile.launching -= count
+                profile.ready.extend(launched)
+                self._fills.discard(threading.current_thread())
+
+    def _launch(self, profile, count):
+        instances = self._provider.compute.instances
+        name_prefix = '{0}-{1}-{2}'.format(self.name_prefix, profile.name,
+                                           uuid.uuid4().hex[:8])
+        log.debug("Launching %d instances for pool profile %s", count,
+                  profile.name)
+        # Wait until the instances are running below, rather than only
+        # reported
+        launched = instances.launch_many(count, name_prefix, profile.plan,
+                                         wait=False)
+        try:
+            instances.wait_till_ready(launched)
+            if profile.stopped:
+                errors = [result for result in instances.stop_many(launched)
+                          if isinstance(result, Exception)]
+                if errors:
+                    raise errors[0]
+                # pylint:disable=protected-access
+                instances._wait_for_many(
+                    launched, [InstanceState.STOPPED],
+                    terminal_states=[InstanceState.TERMINATED,
+                                     InstanceState.ERROR])
+        except Exception:
+            instances.terminate_many(launched)
+            raise
+        return launched
+
+
+class FloatingIPPool(_MaintainedPool):
+    """
+    Keeps floating IPs allocated ahead of time, so that giving an instance a
+    public IP only takes the instance's ``add_floating_ip`` call.
+
+    A background thread allocates addresses as they are handed out. IPs
+    that are no longer needed can be released back to the pool instead of
+    being deleted.
+
+    Example:
+
+    .. code-block:: python
+
+        from cloudbridge.cloud import FloatingIPPool
+
+        with FloatingIPPool(provider, size=10) as ip_pool:
+            ...
+            ip = ip_pool.acquire()
+            inst.add_floating_ip(ip)
+            ...
+            ip_pool.release(ip, instance=inst)
+
+    :type provider: :class:`.CloudProvider`
+    :param provider: The provider to allocate the IPs with.
+
+    :type size: ``int``
+    :param size: The number of unused IPs to keep allocated.
+
+    :type interval: ``int``
+    :param interval: The number of seconds between checks of the pool size,
+                     when no acquisition triggers one sooner.
+    """
+
+    def __init__(self, provider, size, interval=60):
+        super(FloatingIPPool, self).__init__(provider, interval)
+        self.size = size
+        self._ips = deque()
+        self._start()
+
+    def available(self):
+        """
+        Return the number of IPs ready to be handed out.
+        """
+        with self._lock:
+            return len(self._ips)
+
+    def acquire(self):
+        """
+        Hand out an unused floating IP, allocating one if none is ready.
+
+        :rtype: :class:`.FloatingIP`
+        :return: The floating IP, which no longer belongs to the pool.
+        """
+        with self._lock:
+            ip = self._ips.popleft() if self._ips else None
+        # Allocate a replacement
+        self._wake.set()
+        if ip is None:
+            log.debug("No floating IP is ready; allocating one")
+            ip = self._provider.networking.networks.create_floating_ip()
+        return ip
+
+    def release(self, ip, instance=None):
+        """
+        Return a floating IP to the pool, or delete it if the pool is full.
+
+        :type ip: :class:`.FloatingIP`
+        :param ip: The floating IP to return.
+
+        :type instance: :class:`.Instance`
+        :param instance: The instance the IP is attached to, if any, from
+                         which it is removed first.
+        """
+        if instance is not None:
+            instance.remove_floating_ip(ip.public_ip)
+        with self._lock:
+            keep = len(self._ips) < self.size and not self._closed.is_set()
+            if keep:
+                self._ips.append(ip)
+        if not keep:
+            ip.delete()
+
+    def close(self, delete=True):
+        """
+        Stop maintaining the pool, and delete the IPs still in it.
+
+        :type delete: ``bool``
+        :param delete: Whether to delete the remaining pooled IPs, or keep
+                       them allocated.
+
+        :rtype: ``list`` of :class:`.FloatingIP`
+        :return: The IPs that were left in the pool.
+        """
+        self._stop()
+        with self._lock:
+            pooled = list(self._ips)
+            self._ips.clear()
+        if delete:
+            for ip, result in zip(pooled, cbhelpers.parallel_map(
+                    lambda ip: ip.delete(), pooled)):
+                if isinstance(result, Exception):
+                    log.warning("Could not delete floating IP %s: %s",
+                                ip.public_ip, result)
+        return pooled
+
+    def _maintain(self):
+        with self._lock:
+            deficit = self.size - len(self._ips)
+        if deficit <= 0:
+            return
+        log.debug("Allocating %d floating IPs", deficit)
+        results = cbhelpers.parallel_map(
+            lambda _: self._provider.networking.networks.create_floating_ip(),
+            range(deficit))
+        with self._lock:
+            self._ips.extend(result for result in results
+                             if not isinstance(result, Exception))
+        errors = [result for result in results
+                  if isinstance(result, Exception)]
+        if errors:
+            raise errors[0]
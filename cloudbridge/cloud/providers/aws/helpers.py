@@ -0,0 +1,159 @@
+"""
+Helper functions for the AWS provider
+"""
+import hashlib
+import hmac
+import threading
+
+from datetime import datetime
+
+from boto.exception import EC2ResponseError
+
+from cloudbridge.cloud.base import helpers as cbhelpers
+
+from six.moves.urllib.parse import quote
+
+SIGV4_ALGORITHM = 'AWS4-HMAC-SHA256'
+# Longest lifetime S3 accepts for a Signature Version 4 presigned URL
+MAX_PRESIGN_EXPIRY = 7 * 24 * 3600
+
+
+def batch_request(request, resource_ids, batch_size):
+    """
+    Send an EC2 request accepting a list of resource IDs for batches of at
+    most ``batch_size`` IDs, concurrently.
+
+    EC2 rejects a whole request if one of its IDs is invalid, so the IDs of
+    a failed batch are retried one by one to find out which of them failed.
+
+    :type request: ``callable``
+    :param request: Called with a list of resource IDs.
+
+    :rtype: ``list``
+    :return: ``True`` or the exception raised for each ID, in order.
+    """
+    def _send(batch):
+        try:
+            request(batch)
+            return [True] * len(batch)
+        except EC2ResponseError as ec2e:
+            if len(batch) == 1:
+                return [ec2e]
+        # An error other than an EC2ResponseError is returned as is
+        return [result if isinstance(result, Exception) else result[0]
+                for result in cbhelpers.parallel_map(
+                    _send, [[resource_id] for resource_id in batch])]
+
+    batches = list(cbhelpers.chunked(resource_ids, batch_size))
+    results = []
+    for batch, result in zip(batches, cbhelpers.parallel_map(_send, batches)):
+        results.extend([result] * len(batch)
+                       if isinstance(result, Exception) else result)
+    return results
+
+
+def _hmac_sha256(key, msg):
+    return hmac.new(key, msg.encode('utf-8'), hashlib.sha256).digest()
+
+
+def _uri_encode(value, safe='~'):
+    if not isinstance(value, bytes):
+        value = value.encode('utf-8')
+    return quote(value, safe=safe)
+
+
+class S3Presigner(object):
+    """
+    Creates S3 presigned URLs locally, using Signature Version 4 query
+    string authentication.
+
+    Deriving a signing key takes four HMAC operations, so the key for each
+    day and region is derived once and reused for every URL signed with it.
+    """
+
+    def __init__(self, access_key, secret_key, session_token=None):
+        self._access_key = access_key
+        self._secret_key = secret_key
+        self._session_token = session_token
+        self._signing_keys = {}
+        self._lock = threading.Lock()
+
+    def _signing_key(self, date, region):
+        with self._lock:
+            key = self._signing_keys.get((date, region))
+            if key is None:
+                key = _hmac_sha256(
+                    ('AWS4' + self._secret_key).encode('utf-8'), date)
+                for part in (region, 's3', 'aws4_request'):
+                    key = _hmac_sha256(key, part)
+                # Keys for past days are no longer needed, but those of
+                # other regions on the same day are
+                self._signing_keys = dict(
+                    (cached, value)
+                    for cached, value in self._signing_keys.items()
+                    if cached[0] >= date)
+                self._signing_keys[(date, region)] = key
+        return key
+
+    def presign(self, protocol, host, bucket, names, region, expires_in,
+                now=None):
+        """
+        Generate presigned ``GET`` URLs for several objects in a bucket.
+
+        :type protocol: ``str``
+        :param protocol: ``http`` or ``https``.
+
+        :type host: ``str``
+        :param host: The S3 endpoint, including the port if it is not the
+                     default one. Path-style URLs are generated.
+
+        :type bucket: ``str``
+        :param bucket: The name of the bucket.
+
+        :type names: ``iterable`` of ``str``
+        :param names: The names of the objects.
+
+        :type region: ``str``
+        :param region: The region of the bucket.
+
+        :type expires_in: ``int``
+        :param expires_in: Lifetime of the URLs in seconds, at most seven
+                           days.
+
+        :rtype: ``list`` of ``str``
+        :return: The URLs, in the same order as ``names``.
+        """
+        now = now or datetime.utcnow()
+        timestamp = now.strftime('%Y%m%dT%H%M%SZ')
+        date = now.strftime('%Y%m%d')
+        scope = '%s/%s/s3/aws4_request' % (date, region)
+        params = {
+            'X-Amz-Algorithm': SIGV4_ALGORITHM,
+            'X-Amz-Credential': '%s/%s' % (self._access_key, scope),
+            'X-Amz-Date': timestamp,
+            'X-Amz-Expires': str(max(1, min(int(expires_in),
+                                            MAX_PRESIGN_EXPIRY))),
+            'X-Amz-SignedHeaders': 'host',
+        }
+        if self._session_token:
+            params['X-Amz-Security-Token'] = self._session_token
+        # The query string is the same for every object, so only the path
+        # differs between the canonical requests
+        query = '&'.join('%s=%s' % (_uri_encode(k), _uri_encode(v))
+                         for k, v in sorted(params.items()))
+        signer = hmac.new(self._signing_key(date, region),
+                          digestmod=hashlib.sha256)
+        prefix = '%s\n%s\n' % (SIGV4_ALGORITHM, timestamp) + scope + '\n'
+        urls = []
+        for name in names:
+            path = '/%s/%s' % (_uri_encode(bucket), _uri_encode(name, '/~'))
+            canonical_request = '\n'.join([
+                'GET', path, query, 'host:' + host, '', 'host',
+                'UNSIGNED-PAYLOAD'])
+            string_to_sign = prefix + hashlib.sha256(
+                canonical_request.encode('utf-8')).hexdigest()
+            digest = signer.copy()
+            digest.update(string_to_sign.encode('utf-8'))
+            urls.append('%s://%s%s?%s&X-Amz-Signature=%s' % (
+                protocol, host, path, query, digest.hexdigest()))
+        return urls
@@ -3,6 +3,7 @@
 import os
 
 import boto
+from boto.ec2.ec2object import TaggedEC2Object
 from boto.ec2.regioninfo import RegionInfo
 try:
     # These are installed only for the case of a dev instance
@@ -16,6 +17,8 @@ except ImportError:
 from cloudbridge.cloud.base import BaseCloudProvider
 from cloudbridge.cloud.interfaces import TestMockHelperMixin
 
+from .helpers import S3Presigner
+from .helpers import batch_request
 from .services import AWSBlockStoreService
 from .services import AWSComputeService
 from .services import AWSNetworkingService
@@ -26,6 +29,8 @@ from .services import AWSSecurityService
 class AWSCloudProvider(BaseCloudProvider):
 
     PROVIDER_ID = 'aws'
+    # Largest number of resources tagged by a single CreateTags request
+    TAG_BATCH_SIZE = 500
     AWS_INSTANCE_DATA_DEFAULT_URL = "https://d168wakzal7fp0.cloudfront.net/" \
                                     "aws_instance_data.json"
 
@@ -60,6 +65,7 @@ class AWSCloudProvider(BaseCloudProvider):
         self._ec2_conn = None
         self._vpc_conn = None
         self._s3_conn = None
+        self._s3_presigner = None
 
         # Initialize provider services
         self._compute = AWSComputeService(self)
@@ -86,6 +92,44 @@ class AWSCloudProvider(BaseCloudProvider):
             self._s3_conn = self._connect_s3()
         return self._s3_conn
 
+    @property
+    def s3_presigner(self):
+        if not self._s3_presigner:
+            conn = self.s3_conn
+            self._s3_presigner = S3Presigner(
+                conn.aws_access_key_id, conn.aws_secret_access_key,
+                conn.provider.security_token)
+        return self._s3_presigner
+
+    def tag_many(self, resources, tags):
+        """
+        Tag the resources with one CreateTags request per batch of
+        ``TAG_BATCH_SIZE`` resources.
+        """
+        resources = list(resources)
+        # Like the failures of batch_request, an invalid name is reported
+        # for each resource rather than raised
+        results = [True] * len(resources)
+        if 'Name' in tags:
+            for i, resource in enumerate(resources):
+                try:
+                    resource.assert_valid_resource_name(tags['Name'])
+                except Exception as e:
+                    results[i] = e
+        valid = [i for i, result in enumerate(results) if result is True]
+        for i, result in zip(valid, batch_request(
+                lambda batch: self.ec2_conn.create_tags(batch, tags),
+                [resources[i].id for i in valid], self.TAG_BATCH_SIZE)):
+            results[i] = result
+        for resource, result in zip(resources, results):
+            if result is True:
+                # Update the tags cached by the wrapped boto object, so that
+                # the resource reflects them without being refreshed
+                for value in vars(resource).values():
+                    if isinstance(value, TaggedEC2Object):
+                        value.tags.update(tags)
+        return self._report_tag_results(resources, results)
+
     @property
     def compute(self):
         return self._compute
@@ -3,12 +3,19 @@ DataTypes used by this provider
 """
 import hashlib
 import inspect
-
-from datetime import datetime
+import io
+import logging
+import os
+import threading
 
 from boto.exception import EC2ResponseError
+from boto.exception import S3ResponseError
 from boto.s3.key import Key
+from boto.s3.multipart import MultiPartUpload
+from boto.s3.prefix import Prefix
 
+from cloudbridge.cloud.base import helpers as cbhelpers
+from cloudbridge.cloud.base.compression import ENCODING_METADATA_KEY
 from cloudbridge.cloud.base.resources import BaseAttachmentInfo
 from cloudbridge.cloud.base.resources import BaseBucket
 from cloudbridge.cloud.base.resources import BaseBucketObject
@@ -28,7 +35,10 @@ from cloudbridge.cloud.base.resources import BaseSecurityGroupRule
 from cloudbridge.cloud.base.resources import BaseSnapshot
 from cloudbridge.cloud.base.resources import BaseSubnet
 from cloudbridge.cloud.base.resources import BaseVolume
+from cloudbridge.cloud.base.resources import BucketObjectRecord
 from cloudbridge.cloud.base.resources import ClientPagedResultList
+from cloudbridge.cloud.base.resources import ServerPagedResultList
+from cloudbridge.cloud.interfaces.resources import FloatingIP
 from cloudbridge.cloud.interfaces.resources import GatewayState
 from cloudbridge.cloud.interfaces.resources import InstanceState
 from cloudbridge.cloud.interfaces.resources import MachineImageState
@@ -41,6 +51,10 @@ from cloudbridge.cloud.interfaces.resources import VolumeState
 
 from retrying import retry
 
+import six
+
+log = logging.getLogger(__name__)
+
 
 class AWSMachineImage(BaseMachineImage):
 
@@ -361,10 +375,17 @@ class AWSInstance(BaseInstance):
         """
         Add an elastic IP address to this instance.
         """
+        if isinstance(ip_address, FloatingIP):
+            allocation_id = ip_address.id
+            ip_address = ip_address.public_ip
+        else:
+            allocation_id = None
         if self._ec2_instance.vpc_id:
-            aid = self._provider._vpc_conn.get_all_addresses([ip_address])[0]
+            if not allocation_id:
+                allocation_id = self._provider._vpc_conn.get_all_addresses(
+                    [ip_address])[0].allocation_id
             return self._provider.ec2_conn.associate_address(
-                self._ec2_instance.id, allocation_id=aid.allocation_id)
+                self._ec2_instance.id, allocation_id=allocation_id)
         else:
             return self._ec2_instance.use_ip(ip_address)
 
@@ -805,9 +826,28 @@ class AWSSecurityGroupRule(BaseSecurityGroupRule):
 
 class AWSBucketObject(BaseBucketObject):
 
+    # Largest object S3 can copy with a single PUT-copy request
+    MAX_SINGLE_COPY_SIZE = 5 * 1024 ** 3
+    # Size of the parts used when copying larger objects
+    MULTIPART_COPY_PART_SIZE = 512 * 1024 ** 2
+    # Maximum number of parts in an S3 multipart upload
+    MAX_MULTIPART_PARTS = 10000
+    # Files larger than this are uploaded in resumable parts when a
+    # checkpoint is requested
+    MULTIPART_UPLOAD_THRESHOLD = 64 * 1024 ** 2
+    # Minimum size of the parts of a resumable upload
+    MULTIPART_UPLOAD_PART_SIZE = 64 * 1024 ** 2
+    # Size of the parts buffered in memory while streaming content of
+    # unknown length
+    STREAM_UPLOAD_PART_SIZE = 8 * 1024 ** 2
+    # Number of those parts sent concurrently
+    STREAM_UPLOAD_WORKERS = 4
+
     def __init__(self, provider, key):
         super(AWSBucketObject, self).__init__(provider)
         self._key = key
+        # The last raw modification date seen, and its converted form
+        self._last_modified = (None, None)
 
     @property
     def id(self):
@@ -832,32 +872,213 @@ class AWSBucketObject(BaseBucketObject):
         """
         Get the date and time this object was last modified.
         """
-        if self._key.last_modified:
-            lm = datetime.strptime(self._key.last_modified,
-                                   "%Y-%m-%dT%H:%M:%S.%fZ")
-            return lm.strftime("%Y-%m-%dT%H:%M:%S.%f")
-        else:
+        raw = self._key.last_modified
+        if not raw:
             return None
+        if raw != self._last_modified[0]:
+            if raw.endswith('Z'):
+                # Listings carry an ISO 8601 date in UTC, which only needs
+                # its fraction padded to microseconds
+                seconds, _, fraction = raw[:-1].partition('.')
+                converted = '%s.%s' % (seconds, fraction.ljust(6, '0')[:6])
+            else:
+                # Keys fetched with a HEAD request carry an HTTP date
+                converted = cbhelpers.http_date_to_iso(raw)
+            self._last_modified = (raw, converted)
+        return self._last_modified[1]
+
+    @property
+    def etag(self):
+        """
+        Get this object's etag.
+        """
+        if self._key.etag:
+            return self._key.etag.strip('"')
+        return None
+
+    @property
+    def _bucket_name(self):
+        return self._key.bucket.name
+
+    def _remote_etag(self):
+        key = self._key.bucket.get_key(self.name)
+        if key and key.etag:
+            return key.etag.strip('"')
+        return None
 
-    def iter_content(self):
+    def _iter_remote_content(self):
         """
         Returns this object's content as an
         iterable.
         """
+        # Send the request now, so that the object's metadata is known
+        # before its content is read
+        self._key.open_read()
         return self._key
 
-    def upload(self, data):
+    def _content_etag(self):
+        # Set from the response headers by open_read
+        return self._key.etag.strip('"') if self._key.etag else None
+
+    def _content_encoding(self):
+        return self._key.get_metadata(ENCODING_METADATA_KEY)
+
+    def _iter_remote_range(self, start, end):
+        # Each range is read through a key of its own, so that ranges can
+        # be read concurrently
+        key = self._key.bucket.new_key(self.name)
+        key.open_read(headers={'Range': 'bytes=%d-%d' % (start, end)})
+        self._key.metadata = key.metadata
+        return key
+
+    def _upload_stream(self, stream, encoding):
+        """
+        Upload the stream in parts of ``STREAM_UPLOAD_PART_SIZE`` bytes,
+        ``STREAM_UPLOAD_WORKERS`` of which are sent concurrently. Up to
+        ``STREAM_UPLOAD_WORKERS + 1`` parts are held in memory at a time:
+        those being sent, and the one being read.
+        """
+        if encoding:
+            self._key.set_metadata(ENCODING_METADATA_KEY, encoding)
+        else:
+            self._key.metadata.pop(ENCODING_METADATA_KEY, None)
+        part_size = self.STREAM_UPLOAD_PART_SIZE
+        data = stream.read(part_size)
+        if len(data) < part_size:
+            self._key.set_contents_from_string(data)
+            return
+        upload = self._key.bucket.initiate_multipart_upload(
+            self.name, metadata=self._key.metadata)
+
+        def _parts(data):
+            part_num = 1
+            while data:
+                yield part_num, data
+                part_num += 1
+                data = stream.read(part_size)
+
+        def _upload_part(part):
+            part_num, data = part
+            upload.upload_part_from_file(io.BytesIO(data), part_num)
+
+        try:
+            # Unlike parallel_map, iter_map only reads as many parts ahead
+            # as there are workers, and stops at the first failure
+            for _ in cbhelpers.iter_map(
+                    self._provider.transfers.bind(_upload_part),
+                    _parts(data), self.STREAM_UPLOAD_WORKERS):
+                pass
+            upload.complete_upload()
+        except Exception:
+            upload.cancel_upload()
+            raise
+
+    def upload(self, data, compression=None):
         """
         Set the contents of this object to the data read from the source
         string.
         """
-        self._key.set_contents_from_string(data)
+        if isinstance(data, six.text_type):
+            # Size the transfer in bytes rather than characters
+            data = data.encode('utf-8')
+        if compression:
+            return self._upload_compressed(io.BytesIO(data), compression)
+        # Metadata read from an earlier version would otherwise be sent
+        # with the new content
+        self._key.metadata.pop(ENCODING_METADATA_KEY, None)
+        with self._provider.transfers.transfer(len(data)) as transfer:
+            self._key.set_contents_from_string(
+                data, cb=transfer.boto_callback(), num_cb=-1)
 
-    def upload_from_file(self, path):
+    def upload_from_file(self, path, checkpoint=None, compression=None):
         """
         Store the contents of the file pointed by the "path" variable.
-        """
-        self._key.set_contents_from_filename(path)
+
+        If a ``checkpoint`` is given, files larger than
+        ``MULTIPART_UPLOAD_THRESHOLD`` are sent as a multipart upload whose
+        parts are uploaded concurrently and can be resumed.
+        """
+        if compression:
+            with open(path, 'rb') as f:
+                return self._upload_compressed(f, compression)
+        self._key.metadata.pop(ENCODING_METADATA_KEY, None)
+        size = os.path.getsize(path)
+        with self._provider.transfers.transfer(size) as transfer:
+            if checkpoint and size > self.MULTIPART_UPLOAD_THRESHOLD:
+                self._resumable_upload(path, size, checkpoint, transfer)
+            else:
+                self._key.set_contents_from_filename(
+                    path, cb=transfer.boto_callback(), num_cb=-1)
+
+    def _resumable_upload(self, path, size, checkpoint, transfer):
+        bucket = self._key.bucket
+        identity = cbhelpers.upload_identity(path, bucket.name, self.name)
+        state = cbhelpers.load_checkpoint(checkpoint, identity)
+        uploaded = None
+        if state.get('upload_id'):
+            upload = MultiPartUpload(bucket)
+            upload.key_name = self.name
+            upload.id = state['upload_id']
+            uploaded = self._list_uploaded_parts(upload)
+        if uploaded is None:
+            # No checkpoint, or the upload it refers to no longer exists
+            upload = bucket.initiate_multipart_upload(self.name)
+            part_size = max(self.MULTIPART_UPLOAD_PART_SIZE,
+                            -(-size // self.MAX_MULTIPART_PARTS))
+            state = dict(identity, upload_id=upload.id, part_size=part_size,
+                         parts={})
+            cbhelpers.save_checkpoint(checkpoint, state)
+            uploaded = {}
+        else:
+            log.debug("Resuming upload of %s with %d parts already uploaded",
+                      path, len(uploaded))
+        part_size = state['part_size']
+        lock = threading.Lock()
+
+        def _upload_part(part_num):
+            start = (part_num - 1) * part_size
+            length = min(part_size, size - start)
+            if uploaded.get(part_num) == length:
+                transfer.skip(length)
+                return
+            with open(path, 'rb') as f:
+                f.seek(start)
+                part = upload.upload_part_from_file(
+                    f, part_num, size=length, cb=transfer.boto_callback(),
+                    num_cb=-1)
+            with lock:
+                state['parts'][str(part_num)] = part.etag
+                cbhelpers.save_checkpoint(checkpoint, state)
+
+        results = cbhelpers.parallel_map(
+            self._provider.transfers.bind(_upload_part),
+            range(1, -(-size // part_size) + 1))
+        errors = [result for result in results
+                  if isinstance(result, Exception)]
+        if errors:
+            # Leave the upload and checkpoint in place so that the upload
+            # can be resumed
+            raise errors[0]
+        upload.complete_upload()
+        cbhelpers.remove_checkpoint(checkpoint)
+
+    @staticmethod
+    def _list_uploaded_parts(upload):
+        """
+        Return a dict mapping the number of each part already uploaded to
+        its size, or ``None`` if the upload does not exist.
+        """
+        parts = {}
+        marker = None
+        while True:
+            page = upload.get_all_parts(part_number_marker=marker)
+            if page is None:
+                return None
+            for part in page:
+                parts[part.part_number] = part.size
+            if not upload.is_truncated:
+                return parts
+            marker = upload.next_part_number_marker
 
     def delete(self):
         """
@@ -874,12 +1095,67 @@ class AWSBucketObject(BaseBucketObject):
         """
         return self._key.generate_url(expires_in=expires_in)
 
+    def copy_to(self, target_bucket, name=None):
+        """
+        Copy this object using S3 PUT-copy, or a multipart copy for objects
+        larger than 5 GB.
+        """
+        name = name or self.name
+        # pylint:disable=protected-access
+        if not (isinstance(target_bucket, AWSBucket) and
+                target_bucket._provider is self._provider):
+            return super(AWSBucketObject, self).copy_to(target_bucket, name)
+        size = self.size
+        if size is None:
+            size = self._key.bucket.get_key(self.name).size
+        if size > self.MAX_SINGLE_COPY_SIZE:
+            key = self._multipart_copy(target_bucket._bucket, name, size)
+        else:
+            key = target_bucket._bucket.copy_key(
+                name, self._key.bucket.name, self.name)
+        return AWSBucketObject(self._provider, key)
+
+    def _multipart_copy(self, dst_bucket, name, size):
+        part_size = max(self.MULTIPART_COPY_PART_SIZE,
+                        -(-size // self.MAX_MULTIPART_PARTS))
+        part_count = -(-size // part_size)
+        # Unlike a PUT-copy, a multipart upload does not carry over the
+        # source's metadata, such as its content encoding, so read it with a
+        # HEAD request, as keys from a listing have none
+        source = self._key.bucket.get_key(self.name)
+        headers = {}
+        if source.content_type:
+            headers['Content-Type'] = source.content_type
+        upload = dst_bucket.initiate_multipart_upload(
+            name, headers=headers, metadata=source.metadata)
+
+        def _copy_part(part_num):
+            start = (part_num - 1) * part_size
+            end = min(start + part_size, size) - 1
+            upload.copy_part_from_key(self._key.bucket.name, self.name,
+                                      part_num, start, end)
+
+        results = cbhelpers.parallel_map(_copy_part,
+                                         range(1, part_count + 1))
+        errors = [result for result in results
+                  if isinstance(result, Exception)]
+        if errors:
+            upload.cancel_upload()
+            raise errors[0]
+        upload.complete_upload()
+        return dst_bucket.get_key(name)
+
 
 class AWSBucket(BaseBucket):
 
+    # Maximum number of keys accepted by a single S3 Multi-Object Delete
+    # request.
+    MULTI_DELETE_LIMIT = 1000
+
     def __init__(self, provider, bucket):
         super(AWSBucket, self).__init__(provider)
         self._bucket = bucket
+        self._region = None
 
     @property
     def id(self):
@@ -896,26 +1172,64 @@ class AWSBucket(BaseBucket):
         """
         Retrieve a given object from this bucket.
         """
-        key = Key(self._bucket, name)
-        if key and key.exists():
+        # get_key issues a single HEAD request, which also fetches the
+        # object's metadata
+        key = self._bucket.get_key(name)
+        if key:
             return AWSBucketObject(self._provider, key)
         return None
 
-    def list(self, limit=None, marker=None, prefix=None):
+    def list(self, limit=None, marker=None, prefix=None, lightweight=False):
         """
         List all objects within this bucket.
 
         :rtype: BucketObject
         :return: List of all available BucketObjects within this bucket.
         """
-        objects = [AWSBucketObject(self._provider, obj)
-                   for obj in self._bucket.list(prefix=prefix)]
+        limit = limit or self._provider.config.default_result_limit
+        # Page on the server, so that listing a large bucket does not
+        # require fetching all of its keys first
+        result_set = self._bucket.get_all_keys(
+            prefix=prefix, max_keys=limit, marker=marker)
+        if lightweight:
+            objects = [BucketObjectRecord(
+                key.name, key.size, key.etag.strip('"') if key.etag else None,
+                cbhelpers.to_epoch(key.last_modified)) for key in result_set]
+        else:
+            objects = [AWSBucketObject(self._provider, key)
+                       for key in result_set]
+        next_marker = None
+        if result_set.is_truncated:
+            next_marker = result_set.next_marker or result_set[-1].name
+        return ServerPagedResultList(result_set.is_truncated, next_marker,
+                                     False, data=objects)
+
+    def from_record(self, record):
+        key = Key(self._bucket, record.name)
+        key.size = record.size
+        key.etag = '"%s"' % record.etag if record.etag else None
+        if record.last_modified is not None:
+            key.last_modified = cbhelpers.epoch_to_iso(
+                record.last_modified) + 'Z'
+        return AWSBucketObject(self._provider, key)
 
-        return ClientPagedResultList(self._provider, objects,
-                                     limit=limit, marker=marker)
+    def list_prefixes(self, prefix=None, delimiter='/', limit=None,
+                      marker=None):
+        limit = limit or self._provider.config.default_result_limit
+        result_set = self._bucket.get_all_keys(
+            prefix=prefix, delimiter=delimiter, max_keys=limit, marker=marker)
+        entries = [entry.name if isinstance(entry, Prefix)
+                   else AWSBucketObject(self._provider, entry)
+                   for entry in result_set]
+        next_marker = None
+        if result_set.is_truncated:
+            next_marker = result_set.next_marker or result_set[-1].name
+        return ServerPagedResultList(result_set.is_truncated, next_marker,
+                                     False, data=entries)
 
     def find(self, name, limit=None, marker=None):
-        objects = [obj for obj in self if obj.name == name]
+        obj = self.get(name)
+        objects = [obj] if obj else []
 
         return ClientPagedResultList(self._provider, objects,
                                      limit=limit, marker=marker)
@@ -924,8 +1238,65 @@ class AWSBucket(BaseBucket):
         """
         Delete this bucket.
         """
+        if delete_contents:
+            self.delete_objects(key.name for key in self._bucket.list())
         self._bucket.delete()
 
+    def delete_objects(self, names):
+        """
+        Delete the named objects using S3 Multi-Object Delete, sending
+        several batches of up to ``MULTI_DELETE_LIMIT`` keys concurrently.
+        """
+        def _delete_batch(batch):
+            result = self._bucket.delete_keys(batch, quiet=True)
+            for error in result.errors:
+                log.warning("Could not delete object %s from bucket %s: %s",
+                            error.key, self.name, error.message)
+            return not result.errors
+
+        results = cbhelpers.parallel_map(
+            _delete_batch, cbhelpers.chunked(names, self.MULTI_DELETE_LIMIT))
+        for result in results:
+            if isinstance(result, Exception):
+                log.warning("Batch delete from bucket %s failed: %s",
+                            self.name, result)
+        return all(result is True for result in results)
+
+    @property
+    def _signing_region(self):
+        """
+        The region in which this bucket is located. It is looked up once
+        and cached, since presigned URLs must be signed for that region.
+        """
+        if not self._region:
+            try:
+                location = self._bucket.get_location()
+            except S3ResponseError as e:
+                log.debug("Could not look up the location of bucket %s: %s",
+                          self.name, e)
+                location = self._provider.region_name
+            # Buckets in us-east-1 have no location constraint, and
+            # 'EU' is a legacy alias for eu-west-1
+            self._region = {'': 'us-east-1', 'EU': 'eu-west-1'}.get(
+                location, location)
+        return self._region
+
+    def generate_urls(self, names, expires_in):
+        """
+        Generate presigned URLs using Signature Version 4 query string
+        authentication. URLs are signed locally with a cached signing key.
+        """
+        conn = self._provider.s3_conn
+        region = self._signing_region
+        host = conn.host
+        if host == 's3.amazonaws.com' and region != 'us-east-1':
+            # Use the regional endpoint to avoid a redirect
+            host = 's3.%s.amazonaws.com' % region
+        if conn.port not in (80, 443):
+            host = '%s:%d' % (host, conn.port)
+        return self._provider.s3_presigner.presign(
+            conn.protocol, host, self.name, names, region, expires_in)
+
     def create_object(self, name):
         key = Key(self._bucket, name)
         return AWSBucketObject(self._provider, key)
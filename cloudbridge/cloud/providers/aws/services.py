@@ -1,11 +1,15 @@
 """Services implemented by the AWS provider."""
+import logging
 import string
 import time
 
 from boto.ec2.blockdevicemapping import BlockDeviceMapping
 from boto.ec2.blockdevicemapping import BlockDeviceType
+from boto.ec2.instance import Instance
 from boto.exception import EC2ResponseError, S3ResponseError
 
+from cloudbridge.cloud.base import helpers as cbhelpers
+from cloudbridge.cloud.base.resources import BaseLaunchPlan
 from cloudbridge.cloud.base.resources import ClientPagedResultList
 from cloudbridge.cloud.base.resources import ServerPagedResultList
 from cloudbridge.cloud.base.services import BaseBlockStoreService
@@ -25,8 +29,6 @@ from cloudbridge.cloud.base.services import BaseSecurityService
 from cloudbridge.cloud.base.services import BaseSnapshotService
 from cloudbridge.cloud.base.services import BaseSubnetService
 from cloudbridge.cloud.base.services import BaseVolumeService
-from cloudbridge.cloud.interfaces.exceptions \
-    import InvalidConfigurationException
 from cloudbridge.cloud.interfaces.resources import InstanceState
 from cloudbridge.cloud.interfaces.resources import InstanceType
 from cloudbridge.cloud.interfaces.resources import KeyPair
@@ -37,9 +39,12 @@ from cloudbridge.cloud.interfaces.resources import SecurityGroup
 from cloudbridge.cloud.interfaces.resources import Snapshot
 from cloudbridge.cloud.interfaces.resources import SubnetState
 from cloudbridge.cloud.interfaces.resources import Volume
+from cloudbridge.cloud.providers.aws import helpers as awshelpers
 
 import requests
 
+from retrying import retry
+
 from .resources import AWSBucket
 from .resources import AWSFloatingIP
 from .resources import AWSInstance
@@ -60,6 +65,8 @@ from .resources import AWSVolume
 # import cloudbridge as cb
 # cb.set_stream_logger(__name__)
 
+log = logging.getLogger(__name__)
+
 
 class AWSSecurityService(BaseSecurityService):
 
@@ -521,11 +528,165 @@ class AWSInstanceService(BaseInstanceService):
     def __init__(self, provider):
         super(AWSInstanceService, self).__init__(provider)
 
+    # Largest number of instances described in a single request
+    DESCRIBE_BATCH_SIZE = 200
+    # Largest number of instances acted on by a single terminate, reboot,
+    # stop or start request
+    ACTION_BATCH_SIZE = 200
+
     def create(self, name, image, instance_type, subnet, zone=None,
                key_pair=None, security_groups=None, user_data=None,
-               launch_config=None, **kwargs):
+               launch_config=None, wait=True, **kwargs):
         AWSInstance.assert_valid_resource_name(name)
+        return self.launch(name, self._compile(
+            image, instance_type, subnet, zone, key_pair, security_groups,
+            user_data, launch_config), wait=wait)
+
+    def launch(self, name, plan, wait=True):
+        AWSInstance.assert_valid_resource_name(name)
+        self._check_plan(plan)
+
+        reservation = self.provider.ec2_conn.run_instances(
+            min_count=1, max_count=1, **plan.launch_args)
+        instance = None
+        if reservation:
+            instance = AWSInstance(self.provider, reservation.instances[0])
+            if wait:
+                instance.wait_for(
+                    [InstanceState.PENDING, InstanceState.RUNNING],
+                    terminal_states=[InstanceState.TERMINATED,
+                                     InstanceState.ERROR])
+                instance.name = name
+            else:
+                self._name_new_instance((instance, name))
+        return instance
 
+    def _name_new_instance(self, item):
+        """
+        Tag a newly launched instance with its name without waiting for its
+        state.
+
+        boto's EC2 API version predates tagging at launch, so the tag is set
+        right after RunInstances instead. The instance may not be visible
+        to other requests yet, so the tag is retried while EC2 reports it as
+        missing.
+        """
+        instance, name = item
+        retry_decorator = retry(
+            retry_on_exception=lambda e: (
+                isinstance(e, EC2ResponseError) and
+                e.code == 'InvalidInstanceID.NotFound'),
+            stop_max_delay=60000, wait_exponential_multiplier=100,
+            wait_exponential_max=5000)
+        retry_decorator(self.provider.ec2_conn.create_tags)(
+            [instance.id], {'Name': name})
+        # pylint:disable=protected-access
+        instance._ec2_instance.tags['Name'] = name
+
+    def create_many(self, count, name_prefix, image, instance_type, subnet,
+                    zone=None, key_pair=None, security_groups=None,
+                    user_data=None, launch_config=None, wait=True,
+                    **kwargs):
+        for name in self._instance_names(count, name_prefix):
+            AWSInstance.assert_valid_resource_name(name)
+        return self.launch_many(count, name_prefix, self._compile(
+            image, instance_type, subnet, zone, key_pair, security_groups,
+            user_data, launch_config), wait=wait)
+
+    def launch_many(self, count, name_prefix, plan, wait=True):
+        """
+        Launch all the instances with a single RunInstances request, name
+        them concurrently, and then wait for them with one
+        DescribeInstances request per poll.
+        """
+        names = self._instance_names(count, name_prefix)
+        for name in names:
+            AWSInstance.assert_valid_resource_name(name)
+        self._check_plan(plan)
+
+        reservation = self.provider.ec2_conn.run_instances(
+            min_count=count, max_count=count, **plan.launch_args)
+        instances = [AWSInstance(self.provider, ec2_instance)
+                     for ec2_instance in sorted(
+                         reservation.instances,
+                         key=lambda i: int(i.ami_launch_index))]
+
+        try:
+            errors = [result for result in cbhelpers.parallel_map(
+                      self._name_new_instance, zip(instances, names))
+                      if isinstance(result, Exception)]
+            if errors:
+                raise errors[0]
+        except Exception:
+            log.warning("Could not launch instances %s; terminating them",
+                        name_prefix)
+            self.provider.ec2_conn.terminate_instances(
+                instance_ids=[instance.id for instance in instances])
+            raise
+        if wait:
+            self._wait_for_launch(instances, name_prefix)
+        return instances
+
+    # Errors of RunInstances that another zone or subnet may not have
+    CAPACITY_ERROR_CODES = frozenset([
+        'InsufficientInstanceCapacity',
+        'InsufficientFreeAddressesInSubnet',
+        'InsufficientCapacity',
+        'Unsupported'])
+
+    def _is_capacity_error(self, error):
+        return (isinstance(error, EC2ResponseError) and
+                error.code in self.CAPACITY_ERROR_CODES)
+
+    def _refresh_many(self, instances):
+        by_id = dict((instance.id, instance) for instance in instances)
+        for ids in cbhelpers.chunked(by_id, self.DESCRIBE_BATCH_SIZE):
+            try:
+                ec2_instances = self.provider.ec2_conn.get_only_instances(
+                    instance_ids=ids)
+            except EC2ResponseError as ec2e:
+                if ec2e.code != 'InvalidInstanceID.NotFound':
+                    raise
+                # Newly launched instances may not be visible yet
+                continue
+            for ec2_instance in ec2_instances:
+                # pylint:disable=protected-access
+                by_id[ec2_instance.id]._ec2_instance = ec2_instance
+
+    def _act_on_many(self, action, request, instances):
+        """
+        Apply ``request``, a boto method accepting ``instance_ids``, to the
+        instances in batches of ``ACTION_BATCH_SIZE``.
+        """
+        instance_ids = self._instance_ids(instances)
+        results = awshelpers.batch_request(
+            lambda batch: request(instance_ids=batch), instance_ids,
+            self.ACTION_BATCH_SIZE)
+        return self._report_results(action, instance_ids, results)
+
+    def terminate_many(self, instances):
+        return self._act_on_many(
+            'terminate', self.provider.ec2_conn.terminate_instances,
+            instances)
+
+    def reboot_many(self, instances):
+        return self._act_on_many(
+            'reboot', self.provider.ec2_conn.reboot_instances, instances)
+
+    def stop_many(self, instances):
+        return self._act_on_many(
+            'stop', self.provider.ec2_conn.stop_instances, instances)
+
+    def start_many(self, instances):
+        return self._act_on_many(
+            'start', self.provider.ec2_conn.start_instances, instances)
+
+    def _compile(self, image, instance_type, subnet, zone, key_pair,
+                 security_groups, user_data, launch_config):
+        """
+        Resolve the launch options into a plan holding the arguments of
+        ``run_instances``.
+        """
         image_id = image.id if isinstance(image, MachineImage) else image
         instance_size = instance_type.id if \
             isinstance(instance_type, InstanceType) else instance_type
@@ -536,27 +697,19 @@ class AWSInstanceService(BaseInstanceService):
             key_pair,
             KeyPair) else key_pair
         if launch_config:
-            bdm = self._process_block_device_mappings(launch_config, zone_id)
+            bdm = self._process_block_device_mappings(launch_config)
         else:
             bdm = None
 
         subnet_id, zone_id, security_group_ids = \
             self._resolve_launch_options(subnet, zone_id, security_groups)
 
-        reservation = self.provider.ec2_conn.run_instances(
-            image_id=image_id, instance_type=instance_size,
-            min_count=1, max_count=1, placement=zone_id,
-            key_name=key_pair_name, security_group_ids=security_group_ids,
-            user_data=user_data, block_device_map=bdm, subnet_id=subnet_id)
-        instance = None
-        if reservation:
-            instance = AWSInstance(self.provider, reservation.instances[0])
-            instance.wait_for(
-                [InstanceState.PENDING, InstanceState.RUNNING],
-                terminal_states=[InstanceState.TERMINATED,
-                                 InstanceState.ERROR])
-            instance.name = name
-        return instance
+        return BaseLaunchPlan(
+            self.provider, image_id, instance_size, subnet_id, zone_id,
+            dict(image_id=image_id, instance_type=instance_size,
+                 placement=zone_id, key_name=key_pair_name,
+                 security_group_ids=security_group_ids, user_data=user_data,
+                 block_device_map=bdm, subnet_id=subnet_id))
 
     def _resolve_launch_options(self, subnet=None, zone_id=None,
                                 security_groups=None):
@@ -590,12 +743,12 @@ class AWSInstanceService(BaseInstanceService):
             security_group_ids = security_groups
         return subnet.id, zone_id, security_group_ids
 
-    def _process_block_device_mappings(self, launch_config, zone=None):
+    def _process_block_device_mappings(self, launch_config):
         """
         Processes block device mapping information
-        and returns a Boto BlockDeviceMapping object. If new volumes
-        are requested (source is None and destination is VOLUME), they will be
-        created and the relevant volume ids included in the mapping.
+        and returns a Boto BlockDeviceMapping object. New blank volumes
+        (source is None and destination is VOLUME) are mapped with only a
+        size, so that EC2 creates them along with each instance.
         """
         bdm = BlockDeviceMapping()
         # Assign letters from f onwards
@@ -619,25 +772,14 @@ class AWSInstanceService(BaseInstanceService):
                 elif isinstance(device.source, MachineImage):
                     # Not supported
                     pass
-                else:
-                    # source is None, but destination is volume, therefore
-                    # create a blank volume. If the Zone is None, this
-                    # could fail since the volume and instance may be created
-                    # in two different zones.
-                    if not zone:
-                        raise InvalidConfigurationException(
-                            "A zone must be specified when launching with a"
-                            " new blank volume block device mapping.")
-                    new_vol = self.provider.block_store.volumes.create(
-                        '',
-                        device.size,
-                        zone)
-                    bd_type.volume_id = new_vol.id
-                bd_type.delete_on_terminate = device.delete_on_terminate
+                bd_type.delete_on_termination = bool(
+                    device.delete_on_terminate)
                 if device.size:
                     bd_type.size = device.size
             else:  # device is ephemeral
+                bdm['sd' + next(next_letter)] = bd_type
                 bd_type.ephemeral_name = 'ephemeral%s' % ephemeral_counter
+                ephemeral_counter += 1
 
         return bdm
 
@@ -695,6 +837,28 @@ class AWSInstanceService(BaseInstanceService):
                                      reservations.next_token,
                                      False, data=instances)
 
+    def _iter_states(self):
+        token = None
+        while True:
+            reservations = self.provider.ec2_conn.get_all_reservations(
+                max_results=self.WATCH_PAGE_SIZE, next_token=token)
+            for res in reservations:
+                for inst in res.instances:
+                    yield (inst.id,
+                           AWSInstance.INSTANCE_STATE_MAP.get(
+                               inst.state, InstanceState.UNKNOWN),
+                           inst)
+            token = reservations.next_token
+            if not reservations.is_truncated or not token:
+                return
+
+    def _wrap_state(self, instance_id, raw):
+        if raw is None:
+            # The instance is gone; only its ID is known
+            raw = Instance(self.provider.ec2_conn)
+            raw.id = instance_id
+        return AWSInstance(self.provider, raw)
+
 
 class AWSInstanceTypesService(BaseInstanceTypesService):
 
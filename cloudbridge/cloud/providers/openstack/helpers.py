@@ -1,10 +1,16 @@
 """
 Helper functions
 """
+import hashlib
+import hmac
 import itertools
+import time
 
 from cloudbridge.cloud.base.resources import ServerPagedResultList
 
+from six.moves.urllib.parse import quote
+from six.moves.urllib.parse import urlparse
+
 
 def os_result_limit(provider, requested_limit):
     """
@@ -28,10 +34,42 @@ def to_server_paged_list(provider, objects, limit):
     """
     limit = limit or provider.config.default_result_limit
     is_truncated = len(objects) > limit
-    next_token = objects[limit].id if is_truncated else None
+    next_token = objects[limit - 1].id if is_truncated else None
     results = ServerPagedResultList(is_truncated,
                                     next_token,
                                     False)
     for obj in itertools.islice(objects, limit):
         results.append(obj)
     return results
+
+
+def temp_urls(storage_url, key, container, names, expires_in):
+    """
+    Generate Swift TempURLs granting ``GET`` access to several objects.
+
+    The signatures are computed locally, with an HMAC-SHA1 of the method,
+    expiry time and object path keyed with the account's TempURL key. The
+    key is only prepared once for all the objects.
+
+    :type storage_url: ``str``
+    :param storage_url: The account's storage URL, e.g.
+                        ``https://swift.example.com/v1/AUTH_account``.
+
+    :type key: ``str``
+    :param key: The account's TempURL key.
+
+    :rtype: ``list`` of ``str``
+    :return: The URLs, in the same order as ``names``.
+    """
+    url = urlparse(storage_url)
+    expires = int(time.time() + expires_in)
+    signer = hmac.new(key.encode('utf-8'), digestmod=hashlib.sha1)
+    urls = []
+    for name in names:
+        path = u'%s/%s/%s' % (url.path.rstrip('/'), container, name)
+        digest = signer.copy()
+        digest.update((u'GET\n%d\n%s' % (expires, path)).encode('utf-8'))
+        urls.append('%s://%s%s?temp_url_sig=%s&temp_url_expires=%d' % (
+            url.scheme, url.netloc, quote(path.encode('utf-8')),
+            digest.hexdigest(), expires))
+    return urls
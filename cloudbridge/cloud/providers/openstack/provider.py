@@ -1,12 +1,17 @@
 """Provider implementation based on OpenStack Python clients for OpenStack."""
 
+import binascii
 import inspect
 
 import os
 
+import threading
+
 from cinderclient import client as cinder_client
 
 from cloudbridge.cloud.base import BaseCloudProvider
+from cloudbridge.cloud.interfaces.exceptions \
+    import InvalidConfigurationException
 
 from keystoneauth1 import session
 
@@ -18,13 +23,21 @@ from novaclient import client as nova_client
 from novaclient import shell as nova_shell
 
 from swiftclient import client as swift_client
+from swiftclient.multithreading import MultiThreadingManager
+from swiftclient.service import SwiftService
 
+from .resources import OpenStackInstance
+from .resources import OpenStackSnapshot
+from .resources import OpenStackVolume
 from .services import OpenStackBlockStoreService
 from .services import OpenStackComputeService
 from .services import OpenStackNetworkingService
 from .services import OpenStackObjectStoreService
 from .services import OpenStackSecurityService
 
+# Default size of each of the SwiftService thread pools
+DEFAULT_SWIFT_THREADS = 10
+
 
 class OpenStackCloudProvider(BaseCloudProvider):
     """OpenStack provider implementation."""
@@ -58,6 +71,9 @@ class OpenStackCloudProvider(BaseCloudProvider):
         self._glance = None
         self._cinder = None
         self._swift = None
+        self._swift_service = None
+        self._swift_service_lock = threading.Lock()
+        self._swift_temp_url_key = None
         self._neutron = None
 
         # Additional cached variables
@@ -141,12 +157,71 @@ class OpenStackCloudProvider(BaseCloudProvider):
             self._swift = self._connect_swift()
         return self._swift
 
+    @property
+    def swift_service(self):
+        """
+        A long-lived ``SwiftService`` shared by all object store operations
+        that need its upload, segmentation or bulk delete machinery.
+
+        The service's thread pools, and the connections held by each pool,
+        are kept warm for the lifetime of this provider.
+
+        :rtype: :class:`swiftclient.service.SwiftService`
+        :return: A SwiftService whose connections are created by this
+            provider.
+        """
+        if not self._swift_service:
+            with self._swift_service_lock:
+                if not self._swift_service:
+                    self._swift_service = self._connect_swift_service()
+        return self._swift_service
+
+    @property
+    def swift_temp_url_key(self):
+        """
+        The key with which temporary object URLs are signed.
+
+        It is read from the ``os_temp_url_key`` configuration value, or else
+        fetched from the account's ``Temp-URL-Key`` metadata once and cached.
+        If the account has no key yet, a random one is generated and stored
+        in its metadata only if the ``os_create_temp_url_key`` configuration
+        value is set, since that changes the key for every user of the
+        account.
+        """
+        if not self._swift_temp_url_key:
+            with self._swift_service_lock:
+                if not self._swift_temp_url_key:
+                    self._swift_temp_url_key = self._get_swift_temp_url_key()
+        return self._swift_temp_url_key
+
     @property
     def neutron(self):
         if not self._neutron:
             self._neutron = self._connect_neutron()
         return self._neutron
 
+    def _tag_resource(self, resource, tags):
+        """
+        Set the name with the resource's own update request, and store the
+        other tags as nova server or cinder volume and snapshot metadata.
+        """
+        metadata = dict((key, value) for key, value in tags.items()
+                        if key != 'Name')
+        if metadata:
+            if isinstance(resource, OpenStackInstance):
+                self.nova.servers.set_meta(resource.id, metadata)
+            elif isinstance(resource, OpenStackVolume):
+                self.cinder.volumes.set_metadata(resource.id, metadata)
+            elif isinstance(resource, OpenStackSnapshot):
+                self.cinder.volume_snapshots.set_metadata(resource.id,
+                                                          metadata)
+            else:
+                raise NotImplementedError(
+                    "Only the Name tag is supported for %s" % resource)
+        if 'Name' in tags:
+            resource.name = tags['Name']
+        return True
+
     @property
     def compute(self):
         return self._compute
@@ -298,6 +373,61 @@ class OpenStackCloudProvider(BaseCloudProvider):
             clean_options['session'] = self._keystone_session
         return swift_client.Connection(**clean_options)
 
+    def _get_swift_temp_url_key(self):
+        key = self._get_config_value('os_temp_url_key', None)
+        if key:
+            return key
+        headers = self.swift.head_account()
+        key = headers.get('x-account-meta-temp-url-key')
+        if key:
+            return key
+        create = self._get_config_value('os_create_temp_url_key', None)
+        if str(create).lower() not in ('1', 'true', 'yes'):
+            raise InvalidConfigurationException(
+                "The object store account has no Temp-URL-Key. Set the "
+                "os_temp_url_key configuration value, or set "
+                "os_create_temp_url_key to store a new key in the account.")
+        key = binascii.hexlify(os.urandom(32)).decode('ascii')
+        self.swift.post_account(headers={'x-account-meta-temp-url-key': key})
+        return key
+
+    def _connect_swift_service(self):
+        """
+        Get a SwiftService whose worker connections are manufactured by
+        ``_connect_swift``.
+
+        The number of threads used for object uploads, segment uploads and
+        object downloads/deletes can be tuned through the
+        ``os_object_uu_threads``, ``os_segment_threads`` and
+        ``os_object_dd_threads`` configuration values.
+
+        :return: A SwiftService using the auth credentials held by the
+            OpenStackCloudProvider instance
+        """
+        options = {
+            'object_uu_threads': int(self._get_config_value(
+                'os_object_uu_threads', DEFAULT_SWIFT_THREADS)),
+            'segment_threads': int(self._get_config_value(
+                'os_segment_threads', DEFAULT_SWIFT_THREADS)),
+            'object_dd_threads': int(self._get_config_value(
+                'os_object_dd_threads', DEFAULT_SWIFT_THREADS)),
+        }
+        service = SwiftService(options=options)
+        # SwiftService builds its connections through the module level
+        # ``swiftclient.service.get_conn`` function. Rather than patching
+        # that global, swap in a thread manager whose pools ask this provider
+        # for connections. No worker threads have been started yet, so the
+        # original manager can simply be shut down.
+        service.thread_manager.__exit__(None, None, None)
+        service.thread_manager = MultiThreadingManager(
+            # pylint:disable=protected-access
+            lambda: self._connect_swift(service._options),
+            segment_threads=options['segment_threads'],
+            object_dd_threads=options['object_dd_threads'],
+            object_uu_threads=options['object_uu_threads'],
+            container_threads=service._options['container_threads'])
+        return service
+
     def _connect_neutron(self):
         """Get an OpenStack Neutron (networking) client object cloud."""
         return neutron_client.Client(auth_url=self.auth_url,
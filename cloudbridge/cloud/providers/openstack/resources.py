@@ -2,10 +2,16 @@
 DataTypes used by this provider
 """
 import inspect
+import io
 import ipaddress
+import logging
 
 import os
 
+import threading
+
+from cloudbridge.cloud.base import helpers as cbhelpers
+from cloudbridge.cloud.base.compression import ENCODING_METADATA_KEY
 from cloudbridge.cloud.base.resources import BaseAttachmentInfo
 from cloudbridge.cloud.base.resources import BaseBucket
 from cloudbridge.cloud.base.resources import BaseBucketObject
@@ -24,7 +30,10 @@ from cloudbridge.cloud.base.resources import BaseSecurityGroupRule
 from cloudbridge.cloud.base.resources import BaseSnapshot
 from cloudbridge.cloud.base.resources import BaseSubnet
 from cloudbridge.cloud.base.resources import BaseVolume
+from cloudbridge.cloud.base.resources import BucketObjectRecord
 from cloudbridge.cloud.base.resources import ClientPagedResultList
+from cloudbridge.cloud.base.resources import ServerPagedResultList
+from cloudbridge.cloud.interfaces.resources import FloatingIP
 from cloudbridge.cloud.interfaces.resources import GatewayState
 from cloudbridge.cloud.interfaces.resources import InstanceState
 from cloudbridge.cloud.interfaces.resources import MachineImageState
@@ -40,13 +49,28 @@ from keystoneclient.v3.regions import Region
 
 import novaclient.exceptions as novaex
 
-import swiftclient
+import six
+from six.moves.urllib.parse import quote, unquote
 
-from swiftclient.service import SwiftService, SwiftUploadObject
+from swiftclient.exceptions import ClientException
+from swiftclient.service import SwiftUploadObject
+from swiftclient.utils import LengthWrapper
 
 
 ONE_GIG = 1048576000  # in bytes
 FIVE_GIG = ONE_GIG * 5  # in bytes
+ENCODING_HEADER = 'X-Object-Meta-' + ENCODING_METADATA_KEY
+
+log = logging.getLogger(__name__)
+
+
+def _copy_object(conn, src_container, src_name, dst_container, dst_name):
+    """
+    Copy an object server side using the given Swift connection.
+    """
+    source = '/%s/%s' % (src_container, src_name)
+    conn.put_object(dst_container, dst_name, None,
+                    headers={'X-Copy-From': quote(source.encode('utf-8'))})
 
 
 class OpenStackMachineImage(BaseMachineImage):
@@ -248,6 +272,8 @@ class OpenStackInstance(BaseInstance):
     def __init__(self, provider, os_instance):
         super(OpenStackInstance, self).__init__(provider)
         self._os_instance = os_instance
+        # The multiple-create request that launched this instance, if known
+        self._reservation_id = None
 
     @property
     def id(self):
@@ -324,11 +350,8 @@ class OpenStackInstance(BaseInstance):
         """
         Permanently terminate this instance.
         """
-        # delete the port we created when launching
-        # Assumption: it's the first interface in the list
-        iface_list = self._os_instance.interface_list()
-        if iface_list:
-            self._provider.neutron.delete_port(iface_list[0].port_id)
+        # pylint:disable=protected-access
+        self._provider.compute.instances._delete_ports(self.id)
         self._os_instance.delete()
 
     @property
@@ -385,6 +408,8 @@ class OpenStackInstance(BaseInstance):
         """
         Add a floating IP address to this instance.
         """
+        if isinstance(ip_address, FloatingIP):
+            ip_address = ip_address.public_ip
         self._os_instance.add_floating_ip(ip_address)
 
     def remove_floating_ip(self, ip_address):
@@ -1160,10 +1185,16 @@ class OpenStackSecurityGroupRule(BaseSecurityGroupRule):
 
 class OpenStackBucketObject(BaseBucketObject):
 
+    # Size of the segments of a resumable upload
+    RESUMABLE_SEGMENT_SIZE = ONE_GIG
+
     def __init__(self, provider, cbcontainer, obj):
         super(OpenStackBucketObject, self).__init__(provider)
         self.cbcontainer = cbcontainer
         self._obj = obj
+        # Content encoding and etag reported when the content was last read
+        self._encoding = None
+        self._etag = None
 
     @property
     def id(self):
@@ -1182,95 +1213,300 @@ class OpenStackBucketObject(BaseBucketObject):
     def last_modified(self):
         return self._obj.get("last_modified")
 
-    def iter_content(self):
+    @property
+    def etag(self):
+        return self._obj.get("hash")
+
+    @property
+    def _bucket_name(self):
+        return self.cbcontainer.name
+
+    def _remote_etag(self):
+        obj = self.cbcontainer.get(self.name)
+        return obj.etag if obj else None
+
+    def _iter_remote_content(self):
         """Returns this object's content as an iterable."""
-        _, content = self._provider.swift.get_object(
+        headers, content = self._provider.swift.get_object(
             self.cbcontainer.name, self.name, resp_chunk_size=65536)
+        self._encoding = headers.get(ENCODING_HEADER.lower())
+        self._etag = headers.get('etag')
+        return content
+
+    def _content_etag(self):
+        return self._etag.strip('"') if self._etag else None
+
+    def _content_encoding(self):
+        return self._encoding
+
+    def _iter_remote_range(self, start, end):
+        headers, content = self._provider.swift.get_object(
+            self.cbcontainer.name, self.name, resp_chunk_size=65536,
+            headers={'Range': 'bytes=%d-%d' % (start, end)})
+        self._encoding = headers.get(ENCODING_HEADER.lower())
         return content
 
-    def upload(self, data):
+    def _upload_stream(self, stream, encoding):
+        # Without a content length, the content is sent with chunked
+        # transfer encoding as it is read from the stream
+        self._provider.swift.put_object(
+            self.cbcontainer.name, self.name, stream,
+            headers={ENCODING_HEADER: encoding} if encoding else None)
+
+    def upload(self, data, compression=None):
         """
         Set the contents of this object to the data read from the source
         string.
 
         .. warning:: Will fail if the data is larger than 5 Gig.
         """
-        self._provider.swift.put_object(self.cbcontainer.name, self.name,
-                                        data)
+        if isinstance(data, six.text_type):
+            data = data.encode('utf-8')
+        if compression:
+            return self._upload_compressed(io.BytesIO(data), compression)
+        with self._provider.transfers.transfer(len(data)) as transfer:
+            self._provider.swift.put_object(
+                self.cbcontainer.name, self.name,
+                transfer.reader(io.BytesIO(data)), content_length=len(data))
 
-    def upload_from_file(self, path):
+    def upload_from_file(self, path, checkpoint=None, compression=None):
         """
         Stores the contents of the file pointed by the ``path`` variable.
         If the file is bigger than 5 Gig, it will be broken into segments.
+        Compressed uploads are sent as a single object, so their compressed
+        size must be below 5 Gig.
+
+        If a ``checkpoint`` is given, files bigger than
+        ``RESUMABLE_SEGMENT_SIZE`` are uploaded as a dynamic large object
+        whose segments are uploaded concurrently, and segments already
+        present on the server are not uploaded again.
 
         :type path: ``str``
         :param path: Absolute path to the file to be uploaded to Swift.
+        :type checkpoint: ``str``
+        :param checkpoint: Path of a file recording the progress of the
+            upload, so that it can be resumed if interrupted.
+        :type compression: ``str``
+        :param compression: One of the :class:`.ContentEncoding` formats.
         :rtype: ``bool``
         :return: ``True`` if successful, ``False`` if not.
 
         .. note::
             * The size of the segments chosen (or any of the other upload
               options) is not under user control.
-            * If called this method will remap the
-              ``swiftclient.service.get_conn`` factory method to
-              ``self._provider._connect_swift``
+            * The upload is carried out by the provider's shared
+              ``SwiftService``.
 
         .. seealso:: https://github.com/gvlproject/cloudbridge/issues/35#issuecomment-297629661 # noqa
         """
+        if compression:
+            with open(path, 'rb') as f:
+                return self._upload_compressed(f, compression)
+        size = os.path.getsize(path)
+        if self._provider.transfers.managed:
+            # The SwiftService cannot account for the bytes it sends, so
+            # managed transfers are uploaded directly
+            with self._provider.transfers.transfer(size) as transfer:
+                if checkpoint and size > self.RESUMABLE_SEGMENT_SIZE or \
+                        size >= FIVE_GIG:
+                    return self._resumable_upload(path, checkpoint, transfer)
+                with open(path, 'rb') as f:
+                    self._provider.swift.put_object(
+                        self.cbcontainer.name, self.name,
+                        transfer.reader(f), content_length=size)
+                return True
+        if checkpoint and size > self.RESUMABLE_SEGMENT_SIZE:
+            return self._resumable_upload(path, checkpoint)
+
         upload_options = {}
         if 'segment_size' not in upload_options:
             if os.path.getsize(path) >= FIVE_GIG:
                 upload_options['segment_size'] = FIVE_GIG
 
-        # remap the swift service's connection factory method
-        swiftclient.service.get_conn = self._provider._connect_swift
-
         result = True
-        with SwiftService() as swift:
-            upload_object = SwiftUploadObject(path, object_name=self.name)
-            for up_res in swift.upload(self.cbcontainer.name,
-                                       [upload_object, ],
-                                       options=upload_options):
-                result = result and up_res['success']
+        upload_object = SwiftUploadObject(path, object_name=self.name)
+        for up_res in self._provider.swift_service.upload(
+                self.cbcontainer.name, [upload_object, ],
+                options=upload_options):
+            result = result and up_res['success']
         return result
 
+    def _resumable_upload(self, path, checkpoint, transfer=None):
+        container = self.cbcontainer.name
+        identity = cbhelpers.upload_identity(path, container, self.name)
+        state = ((checkpoint and
+                  cbhelpers.load_checkpoint(checkpoint, identity)) or
+                 dict(identity, segment_size=self.RESUMABLE_SEGMENT_SIZE,
+                      segments={}))
+        size = identity['size']
+        segment_size = state['segment_size']
+        # Segments are laid out the same way as those written by the
+        # SwiftService, so the names are stable across attempts.
+        seg_container = container + '_segments'
+        seg_prefix = '%s/%f/%d/%d/' % (self.name, identity['mtime'], size,
+                                       segment_size)
+        state['manifest'] = '%s/%s' % (quote(seg_container.encode('utf-8')),
+                                       quote(seg_prefix.encode('utf-8')))
+        if checkpoint:
+            cbhelpers.save_checkpoint(checkpoint, state)
+
+        swift = self._provider.swift
+        swift.put_container(seg_container)
+        _, existing = swift.get_container(seg_container, prefix=seg_prefix,
+                                          full_listing=True)
+        uploaded = dict((seg['name'], seg['bytes']) for seg in existing)
+        lock = threading.Lock()
+
+        def _upload_segment(conn, index):
+            start = index * segment_size
+            length = min(segment_size, size - start)
+            seg_name = '%s%08d' % (seg_prefix, index)
+            if uploaded.get(seg_name) == length:
+                if transfer:
+                    transfer.skip(length)
+                return
+            with open(path, 'rb') as f:
+                f.seek(start)
+                etag = conn.put_object(
+                    seg_container, seg_name,
+                    LengthWrapper(transfer.reader(f) if transfer else f,
+                                  length, False),
+                    content_length=length,
+                    content_type='application/swiftclient-segment')
+            with lock:
+                state['segments'][str(index)] = etag
+                if checkpoint:
+                    cbhelpers.save_checkpoint(checkpoint, state)
+
+        # The service's segment pool supplies each job with its own
+        # connection as the first argument.
+        pool = self._provider.swift_service.thread_manager.segment_pool
+        upload_segment = self._provider.transfers.bind(_upload_segment)
+        jobs = [pool.submit(upload_segment, index)
+                for index in range(-(-size // segment_size))]
+        result = True
+        for job in jobs:
+            try:
+                job.result()
+            except Exception as e:
+                log.warning("Could not upload a segment of %s: %s", path, e)
+                result = False
+        if not result:
+            # Leave the segments and checkpoint in place so that the upload
+            # can be resumed
+            return False
+
+        try:
+            old_manifest = swift.head_object(
+                container, self.name).get('x-object-manifest')
+        except ClientException:
+            old_manifest = None
+        swift.put_object(container, self.name, '', content_length=0,
+                         headers={'X-Object-Manifest': state['manifest'],
+                                  'X-Object-Meta-Mtime': '%f' %
+                                  identity['mtime']})
+        if old_manifest and old_manifest != state['manifest']:
+            self._delete_segments(old_manifest)
+        if checkpoint:
+            cbhelpers.remove_checkpoint(checkpoint)
+        return True
+
+    def _delete_segments(self, manifest):
+        """
+        Delete the segments referenced by a replaced manifest.
+        """
+        seg_container, _, seg_prefix = manifest.partition('/')
+        seg_container = unquote(seg_container)
+        _, segments = self._provider.swift.get_container(
+            seg_container, prefix=unquote(seg_prefix), full_listing=True)
+        for del_res in self._provider.swift_service.delete(
+                seg_container, [seg['name'] for seg in segments]):
+            if not del_res['success']:
+                log.warning("Could not delete old segment %s: %s",
+                            del_res.get('object'), del_res.get('error'))
+
     def delete(self):
         """
         Delete this object.
 
         :rtype: ``bool``
         :return: True if successful
-
-        .. note:: If called this method will remap the
-              ``swiftclient.service.get_conn`` factory method to
-              ``self._provider._connect_swift``
         """
-
-        # remap the swift service's connection factory method
-        swiftclient.service.get_conn = self._provider._connect_swift
-
         result = True
-        with SwiftService() as swift:
-            for del_res in swift.delete(self.cbcontainer.name, [self.name, ]):
-                result = result and del_res['success']
+        for del_res in self._provider.swift_service.delete(
+                self.cbcontainer.name, [self.name, ]):
+            result = result and del_res['success']
         return result
 
-    def generate_url(self, expires_in=0):
+    def generate_url(self, expires_in=3600):
         """
-        Generates a URL to this object.
-
-        If the object is public, `expires_in` argument is not necessary, but if
-        the object is private, the life time of URL is set using `expires_in`
-        argument.
+        Generates a Swift TempURL to this object, valid for `expires_in`
+        seconds, one hour by default.
 
         See here for implementation details:
         http://stackoverflow.com/a/37057172
         """
-        raise NotImplementedError("This functionality is not implemented yet.")
+        return self.cbcontainer.generate_urls([self.name], expires_in)[0]
+
+    def copy_to(self, target_bucket, name=None):
+        """
+        Copy this object server side using ``X-Copy-From``.
+
+        Segmented (dynamic large) objects are copied by copying each segment
+        server side and writing a new manifest for them.
+        """
+        name = name or self.name
+        # pylint:disable=protected-access
+        if not (isinstance(target_bucket, OpenStackBucket) and
+                target_bucket._provider is self._provider):
+            return super(OpenStackBucketObject, self).copy_to(target_bucket,
+                                                              name)
+        headers = self._provider.swift.head_object(self.cbcontainer.name,
+                                                   self.name)
+        manifest = headers.get('x-object-manifest')
+        if manifest:
+            self._copy_segments(target_bucket.name, name, manifest)
+        else:
+            _copy_object(self._provider.swift, self.cbcontainer.name,
+                         self.name, target_bucket.name, name)
+        return target_bucket.get(name)
+
+    def _copy_segments(self, container, name, manifest):
+        seg_container, _, seg_prefix = manifest.partition('/')
+        seg_container = unquote(seg_container)
+        seg_prefix = unquote(seg_prefix)
+        if seg_prefix.startswith(self.name):
+            new_prefix = name + seg_prefix[len(self.name):]
+        else:
+            new_prefix = '%s/%s' % (name, seg_prefix)
+        new_container = container + '_segments'
+
+        swift = self._provider.swift
+        swift.put_container(new_container)
+        _, segments = swift.get_container(seg_container, prefix=seg_prefix,
+                                          full_listing=True)
+        # The service's segment pool supplies each job with its own
+        # connection as the first argument.
+        pool = self._provider.swift_service.thread_manager.segment_pool
+        jobs = [pool.submit(_copy_object, seg_container, seg['name'],
+                            new_container,
+                            new_prefix + seg['name'][len(seg_prefix):])
+                for seg in segments]
+        for job in jobs:
+            job.result()
+        swift.put_object(container, name, b'', headers={
+            'X-Object-Manifest': '%s/%s' % (quote(new_container),
+                                            quote(new_prefix))})
 
 
 class OpenStackBucket(BaseBucket):
 
+    # Number of object names handed to the SwiftService per delete call. The
+    # service splits each page across its object_dd threads, so individual
+    # bulk-delete requests stay well below Swift's default limit of 10000
+    # deletes per request.
+    BULK_DELETE_PAGE_SIZE = 10000
+
     def __init__(self, provider, bucket):
         super(OpenStackBucket, self).__init__(provider)
         self._bucket = bucket
@@ -1289,20 +1525,26 @@ class OpenStackBucket(BaseBucket):
     def get(self, name):
         """
         Retrieve a given object from this bucket.
-
-        FIXME: If multiple objects match the name as their name prefix,
-        all will be returned by the provider but this method will only
-        return the first element.
         """
-        _, object_list = self._provider.swift.get_container(
-            self.name, prefix=name)
-        if object_list:
-            return OpenStackBucketObject(self._provider, self,
-                                         object_list[0])
-        else:
-            return None
-
-    def list(self, limit=None, marker=None, prefix=None):
+        try:
+            headers = self._provider.swift.head_object(self.name, name)
+        except ClientException as e:
+            if e.http_status == 404:
+                return None
+            raise
+        # Translate the object's headers into the format of a container
+        # listing entry
+        obj = {
+            'name': name,
+            'bytes': int(headers.get('content-length', 0)),
+            'last_modified': cbhelpers.http_date_to_iso(
+                headers.get('last-modified')),
+            'hash': (headers.get('etag') or '').strip('"') or None,
+            'content_type': headers.get('content-type')
+        }
+        return OpenStackBucketObject(self._provider, self, obj)
+
+    def list(self, limit=None, marker=None, prefix=None, lightweight=False):
         """
         List all objects within this bucket.
 
@@ -1312,25 +1554,162 @@ class OpenStackBucket(BaseBucket):
         _, object_list = self._provider.swift.get_container(
             self.name, limit=oshelpers.os_result_limit(self._provider, limit),
             marker=marker, prefix=prefix)
-        cb_objects = [OpenStackBucketObject(
-            self._provider, self, obj) for obj in object_list]
+        if lightweight:
+            cb_objects = [BucketObjectRecord(
+                obj['name'], obj.get('bytes'), obj.get('hash'),
+                cbhelpers.to_epoch(obj.get('last_modified')))
+                for obj in object_list]
+        else:
+            cb_objects = [OpenStackBucketObject(
+                self._provider, self, obj) for obj in object_list]
 
         return oshelpers.to_server_paged_list(
             self._provider,
             cb_objects,
             limit)
 
+    def from_record(self, record):
+        return OpenStackBucketObject(self._provider, self, {
+            'name': record.name, 'bytes': record.size, 'hash': record.etag,
+            'last_modified': cbhelpers.epoch_to_iso(record.last_modified)})
+
+    def list_prefixes(self, prefix=None, delimiter='/', limit=None,
+                      marker=None):
+        limit = limit or self._provider.config.default_result_limit
+        _, entry_list = self._provider.swift.get_container(
+            self.name, limit=oshelpers.os_result_limit(self._provider, limit),
+            marker=marker, prefix=prefix, delimiter=delimiter)
+        is_truncated = len(entry_list) > limit
+        next_marker = None
+        if is_truncated:
+            last = entry_list[limit - 1]
+            if 'subdir' in last:
+                # Swift lists names after the marker, so resuming from the
+                # prefix itself would roll up its objects a second time.
+                # Skip past everything under the prefix the way Swift does,
+                # by incrementing the delimiter's last character.
+                next_marker = (last['subdir'][:-len(delimiter)] +
+                               delimiter[:-1] +
+                               six.unichr(ord(delimiter[-1]) + 1))
+                if entry_list[limit].get('name') == next_marker:
+                    # The marker is exclusive, so an object with that very
+                    # name would be skipped; return it with this page
+                    limit += 1
+                    next_marker = entry_list[limit - 1]['name']
+            else:
+                next_marker = last['name']
+        entries = [entry['subdir'] if 'subdir' in entry
+                   else OpenStackBucketObject(self._provider, self, entry)
+                   for entry in entry_list[:limit]]
+        return ServerPagedResultList(is_truncated, next_marker, False,
+                                     data=entries)
+
     def find(self, name, limit=None, marker=None):
-        objects = [obj for obj in self if obj.name == name]
+        obj = self.get(name)
+        objects = [obj] if obj else []
         return ClientPagedResultList(self._provider, objects,
                                      limit=limit, marker=marker)
 
+    def _iter_object_names(self, prefix=None):
+        """
+        Lazily list the names of the objects in this container, fetching one
+        server page at a time.
+        """
+        marker = None
+        while True:
+            _, object_list = self._provider.swift.get_container(
+                self.name, limit=self.BULK_DELETE_PAGE_SIZE, marker=marker,
+                prefix=prefix)
+            if not object_list:
+                return
+            for obj in object_list:
+                yield obj.get("name")
+            marker = object_list[-1].get("name")
+
     def delete(self, delete_contents=False):
         """
         Delete this bucket.
         """
+        if delete_contents:
+            self.delete_objects(self._iter_object_names())
         self._provider.swift.delete_container(self.name)
 
+    def delete_objects(self, names):
+        """
+        Delete the named objects. The Swift bulk-delete middleware is used
+        when the cluster advertises it, with batches deleted concurrently.
+        """
+        swift = self._provider.swift_service
+        result = True
+        for page in cbhelpers.chunked(names, self.BULK_DELETE_PAGE_SIZE):
+            for del_res in swift.delete(self.name, page):
+                result = self._check_delete_result(del_res) and result
+        return result
+
+    def _check_delete_result(self, del_res):
+        if not del_res['success']:
+            log.warning("Could not delete %s from container %s: %s",
+                        del_res.get('object') or del_res.get('objects'),
+                        self.name, del_res.get('error'))
+            return False
+        if del_res['action'] == 'bulk_delete':
+            errors = del_res.get('result', {}).get('Errors') or []
+            for name, status in errors:
+                log.warning("Could not delete %s: %s", name, status)
+            return not errors
+        return True
+
+    def generate_urls(self, names, expires_in):
+        """
+        Generate Swift TempURLs, signed locally with the account's cached
+        TempURL key.
+        """
+        swift = self._provider.swift
+        key = self._provider.swift_temp_url_key
+        storage_url = swift.url or swift.get_auth()[0]
+        return oshelpers.temp_urls(storage_url, key, self.name, names,
+                                   expires_in)
+
     def create_object(self, object_name):
-        self._provider.swift.put_object(self.name, object_name, None)
-        return self.get(object_name)
+        # The object is only stored once content is uploaded to it
+        return OpenStackBucketObject(self._provider, self,
+                                     {'name': object_name})
+
+    def _put_object(self, conn, name, data):
+        if isinstance(data, six.text_type):
+            data = data.encode('utf-8')
+        with self._provider.transfers.transfer(len(data)) as transfer:
+            etag = conn.put_object(self.name, name,
+                                   transfer.reader(io.BytesIO(data)),
+                                   content_length=len(data))
+        return OpenStackBucketObject(self._provider, self,
+                                     {'name': name, 'hash': etag})
+
+    def upload_many(self, items, max_workers=None):
+        """
+        Upload the objects through the shared SwiftService's upload pool,
+        whose worker threads each keep their own Swift connection alive
+        across uploads.
+        """
+        pool = self._provider.swift_service.thread_manager.object_uu_pool
+        put_object = self._provider.transfers.bind(self._put_object)
+        # Bound the number of queued uploads, so that a generator of items
+        # is only consumed as fast as the uploads progress
+        slots = threading.BoundedSemaphore(
+            max_workers or self.UPLOAD_MANY_WORKERS)
+        names = []
+        futures = []
+        for name, source in items:
+            names.append(name)
+            slots.acquire()
+            future = pool.submit(put_object, name,
+                                 self._read_source(source))
+            future.add_done_callback(lambda _: slots.release())
+            futures.append(future)
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return self._report_upload_results(names, results)
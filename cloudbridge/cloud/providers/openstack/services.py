@@ -4,10 +4,13 @@ Services implemented by the OpenStack provider.
 import fnmatch
 import logging
 import re
+import time
 
 from cinderclient.exceptions import NotFound as CinderNotFound
 
+from cloudbridge.cloud.base import helpers as cbhelpers
 from cloudbridge.cloud.base.resources import BaseLaunchConfig
+from cloudbridge.cloud.base.resources import BaseLaunchPlan
 from cloudbridge.cloud.base.resources import ClientPagedResultList
 from cloudbridge.cloud.base.services import BaseBlockStoreService
 from cloudbridge.cloud.base.services import BaseComputeService
@@ -26,6 +29,8 @@ from cloudbridge.cloud.base.services import BaseSecurityService
 from cloudbridge.cloud.base.services import BaseSnapshotService
 from cloudbridge.cloud.base.services import BaseSubnetService
 from cloudbridge.cloud.base.services import BaseVolumeService
+from cloudbridge.cloud.interfaces.exceptions import WaitStateException
+from cloudbridge.cloud.interfaces.resources import InstanceState
 from cloudbridge.cloud.interfaces.resources import InstanceType
 from cloudbridge.cloud.interfaces.resources import KeyPair
 from cloudbridge.cloud.interfaces.resources import MachineImage
@@ -36,9 +41,14 @@ from cloudbridge.cloud.interfaces.resources import Subnet
 from cloudbridge.cloud.interfaces.resources import Volume
 from cloudbridge.cloud.providers.openstack import helpers as oshelpers
 
+from neutronclient.common.exceptions \
+    import IpAddressGenerationFailureClient
 from neutronclient.common.exceptions import NeutronClientException
 
 from novaclient.exceptions import NotFound as NovaNotFound
+from novaclient.v2.servers import Server
+
+from swiftclient.exceptions import ClientException
 
 from .resources import OpenStackBucket
 from .resources import OpenStackFloatingIP
@@ -456,14 +466,19 @@ class OpenStackObjectStoreService(BaseObjectStoreService):
         Returns a bucket given its ID. Returns ``None`` if the bucket
         does not exist.
         """
-        _, container_list = self.provider.swift.get_account(
-            prefix=bucket_id)
-        if container_list:
-            return OpenStackBucket(self.provider,
-                                   next((c for c in container_list
-                                         if c['name'] == bucket_id), None))
-        else:
-            return None
+        try:
+            headers = self.provider.swift.head_container(bucket_id)
+        except ClientException as e:
+            if e.http_status == 404:
+                return None
+            raise
+        # Translate the container's headers into the format of an account
+        # listing entry
+        return OpenStackBucket(self.provider, {
+            'name': bucket_id,
+            'count': int(headers.get('x-container-object-count', 0)),
+            'bytes': int(headers.get('x-container-bytes-used', 0))
+        })
 
     def find(self, name, limit=None, marker=None):
         """
@@ -563,16 +578,305 @@ class OpenStackComputeService(BaseComputeService):
 
 class OpenStackInstanceService(BaseInstanceService):
 
+    # Number of instances acted on concurrently by terminate_many and the
+    # like
+    ACTION_WORKERS = 32
+    # Number of times the servers of a multiple-create request are listed
+    # before giving up on those nova has not listed yet
+    RESERVATION_LIST_ATTEMPTS = 5
+    # Prefix of the names of the ports created for instances at launch, by
+    # which they are told apart from ports attached later
+    PORT_NAME_PREFIX = 'cb-port-'
+
     def __init__(self, provider):
         super(OpenStackInstanceService, self).__init__(provider)
 
     def create(self, name, image, instance_type, subnet, zone=None,
                key_pair=None, security_groups=None, user_data=None,
-               launch_config=None,
+               launch_config=None, wait=True,
                **kwargs):
-        """Create a new virtual machine instance."""
+        """
+        Create a new virtual machine instance.
+
+        Nova names the server at launch and returns it straight away, so
+        this never waits, whatever the value of ``wait``.
+        """
         OpenStackInstance.assert_valid_resource_name(name)
+        return self.launch(name, self._compile(
+            image, instance_type, subnet, zone, key_pair, security_groups,
+            user_data, launch_config), wait=wait)
 
+    def launch(self, name, plan, wait=True):
+        OpenStackInstance.assert_valid_resource_name(name)
+        self._check_plan(plan)
+
+        nics = None
+        if plan.port_template:
+            nics = [self._create_port(name, *plan.port_template)]
+        try:
+            os_instance = self.provider.nova.servers.create(
+                name, min_count=1, max_count=1, nics=nics,
+                **plan.launch_args)
+        except Exception:
+            if nics:
+                log.warning("Could not launch instance %s; deleting its "
+                            "port", name)
+                self.provider.neutron.delete_port(nics[0]['port-id'])
+            raise
+        return OpenStackInstance(self.provider, os_instance)
+
+    def create_many(self, count, name_prefix, image, instance_type, subnet,
+                    zone=None, key_pair=None, security_groups=None,
+                    user_data=None, launch_config=None, wait=True,
+                    **kwargs):
+        for name in self._instance_names(count, name_prefix):
+            OpenStackInstance.assert_valid_resource_name(name)
+        return self.launch_many(count, name_prefix, self._compile(
+            image, instance_type, subnet, zone, key_pair, security_groups,
+            user_data, launch_config), wait=wait)
+
+    def launch_many(self, count, name_prefix, plan, wait=True):
+        names = self._instance_names(count, name_prefix)
+        for name in names:
+            OpenStackInstance.assert_valid_resource_name(name)
+        self._check_plan(plan)
+        instances = self._create_servers(count, name_prefix, names, plan)
+        if wait:
+            self._wait_for_launch(instances, name_prefix)
+        return instances
+
+    def _create_servers(self, count, name_prefix, names, plan):
+        """
+        Without a subnet, all the servers are created with a single request.
+        Otherwise, nova cannot attach one pre-created port to several
+        servers, so the ports and then the servers are created concurrently.
+        """
+        if not plan.port_template:
+            return self._create_reservation(count, name_prefix, names,
+                                            plan.launch_args)
+
+        def _create_port(name):
+            return self._create_port(name, *plan.port_template)
+
+        def _create_server(item):
+            name, nic = item
+            return self.provider.nova.servers.create(
+                name, min_count=1, max_count=1, nics=[nic],
+                **plan.launch_args)
+
+        nics = cbhelpers.parallel_map(_create_port, names)
+        servers = []
+        if not any(isinstance(nic, Exception) for nic in nics):
+            servers = cbhelpers.parallel_map(_create_server,
+                                             zip(names, nics))
+        errors = [result for result in nics + servers
+                  if isinstance(result, Exception)]
+        if errors:
+            log.warning("Could not launch instances %s; deleting them",
+                        name_prefix)
+            cbhelpers.parallel_map(
+                lambda server: server.delete(),
+                [server for server in servers
+                 if not isinstance(server, Exception)])
+            cbhelpers.parallel_map(
+                lambda nic: self.provider.neutron.delete_port(nic['port-id']),
+                [nic for nic in nics if not isinstance(nic, Exception)])
+            raise errors[0]
+        return [OpenStackInstance(self.provider, server)
+                for server in servers]
+
+    def _create_reservation(self, count, name_prefix, names, launch_args):
+        """
+        Create ``count`` servers with a single multiple-create request. If
+        they cannot all be found and named, those found are deleted.
+        """
+        reservation_id = self.provider.nova.servers.create(
+            name_prefix, min_count=count, max_count=count,
+            reservation_id=True, nics=None, **launch_args)
+        servers = []
+        try:
+            servers = self._list_reservation(reservation_id, count)
+            if len(servers) != count:
+                raise WaitStateException(
+                    "Nova listed only {0} of the {1} servers of reservation "
+                    "{2}.".format(len(servers), count, reservation_id))
+            by_name = dict((server.name, server) for server in servers)
+            if set(by_name) == set(names):
+                servers = [by_name[name] for name in names]
+            else:
+                # Nova is configured with a multi-instance name template
+                # other than the default <name>-<count>
+                servers = self._rename_servers(servers, names)
+        except Exception:
+            log.warning("Could not launch instances %s; deleting them",
+                        name_prefix)
+            cbhelpers.parallel_map(lambda server: server.delete(), servers)
+            raise
+        instances = [OpenStackInstance(self.provider, server)
+                     for server in servers]
+        for instance in instances:
+            # pylint:disable=protected-access
+            instance._reservation_id = reservation_id
+        return instances
+
+    def _list_reservation(self, reservation_id, count):
+        """
+        List the servers of a reservation, listing it again for a while if
+        nova does not list all ``count`` of them straight away.
+        """
+        def _list():
+            return self.provider.nova.servers.list(
+                search_opts={'reservation_id': reservation_id}, limit=-1)
+
+        servers = _list()
+        attempts = 1
+        while (len(servers) < count and
+               attempts < self.RESERVATION_LIST_ATTEMPTS):
+            time.sleep(self.provider.config.default_wait_interval)
+            servers = _list()
+            attempts += 1
+        return servers
+
+    @staticmethod
+    def _rename_servers(servers, names):
+        """
+        Give the servers of a reservation the names cloudbridge would have
+        chosen, in launch order. The launch index is only shown to
+        administrators, so the creation time is used otherwise.
+        """
+        index_key = 'OS-EXT-SRV-ATTR:launch_index'
+        if all(hasattr(server, index_key) for server in servers):
+            servers = sorted(servers,
+                             key=lambda server: getattr(server, index_key))
+        else:
+            # Nova lists the newest servers first
+            servers = sorted(reversed(servers),
+                             key=lambda server: server.created)
+        results = cbhelpers.parallel_map(
+            lambda item: item[0].update(name=item[1]), zip(servers, names))
+        errors = [result for result in results
+                  if isinstance(result, Exception)]
+        if errors:
+            raise errors[0]
+        # Nova returns the updated servers
+        return results
+
+    def _is_capacity_error(self, error):
+        # Neutron has run out of addresses in the subnet. Nova accepts the
+        # servers before scheduling them, so a lack of hosts only shows
+        # later as servers in ERROR, and is not retried elsewhere.
+        return isinstance(error, IpAddressGenerationFailureClient)
+
+    def _refresh_many(self, instances):
+        """
+        Instances launched together are refreshed by listing their
+        reservation. Nova only lets administrators filter servers by ID, so
+        the others are fetched one by one, concurrently.
+        """
+        by_id = dict((instance.id, instance) for instance in instances)
+        reservations = {}
+        others = []
+        for instance in by_id.values():
+            # pylint:disable=protected-access
+            if instance._reservation_id:
+                reservations.setdefault(instance._reservation_id,
+                                        set()).add(instance.id)
+            else:
+                others.append(instance.id)
+        found = {}
+        for reservation_id, instance_ids in reservations.items():
+            for server in self.provider.nova.servers.list(
+                    search_opts={'reservation_id': reservation_id},
+                    limit=-1):
+                if server.id in instance_ids:
+                    found[server.id] = server
+
+        def _get(instance_id):
+            try:
+                return self.provider.nova.servers.get(instance_id)
+            except NovaNotFound:
+                return None
+
+        for server in cbhelpers.parallel_map(_get, others,
+                                             self.ACTION_WORKERS):
+            if isinstance(server, Exception):
+                raise server
+            if server is not None:
+                found[server.id] = server
+        for instance_id, instance in by_id.items():
+            # pylint:disable=protected-access
+            if instance_id in found:
+                instance._os_instance = found[instance_id]
+            else:
+                # The instance no longer exists
+                instance._os_instance.status = 'unknown'
+
+    def _act_on_many(self, action, func, instances):
+        """
+        Apply ``func`` to the ID of each instance concurrently. Nova has no
+        bulk server actions.
+        """
+        instance_ids = self._instance_ids(instances)
+
+        def _act(instance_id):
+            func(instance_id)
+            return True
+
+        return self._report_results(
+            action, instance_ids, cbhelpers.parallel_map(
+                _act, instance_ids, self.ACTION_WORKERS))
+
+    def _delete_ports(self, instance_id):
+        """
+        Delete the ports created for an instance when it was launched. Nova
+        does not delete ports it was given, but other ports attached to the
+        instance are left alone.
+
+        Instances launched by earlier versions of cloudbridge have a port
+        named after the instance instead, which is deleted too.
+        """
+        ports = self.provider.neutron.list_ports(
+            device_id=instance_id).get('ports', [])
+        created = [port for port in ports
+                   if (port.get('name') or '').startswith(
+                       self.PORT_NAME_PREFIX)]
+        others = [port for port in ports if port not in created]
+        if others:
+            try:
+                name = self.provider.nova.servers.get(instance_id).name
+            except NovaNotFound:
+                name = None
+            created.extend(port for port in others
+                           if name and port.get('name') == name)
+        for port in created:
+            self.provider.neutron.delete_port(port['id'])
+
+    def _terminate(self, instance_id):
+        self._delete_ports(instance_id)
+        self.provider.nova.servers.delete(instance_id)
+
+    def terminate_many(self, instances):
+        return self._act_on_many('terminate', self._terminate, instances)
+
+    def reboot_many(self, instances):
+        return self._act_on_many(
+            'reboot', self.provider.nova.servers.reboot, instances)
+
+    def stop_many(self, instances):
+        return self._act_on_many(
+            'stop', self.provider.nova.servers.stop, instances)
+
+    def start_many(self, instances):
+        return self._act_on_many(
+            'start', self.provider.nova.servers.start, instances)
+
+    def _compile(self, image, instance_type, subnet, zone, key_pair,
+                 security_groups, user_data, launch_config):
+        """
+        Resolve the launch options into a plan holding the arguments of
+        ``nova.servers.create``, and those of :meth:`_create_port` as its
+        port template if a port must be created for each instance.
+        """
         image_id = image.id if isinstance(image, MachineImage) else image
         instance_size = instance_type.id if \
             isinstance(instance_type, InstanceType) else \
@@ -599,10 +903,8 @@ class OpenStackInstanceService(BaseInstanceService):
         # OpenStack will respect the port's security groups first and then
         # fall-back to the named security groups.
         sg_name_list = []
-        nics = None
+        port_args = None
         if subnet_id:
-            log.debug("Creating network port for %s in subnet: %s" %
-                      (name, subnet_id))
             sg_list = []
             if security_groups:
                 if isinstance(security_groups, list) and \
@@ -612,18 +914,8 @@ class OpenStackInstanceService(BaseInstanceService):
                     sg_list = (self.provider.security.security_groups
                                .find(name=sg) for sg in security_groups)
                     sg_list = (sg[0] for sg in sg_list if sg)
-            sg_id_list = [sg.id for sg in sg_list]
-            port_def = {
-                "port": {
-                    "admin_state_up": True,
-                    "name": name,
-                    "network_id": net_id,
-                    "fixed_ips": [{"subnet_id": subnet_id}],
-                    "security_groups": sg_id_list
-                }
-            }
-            port_id = self.provider.neutron.create_port(port_def)['port']['id']
-            nics = [{'net-id': net_id, 'port-id': port_id}]
+            sg_id_list = tuple(sg.id for sg in sg_list)
+            port_args = (net_id, subnet_id, sg_id_list)
         else:
             if security_groups:
                 if isinstance(security_groups, list) and \
@@ -633,19 +925,37 @@ class OpenStackInstanceService(BaseInstanceService):
                     sg_name_list = security_groups
 
         log.debug("Launching in subnet %s" % subnet_id)
-        os_instance = self.provider.nova.servers.create(
-            name,
-            None if self._has_root_device(launch_config) else image_id,
-            instance_size,
-            min_count=1,
-            max_count=1,
+        launch_args = dict(
+            image=None if self._has_root_device(launch_config) else image_id,
+            flavor=instance_size,
             availability_zone=zone_id,
             key_name=key_pair_name,
-            security_groups=sg_name_list,
+            security_groups=list(sg_name_list),
             userdata=user_data,
-            block_device_mapping_v2=bdm,
-            nics=nics)
-        return OpenStackInstance(self.provider, os_instance)
+            block_device_mapping_v2=bdm)
+        return BaseLaunchPlan(self.provider, image_id, instance_size,
+                              subnet_id, zone_id, launch_args, port_args)
+
+    def _create_port(self, name, net_id, subnet_id, sg_id_list):
+        """
+        Create the network port of an instance.
+
+        :rtype: ``dict``
+        :return: The ``nics`` entry attaching the port to the instance.
+        """
+        log.debug("Creating network port for %s in subnet: %s" %
+                  (name, subnet_id))
+        port_def = {
+            "port": {
+                "admin_state_up": True,
+                "name": self.PORT_NAME_PREFIX + name,
+                "network_id": net_id,
+                "fixed_ips": [{"subnet_id": subnet_id}],
+                "security_groups": list(sg_id_list)
+            }
+        }
+        port_id = self.provider.neutron.create_port(port_def)['port']['id']
+        return {'net-id': net_id, 'port-id': port_id}
 
     def _to_block_device_mapping(self, launch_config):
         """
@@ -734,6 +1044,28 @@ class OpenStackInstanceService(BaseInstanceService):
         except NovaNotFound:
             return None
 
+    def _iter_states(self):
+        marker = None
+        while True:
+            servers = self.provider.nova.servers.list(
+                limit=self.WATCH_PAGE_SIZE, marker=marker)
+            for server in servers:
+                yield (server.id,
+                       OpenStackInstance.INSTANCE_STATE_MAP.get(
+                           server.status, InstanceState.UNKNOWN),
+                       server)
+            if not servers:
+                return
+            marker = servers[-1].id
+
+    def _wrap_state(self, instance_id, raw):
+        if raw is None:
+            # The server is gone; only its ID is known
+            raw = Server(self.provider.nova.servers,
+                         {'id': instance_id, 'name': None,
+                          'status': 'UNKNOWN'}, loaded=True)
+        return OpenStackInstance(self.provider, raw)
+
 
 class OpenStackNetworkingService(BaseNetworkingService):
 
@@ -765,6 +1097,7 @@ class OpenStackNetworkService(BaseNetworkService):
 
     def __init__(self, provider):
         super(OpenStackNetworkService, self).__init__(provider)
+        self._external_network_id = None
 
     def get(self, network_id):
         network = (n for n in self if n.id == network_id)
@@ -800,14 +1133,26 @@ class OpenStackNetworkService(BaseNetworkService):
         al = self.provider.neutron.list_floatingips()['floatingips']
         return [OpenStackFloatingIP(self.provider, a) for a in al]
 
+    def _get_external_network_id(self):
+        """
+        Return the ID of the external network that floating IPs are
+        allocated from, which is only looked up once.
+        """
+        if not self._external_network_id:
+            # OpenStack requires a floating IP to be associated with a pool,
+            # so just choose the first one available...
+            networks = self.provider.neutron.list_networks(
+                **{'router:external': True})['networks']
+            self._external_network_id = networks[0]['id']
+        return self._external_network_id
+
     def create_floating_ip(self):
-        # OpenStack requires a floating IP to be associated with a pool,
-        # so just choose the first one available...
-        ip_pool_name = self.provider.nova.floating_ip_pools.list()[0].name
-        ip = self.provider.nova.floating_ips.create(ip_pool_name)
-        # Nova returns a different object than Neutron so fetch the Neutron one
-        ip = self.provider.neutron.list_floatingips(id=ip.id)['floatingips'][0]
-        return OpenStackFloatingIP(self.provider, ip)
+        # Allocate through Neutron, so that a single request returns the
+        # full floating IP
+        ip = self.provider.neutron.create_floatingip({
+            'floatingip': {
+                'floating_network_id': self._get_external_network_id()}})
+        return OpenStackFloatingIP(self.provider, ip['floatingip'])
 
 
 class OpenStackSubnetService(BaseSubnetService):
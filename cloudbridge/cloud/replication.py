@@ -0,0 +1,215 @@
+"""
+Replication of objects between buckets, possibly of different providers
+"""
+import json
+import logging
+import os
+import threading
+
+from multiprocessing.pool import ThreadPool
+
+from cloudbridge.cloud.base import helpers as cbhelpers
+
+log = logging.getLogger(__name__)
+
+# Default upper bound on the size of the objects being transferred at once
+DEFAULT_MAX_INFLIGHT_BYTES = 1024 ** 3
+
+
+class _ByteBudget(object):
+    """
+    Bounds the number of bytes being transferred at any one time. A request
+    for more than the whole budget is granted once nothing else is in flight.
+    """
+
+    def __init__(self, limit):
+        self._limit = limit
+        self._used = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, size):
+        size = min(size, self._limit)
+        with self._cond:
+            while self._used and self._used + size > self._limit:
+                self._cond.wait()
+            self._used += size
+        return size
+
+    def release(self, size):
+        with self._cond:
+            self._used -= size
+            self._cond.notify_all()
+
+
+def _is_replicated(obj, record):
+    """
+    Check whether an object has already been copied to the target bucket,
+    where it is described by the listing record ``record``.
+
+    Etags are only compared when both are plain MD5 digests, since the
+    checksums of multipart or segmented uploads differ between providers
+    even when the content is the same. Otherwise the copy is only trusted
+    if it was written after the source object last changed.
+    """
+    if record is None or record.size != obj.size:
+        return False
+    if cbhelpers.is_md5(record.etag) and cbhelpers.is_md5(obj.etag):
+        return record.etag == obj.etag
+    modified = cbhelpers.to_epoch(obj.last_modified)
+    return (modified is not None and record.last_modified is not None and
+            record.last_modified >= modified)
+
+
+def _is_checkpointed(obj, entry):
+    """
+    Check whether an object is unchanged since its copy was recorded in the
+    checkpoint as ``(size, etag, last_modified)``. Both etags come from the
+    source provider, so they are comparable whatever their format.
+    """
+    if entry is None:
+        return False
+    size, etag, modified = entry
+    if size != obj.size or etag != obj.etag:
+        return False
+    return bool(etag) or modified == cbhelpers.to_epoch(obj.last_modified)
+
+
+class _ListingCursor(object):
+    """
+    Looks up names in a listing that is in name order, which is the order
+    in which providers list objects. The listing is read only as far as
+    the names asked for, which must be asked for in ascending order, so it
+    is never held in memory as a whole.
+    """
+
+    def __init__(self, records):
+        self._records = iter(records)
+        self._current = next(self._records, None)
+
+    def get(self, name):
+        while self._current is not None and self._current.name < name:
+            self._current = next(self._records, None)
+        if self._current is not None and self._current.name == name:
+            return self._current
+        return None
+
+
+def _load_checkpoint(path):
+    done = {}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    # Checkpoints written by earlier versions do not record
+                    # the modification time
+                    name, size, etag = entry[:3]
+                    modified = entry[3] if len(entry) > 3 else None
+                    done[name] = (size, etag, modified)
+    return done
+
+
+def replicate(src_bucket, dst_bucket, prefix=None, max_workers=None,
+              max_inflight_bytes=DEFAULT_MAX_INFLIGHT_BYTES, checkpoint=None):
+    """
+    Copy the objects under ``prefix`` from one bucket into another.
+
+    The source listing is consumed page by page while a pool of workers
+    copies objects concurrently, so listing and transfers overlap. The
+    target bucket is listed alongside, and objects that already exist there
+    with the same size and checksum, or that were written there after the
+    source object last changed, are skipped. Each object is copied with
+    :meth:`.BucketObject.copy_to`, which copies server side when both
+    buckets belong to the same provider and streams the data through the
+    client otherwise, downloading large objects as concurrent ranges.
+
+    Example:
+
+    .. code-block:: python
+
+        from cloudbridge.cloud import replicate
+
+        summary = replicate(aws.object_store.get('data'),
+                            openstack.object_store.get('data-mirror'),
+                            prefix='results/', max_workers=20,
+                            checkpoint='/tmp/data-mirror.ckpt')
+
+    :type src_bucket: :class:`.Bucket`
+    :param src_bucket: The bucket to copy objects from.
+
+    :type dst_bucket: :class:`.Bucket`
+    :param dst_bucket: The bucket to copy objects into.
+
+    :type prefix: ``str``
+    :param prefix: Only objects whose names start with this prefix are
+                   replicated.
+
+    :type max_workers: ``int``
+    :param max_workers: Number of objects to transfer concurrently.
+
+    :type max_inflight_bytes: ``int``
+    :param max_inflight_bytes: Upper bound on the combined size of the objects
+                               being transferred at any one time. An object
+                               larger than this is transferred on its own.
+
+    :type checkpoint: ``str``
+    :param checkpoint: Path of a file in which completed copies are recorded.
+                       If the file exists when replication starts, objects it
+                       lists are not copied again unless they have changed
+                       since, so an interrupted run can be resumed.
+
+    :rtype: ``dict``
+    :return: A summary with the number of objects ``copied`` and ``skipped``,
+             and a list of the names of the objects that ``failed``.
+    """
+    done = _load_checkpoint(checkpoint)
+    # pylint:disable=protected-access
+    existing = _ListingCursor(
+        dst_bucket._iter_objects(prefix=prefix, lightweight=True))
+    workers = max_workers or cbhelpers.DEFAULT_MAX_WORKERS
+    budget = _ByteBudget(max_inflight_bytes)
+    # Keep the listing only a little ahead of the workers
+    slots = threading.BoundedSemaphore(workers * 2)
+    lock = threading.Lock()
+    summary = {'copied': 0, 'skipped': 0, 'failed': []}
+    checkpoint_file = open(checkpoint, 'a') if checkpoint else None
+
+    def _copy(obj, reserved):
+        try:
+            obj.copy_to(dst_bucket, obj.name)
+            with lock:
+                summary['copied'] += 1
+                if checkpoint_file:
+                    checkpoint_file.write(json.dumps(
+                        [obj.name, obj.size, obj.etag,
+                         cbhelpers.to_epoch(obj.last_modified)]) + '\n')
+                    checkpoint_file.flush()
+        except Exception as e:
+            log.warning("Could not replicate object %s: %s", obj.name, e)
+            with lock:
+                summary['failed'].append(obj.name)
+        finally:
+            budget.release(reserved)
+            slots.release()
+
+    # Apply the caller's transfer settings to copies streamed through the
+    # client
+    # pylint:disable=protected-access
+    copy = src_bucket._provider.transfers.bind(_copy)
+    pool = ThreadPool(workers)
+    try:
+        for obj in src_bucket._iter_objects(prefix=prefix):
+            if (_is_checkpointed(obj, done.get(obj.name)) or
+                    _is_replicated(obj, existing.get(obj.name))):
+                with lock:
+                    summary['skipped'] += 1
+                continue
+            slots.acquire()
+            reserved = budget.acquire(obj.size or 0)
+            pool.apply_async(copy, (obj, reserved))
+    finally:
+        pool.close()
+        pool.join()
+        if checkpoint_file:
+            checkpoint_file.close()
+    return summary
@@ -23,6 +23,8 @@ openstack_reqs = ['python-novaclient==7.0.0',
                   'python-neutronclient>=6.0.0,<=6.1.0',
                   'python-keystoneclient>=3.8.0,<=3.10.0']
 aws_reqs = ['boto>=2.38.0,<=2.46.1']
+# Needed only for zstd compressed objects
+zstd_reqs = ['zstandard>=0.8.0']
 full_reqs = base_reqs + aws_reqs + openstack_reqs
 # httpretty is required with/for moto 1.0.0 or AWS tests fail
 dev_reqs = (['tox>=2.1.1', 'moto<1.0.0', 'sphinx>=1.3.1', 'flake8>=3.3.0',
@@ -40,6 +42,7 @@ setup(name='cloudbridge',
           ':python_version=="2.7"': ['py2-ipaddress'],
           ':python_version=="3"': ['py2-ipaddress'],
           'full': full_reqs,
+          'zstd': zstd_reqs,
           'dev': dev_reqs
       },
       packages=find_packages(),
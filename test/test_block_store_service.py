@@ -1,3 +1,4 @@
+import copy
 import time
 import uuid
 
@@ -8,6 +9,7 @@ from test.helpers import standard_interface_tests as sit
 from cloudbridge.cloud.factory import ProviderList
 from cloudbridge.cloud.interfaces import SnapshotState
 from cloudbridge.cloud.interfaces import VolumeState
+from cloudbridge.cloud.interfaces.exceptions import InvalidNameException
 from cloudbridge.cloud.interfaces.provider import TestMockHelperMixin
 from cloudbridge.cloud.interfaces.resources import AttachmentInfo
 from cloudbridge.cloud.interfaces.resources import Snapshot
@@ -38,6 +40,64 @@ class CloudBlockStoreServiceTestCase(ProviderTestBase):
         sit.check_crud(self, self.provider.block_store.volumes, Volume,
                        "cb_createvol", create_vol, cleanup_vol)
 
+    @helpers.skipIfNoService(['block_store.volumes'])
+    def test_tag_many_volumes(self):
+        name = "cb_tagvols-{0}".format(helpers.get_uuid())
+        zone = helpers.get_provider_test_data(self.provider, "placement")
+        volumes = []
+
+        def cleanup_vols():
+            for vol in volumes:
+                vol.delete()
+
+        with helpers.cleanup_action(cleanup_vols):
+            for _ in range(3):
+                volumes.append(self.provider.block_store.volumes.create(
+                    name, 1, zone))
+            for vol in volumes:
+                vol.wait_till_ready()
+
+            new_name = name + "-tagged"
+            results = self.provider.tag_many(
+                volumes, {'Name': new_name, 'cb-purpose': 'tag-many'})
+            self.assertListEqual(results, [True] * 3)
+            for vol in volumes:
+                self.assertEqual(vol.name, new_name)
+                fetched = self.provider.block_store.volumes.get(vol.id)
+                self.assertEqual(fetched.name, new_name)
+                # Other tags are EC2 tags, or cinder volume metadata
+                # pylint:disable=protected-access
+                if self.provider.PROVIDER_ID == ProviderList.AWS:
+                    tags = fetched._volume.tags
+                else:
+                    tags = fetched._volume.metadata
+                self.assertEqual(tags.get('cb-purpose'), 'tag-many')
+
+            # A volume that does not exist fails on its own, without
+            # failing the others tagged with it
+            missing = copy.copy(volumes[0])
+            # pylint:disable=protected-access
+            missing._volume = copy.copy(volumes[0]._volume)
+            if self.provider.PROVIDER_ID == ProviderList.AWS:
+                missing._volume.id = "vol-00000000000000000"
+            else:
+                missing._volume.id = str(uuid.uuid4())
+            results = self.provider.tag_many(
+                [volumes[0], missing, volumes[1]], {'Name': name})
+            self.assertIs(results[0], True)
+            self.assertIsInstance(results[1], Exception)
+            self.assertIs(results[2], True)
+            self.assertEqual(
+                self.provider.block_store.volumes.get(volumes[1].id).name,
+                name)
+
+            # An invalid name is reported for each volume, not raised
+            results = self.provider.tag_many(volumes[:2], {'Name': "Bad Name"})
+            self.assertEqual(len(results), 2)
+            for result in results:
+                self.assertIsInstance(result, InvalidNameException)
+            self.assertEqual(volumes[0].name, name)
+
     @helpers.skipIfNoService(['block_store.volumes'])
     def test_attach_detach_volume(self):
         """
@@ -1,9 +1,14 @@
 import itertools
+import threading
 
 from test.helpers import ProviderTestBase
 
+from boto.exception import EC2ResponseError
+
+from cloudbridge.cloud.base import helpers as cbhelpers
 from cloudbridge.cloud.base.resources import ClientPagedResultList
 from cloudbridge.cloud.base.resources import ServerPagedResultList
+from cloudbridge.cloud.providers.aws import helpers as awshelpers
 
 
 class DummyResult(object):
@@ -73,3 +78,63 @@ class CloudHelpersTestCase(ProviderTestBase):
                         " lists should return True for server paging.")
         with self.assertRaises(NotImplementedError):
             results.data
+
+    def test_parallel_map_reads_items_lazily(self):
+        lock = threading.Lock()
+        counts = {'read': 0, 'done': 0, 'ahead': 0}
+
+        def items():
+            for i in range(200):
+                with lock:
+                    counts['read'] += 1
+                    counts['ahead'] = max(counts['ahead'],
+                                          counts['read'] - counts['done'])
+                yield i
+
+        def double(i):
+            if i == 5:
+                raise IOError("failed")
+            with lock:
+                counts['done'] += 1
+            return i * 2
+
+        results = cbhelpers.parallel_map(double, items(), max_workers=4)
+        self.assertEqual(len(results), 200)
+        self.assertIsInstance(results[5], IOError)
+        self.assertListEqual(results[:5], [0, 2, 4, 6, 8])
+        # Only a bounded window of items is read ahead of the results
+        self.assertLessEqual(counts['ahead'],
+                             4 * cbhelpers.INFLIGHT_PER_WORKER + 2)
+
+    def test_batch_request_isolates_failures(self):
+        requests = []
+
+        def request(batch):
+            requests.append(list(batch))
+            if 'i-invalid' in batch:
+                raise EC2ResponseError(400, 'Bad Request')
+            if batch == ['i-broken']:
+                raise IOError("connection reset")
+
+        ids = ['i-1', 'i-invalid', 'i-broken', 'i-2', 'i-3']
+        results = awshelpers.batch_request(request, ids, 3)
+        self.assertEqual(len(results), len(ids))
+        self.assertListEqual([results[0], results[3], results[4]],
+                             [True] * 3)
+        self.assertIsInstance(results[1], EC2ResponseError)
+        self.assertIsInstance(results[2], IOError)
+        # Only the batch with an invalid ID is retried one ID at a time
+        self.assertIn(['i-1'], requests)
+        self.assertNotIn(['i-2'], requests)
+
+    def test_presigner_caches_keys_per_region(self):
+        presigner = awshelpers.S3Presigner('access', 'secret')
+        # pylint:disable=protected-access
+        key = presigner._signing_key('20180101', 'us-east-1')
+        presigner._signing_key('20180101', 'eu-west-1')
+        # Keys for other regions on the same day are kept
+        self.assertIs(presigner._signing_key('20180101', 'us-east-1'), key)
+        # Those of past days are dropped
+        presigner._signing_key('20180102', 'us-east-1')
+        self.assertListEqual(sorted(presigner._signing_keys),
+                             [('20180102', 'us-east-1')])
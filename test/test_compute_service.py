@@ -1,13 +1,16 @@
 import ipaddress
+import time
 
 from test import helpers
 from test.helpers import ProviderTestBase
 from test.helpers import standard_interface_tests as sit
 
+from cloudbridge.cloud import InstancePool
 from cloudbridge.cloud.factory import ProviderList
 from cloudbridge.cloud.interfaces import InstanceState
 from cloudbridge.cloud.interfaces import InvalidConfigurationException
 from cloudbridge.cloud.interfaces import TestMockHelperMixin
+from cloudbridge.cloud.interfaces.exceptions import InvalidNameException
 from cloudbridge.cloud.interfaces.exceptions import WaitStateException
 from cloudbridge.cloud.interfaces.resources import Instance
 from cloudbridge.cloud.interfaces.resources import InstanceType
@@ -52,6 +55,312 @@ class CloudComputeServiceTestCase(ProviderTestBase):
                            "cb_instcrud", create_inst, cleanup_inst,
                            custom_check_delete=check_deleted)
 
+    @helpers.skipIfNoService(['compute.instances', 'networking.networks'])
+    def test_create_many_instances(self):
+        name = "cb_instmany-{0}".format(helpers.get_uuid())
+        net = None
+        instances = []
+
+        def cleanup_instances():
+            results = self.provider.compute.instances.terminate_many(
+                instances)
+            self.assertListEqual(results, [True] * len(instances))
+            for inst in instances:
+                inst.wait_for([InstanceState.TERMINATED,
+                               InstanceState.UNKNOWN])
+
+        with helpers.cleanup_action(lambda: helpers.cleanup_test_resources(
+                                               network=net)):
+            net, subnet = helpers.create_test_network(self.provider, name)
+            with helpers.cleanup_action(cleanup_instances):
+                instances.extend(self.provider.compute.instances.create_many(
+                    3, name, helpers.get_provider_test_data(self.provider,
+                                                            'image'),
+                    helpers.get_provider_test_data(self.provider,
+                                                   'instance_type'),
+                    subnet=subnet))
+                self.assertListEqual(
+                    [inst.name for inst in instances],
+                    ["{0}-{1}".format(name, i) for i in range(1, 4)])
+                self.assertEqual(len(set(inst.id for inst in instances)), 3)
+                # The provider reports all of them once create_many returns
+                for inst in instances:
+                    self.assertIn(inst.state, [InstanceState.PENDING,
+                                               InstanceState.RUNNING])
+                self.provider.compute.instances.wait_till_ready(instances)
+                for inst in instances:
+                    self.assertEqual(inst.state, InstanceState.RUNNING)
+
+                self.assertListEqual(
+                    self.provider.compute.instances.reboot_many(
+                        [inst.id for inst in instances]), [True] * 3)
+
+    @helpers.skipIfNoService(['compute.instances', 'networking.networks'])
+    def test_create_spread_instances(self):
+        name = "cb_instspread-{0}".format(helpers.get_uuid())
+        net = None
+        instances = []
+
+        def cleanup_instances():
+            self.provider.compute.instances.terminate_many(instances)
+            for inst in instances:
+                inst.wait_for([InstanceState.TERMINATED,
+                               InstanceState.UNKNOWN])
+
+        with helpers.cleanup_action(lambda: helpers.cleanup_test_resources(
+                                               network=net)):
+            net, subnet = helpers.create_test_network(self.provider, name)
+            with helpers.cleanup_action(cleanup_instances):
+                # The same subnet twice, to exercise the distribution
+                instances.extend(self.provider.compute.instances.create_spread(
+                    3, name, helpers.get_provider_test_data(self.provider,
+                                                            'image'),
+                    helpers.get_provider_test_data(self.provider,
+                                                   'instance_type'),
+                    [subnet, subnet.id], weights=[2, 1]))
+                self.assertListEqual(
+                    [inst.name for inst in instances],
+                    ["{0}-1-1".format(name), "{0}-1-2".format(name),
+                     "{0}-2-1".format(name)])
+                self.provider.compute.instances.wait_till_ready(instances)
+
+    @helpers.skipIfNoService(['compute.instances', 'networking.networks'])
+    def test_create_spread_instances_retry(self):
+        name = "cb_instspreadretry-{0}".format(helpers.get_uuid())
+        net = None
+        instances = []
+        service = self.provider.compute.instances
+        launch_many = service.launch_many
+        launches = []
+        # The name prefixes of the groups to fail, and how many more times
+        failures = {}
+
+        class OutOfCapacity(Exception):
+            pass
+
+        def _launch_many(count, name_prefix, plan):
+            launches.append((name_prefix, plan))
+            if failures.get(name_prefix):
+                failures[name_prefix] -= 1
+                raise OutOfCapacity(name_prefix)
+            launched = launch_many(count, name_prefix, plan)
+            instances.extend(launched)
+            return launched
+
+        def create_spread(prefix):
+            del launches[:]
+            return service.create_spread(
+                2, prefix, helpers.get_provider_test_data(self.provider,
+                                                          'image'),
+                helpers.get_provider_test_data(self.provider,
+                                               'instance_type'),
+                [subnet, subnet.id])
+
+        def cleanup_instances():
+            service.terminate_many(instances)
+            for inst in instances:
+                inst.wait_for([InstanceState.TERMINATED,
+                               InstanceState.UNKNOWN])
+
+        with helpers.cleanup_action(lambda: helpers.cleanup_test_resources(
+                                               network=net)):
+            net, subnet = helpers.create_test_network(self.provider, name)
+            # pylint:disable=protected-access
+            service.launch_many = _launch_many
+            service._is_capacity_error = lambda e: isinstance(
+                e, OutOfCapacity)
+            try:
+                with helpers.cleanup_action(cleanup_instances):
+                    # The first group lands in the second subnet
+                    failures["{0}-1".format(name)] = 1
+                    spread = create_spread(name)
+                    self.assertListEqual(
+                        [inst.name for inst in spread],
+                        ["{0}-1-1".format(name), "{0}-2-1".format(name)])
+                    plans = dict(launches[:2])
+                    self.assertEqual(
+                        launches[2], ("{0}-1".format(name),
+                                      plans["{0}-2".format(name)]))
+                    service.wait_till_ready(spread)
+
+                    # With no candidate subnet left, the second group is
+                    # terminated
+                    failures["{0}-1".format(name)] = 2
+                    with self.assertRaises(OutOfCapacity):
+                        create_spread(name)
+                    self.assertEqual(len(launches), 3)
+                    for inst in instances[2:]:
+                        inst.wait_for([InstanceState.TERMINATED,
+                                       InstanceState.UNKNOWN])
+                        self.assertIn(inst.state,
+                                      [InstanceState.TERMINATED,
+                                       InstanceState.UNKNOWN])
+
+                    # Other errors are not retried in another subnet
+                    with self.assertRaises(InvalidNameException):
+                        create_spread("Invalid Name!")
+                    self.assertEqual(len(launches), 2)
+            finally:
+                del service.launch_many
+                del service._is_capacity_error
+
+        if self.provider.PROVIDER_ID == ProviderList.OPENSTACK:
+            # Only a subnet out of addresses is retried on OpenStack: nova
+            # reports a lack of hosts after accepting the servers
+            from neutronclient.common.exceptions \
+                import IpAddressGenerationFailureClient
+            self.assertTrue(service._is_capacity_error(
+                IpAddressGenerationFailureClient()))
+            self.assertFalse(service._is_capacity_error(
+                Exception("No valid host was found.")))
+
+    @helpers.skipIfNoService(['compute.instances', 'networking.networks'])
+    def test_create_instance_without_waiting(self):
+        name = "cb_instnowait-{0}".format(helpers.get_uuid())
+        net = None
+        test_inst = None
+        with helpers.cleanup_action(lambda: helpers.cleanup_test_resources(
+                test_inst, net)):
+            net, subnet = helpers.create_test_network(self.provider, name)
+            test_inst = self.provider.compute.instances.create(
+                name, helpers.get_provider_test_data(self.provider, 'image'),
+                helpers.get_provider_test_data(self.provider,
+                                               'instance_type'),
+                subnet=subnet, wait=False)
+            # The instance is named at launch
+            self.assertEqual(test_inst.name, name)
+            self.provider.compute.instances.wait_till_ready([test_inst])
+            self.assertEqual(test_inst.state, InstanceState.RUNNING)
+            self.assertEqual(
+                self.provider.compute.instances.get(test_inst.id).name, name)
+
+    @helpers.skipIfNoService(['compute.instances', 'networking.networks'])
+    def test_watch_instances(self):
+        name = "cb_instwatch-{0}".format(helpers.get_uuid())
+        net = None
+        test_inst = None
+        with helpers.cleanup_action(lambda: helpers.cleanup_test_resources(
+                test_inst, net)):
+            net, subnet = helpers.create_test_network(self.provider, name)
+            test_inst = self.provider.compute.instances.create(
+                name, helpers.get_provider_test_data(self.provider, 'image'),
+                helpers.get_provider_test_data(self.provider,
+                                               'instance_type'),
+                subnet=subnet, wait=False)
+            states = []
+            for inst, _, new_state in self.provider.compute.instances.watch(
+                    filter=lambda inst: inst.id == test_inst.id,
+                    timeout=self.provider.config.default_wait_timeout,
+                    initial=True):
+                states.append(new_state)
+                if new_state == InstanceState.RUNNING:
+                    break
+            self.assertEqual(states[-1], InstanceState.RUNNING)
+            self.assertEqual(inst.id, test_inst.id)
+
+    @helpers.skipIfNoService(['compute.instances', 'networking.networks'])
+    def test_launch_from_compiled_plan(self):
+        name = "cb_instplan-{0}".format(helpers.get_uuid())
+        net = None
+        instances = []
+
+        def cleanup_instances():
+            self.provider.compute.instances.terminate_many(instances)
+            for inst in instances:
+                inst.wait_for([InstanceState.TERMINATED,
+                               InstanceState.UNKNOWN])
+
+        with helpers.cleanup_action(lambda: helpers.cleanup_test_resources(
+                                               network=net)):
+            net, subnet = helpers.create_test_network(self.provider, name)
+            lc = self.provider.compute.instances.create_launch_config()
+            # Each launch of the plan gets its own new blank volume
+            lc.add_volume_device(size=1, delete_on_terminate=True)
+            plan = lc.compile(
+                helpers.get_provider_test_data(self.provider, 'image'),
+                helpers.get_provider_test_data(self.provider,
+                                               'instance_type'),
+                subnet)
+            self.assertEqual(plan.subnet_id, subnet.id)
+            with self.assertRaises(AttributeError):
+                plan.subnet_id = None
+            with helpers.cleanup_action(cleanup_instances):
+                instances.append(self.provider.compute.instances.launch(
+                    name, plan, wait=False))
+                instances.extend(self.provider.compute.instances.launch_many(
+                    2, name, plan))
+                self.assertListEqual(
+                    [inst.name for inst in instances],
+                    [name, "{0}-1".format(name), "{0}-2".format(name)])
+                self.provider.compute.instances.wait_till_ready(instances)
+
+            if self.provider.PROVIDER_ID == ProviderList.OPENSTACK:
+                # The port created for a server that nova refuses is deleted
+                service = self.provider.compute.instances
+                servers = self.provider.nova.servers
+
+                class LaunchFailed(Exception):
+                    pass
+
+                def _create(*args, **kwargs):
+                    raise LaunchFailed()
+
+                servers.create = _create
+                try:
+                    with self.assertRaises(LaunchFailed):
+                        service.launch(name + "-failed", plan)
+                finally:
+                    del servers.create
+                self.assertListEqual(self.provider.neutron.list_ports(
+                    name=service.PORT_NAME_PREFIX + name + "-failed")[
+                        'ports'], [])
+
+    @helpers.skipIfNoService(['compute.instances', 'networking.networks'])
+    def test_instance_pool(self):
+        name = "cb_instpool-{0}".format(helpers.get_uuid())
+        net = None
+        test_inst = None
+        with helpers.cleanup_action(lambda: helpers.cleanup_test_resources(
+                test_inst, net)):
+            net, subnet = helpers.create_test_network(self.provider, name)
+            lc = self.provider.compute.instances.create_launch_config()
+            plan = lc.compile(
+                helpers.get_provider_test_data(self.provider, 'image'),
+                helpers.get_provider_test_data(self.provider,
+                                               'instance_type'),
+                subnet)
+            with InstancePool(self.provider, name_prefix=name,
+                              interval=1) as pool:
+                pool.add_profile('test', plan, size=1)
+                end_time = time.time() + \
+                    self.provider.config.default_wait_timeout
+                while not pool.available('test') and time.time() < end_time:
+                    time.sleep(self.provider.config.default_wait_interval)
+                self.assertEqual(pool.available('test'), 1)
+                test_inst = pool.acquire('test', name, tags={'Owner': name})
+                self.assertEqual(test_inst.name, name)
+                self.assertEqual(test_inst.state, InstanceState.RUNNING)
+
+                # An instance that cannot be handed out is terminated rather
+                # than leaked, and the pool is refilled
+                end_time = time.time() + \
+                    self.provider.config.default_wait_timeout
+                while not pool.available('test') and time.time() < end_time:
+                    time.sleep(self.provider.config.default_wait_interval)
+                # pylint:disable=protected-access
+                pooled = pool._get_profile('test').ready[0]
+                with self.assertRaises(InvalidNameException):
+                    pool.acquire('test', "Invalid Name!")
+                failed = self.provider.compute.instances.get(pooled.id)
+                if failed:
+                    failed.wait_for([InstanceState.TERMINATED,
+                                     InstanceState.UNKNOWN])
+                end_time = time.time() + \
+                    self.provider.config.default_wait_timeout
+                while not pool.available('test') and time.time() < end_time:
+                    time.sleep(self.provider.config.default_wait_interval)
+                self.assertEqual(pool.available('test'), 1)
+
     def _is_valid_ip(self, address):
         try:
             ipaddress.ip_address(address)
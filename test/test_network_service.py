@@ -1,8 +1,10 @@
 import test.helpers as helpers
+import time
 
 from test.helpers import ProviderTestBase
 from test.helpers import standard_interface_tests as sit
 
+from cloudbridge.cloud import FloatingIPPool
 from cloudbridge.cloud.interfaces.resources import Network
 from cloudbridge.cloud.interfaces.resources import RouterState
 from cloudbridge.cloud.interfaces.resources import Subnet
@@ -123,6 +125,23 @@ class CloudNetworkServiceTestCase(ProviderTestBase):
             "Floating IP {0} should have been deleted but still exists."
             .format(ip_id))
 
+    def test_floating_ip_pool(self):
+        with FloatingIPPool(self.provider, size=2, interval=1) as pool:
+            end_time = time.time() + self.provider.config.default_wait_timeout
+            while pool.available() < 2 and time.time() < end_time:
+                time.sleep(self.provider.config.default_wait_interval)
+            self.assertEqual(pool.available(), 2)
+            ip = pool.acquire()
+            with helpers.cleanup_action(lambda: ip.delete()):
+                self.assertFalse(ip.in_use())
+                ipl = self.provider.networking.networks.floating_ips
+                self.assertIn(ip.id, [a.id for a in ipl])
+            pooled = pool.close()
+        ipl = self.provider.networking.networks.floating_ips
+        self.assertFalse(set(a.id for a in pooled) &
+                         set(a.id for a in ipl),
+                         "Pooled floating IPs should have been deleted")
+
     @helpers.skipIfNoService(['networking.routers'])
     def test_crud_router(self):
 
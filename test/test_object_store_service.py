@@ -1,6 +1,9 @@
 import filecmp
 import os
+import shutil
 import tempfile
+import threading
+import time
 import uuid
 
 from datetime import datetime
@@ -10,9 +13,16 @@ from test.helpers import ProviderTestBase
 from test.helpers import standard_interface_tests as sit
 from unittest import skip
 
+from cloudbridge.cloud import replicate
+from cloudbridge.cloud.base.cache import ObjectCache
+from cloudbridge.cloud.base.resources import BaseBucketObject
+from cloudbridge.cloud.base.resources import _ShardedListing
+from cloudbridge.cloud.base.transfer import TransferPriority
+from cloudbridge.cloud.factory import ProviderList
 from cloudbridge.cloud.interfaces.exceptions import InvalidNameException
 from cloudbridge.cloud.interfaces.resources import Bucket
 from cloudbridge.cloud.interfaces.resources import BucketObject
+from cloudbridge.cloud.interfaces.resources import ContentEncoding
 
 import requests
 
@@ -130,6 +140,144 @@ class CloudObjectStoreServiceTestCase(ProviderTestBase):
 
             sit.check_delete(self, test_bucket, obj)
 
+    @helpers.skipIfNoService(['object_store'])
+    def test_get_bucket_object_by_exact_name(self):
+        name = "cbtestbucketobjs-{0}".format(uuid.uuid4())
+        test_bucket = self.provider.object_store.create(name)
+
+        with helpers.cleanup_action(
+                lambda: test_bucket.delete(delete_contents=True)):
+            # the first name is a prefix of the second
+            for obj_name in ["hello", "hello_world.txt"]:
+                test_bucket.create_object(obj_name).upload(obj_name)
+
+            obj = test_bucket.get("hello_world.txt")
+            self.assertEqual(obj.name, "hello_world.txt")
+            self.assertEqual(obj.size, len("hello_world.txt"))
+            self.assertTrue(
+                datetime.strptime(obj.last_modified[:23],
+                                  "%Y-%m-%dT%H:%M:%S.%f"),
+                "Object's last_modified field format {0} not matching."
+                .format(obj.last_modified))
+            self.assertEqual(test_bucket.get("hello").name, "hello")
+            self.assertIsNone(test_bucket.get("hello_"))
+
+            self.assertTrue(test_bucket.exists("hello"))
+            self.assertFalse(test_bucket.exists("hello_"))
+
+    @helpers.skipIfNoService(['object_store'])
+    def test_list_bucket_prefixes(self):
+        name = "cbtestbucketobjs-{0}".format(uuid.uuid4())
+        test_bucket = self.provider.object_store.create(name)
+
+        with helpers.cleanup_action(
+                lambda: test_bucket.delete(delete_contents=True)):
+            # "a/\U0001F600.txt" sorts after any marker made of "a/" and
+            # characters of the basic multilingual plane, and "a0" right
+            # after everything under "a/"
+            for obj_name in ["a/1.txt", "a/b/2.txt", "a/b/3.txt",
+                             u"a/\U0001F600.txt", "a0", "c.txt"]:
+                test_bucket.create_object(obj_name).upload(obj_name)
+
+            def entry_names(prefix):
+                # page through the results one entry at a time
+                names = []
+                entries = test_bucket.list_prefixes(prefix, limit=1)
+                names.extend(getattr(e, 'name', e) for e in entries)
+                while entries.is_truncated:
+                    entries = test_bucket.list_prefixes(
+                        prefix, limit=1, marker=entries.marker)
+                    names.extend(getattr(e, 'name', e) for e in entries)
+                return names
+
+            self.assertListEqual(entry_names(None), ["a/", "a0", "c.txt"])
+            self.assertListEqual(entry_names("a/"),
+                                 ["a/1.txt", "a/b/", u"a/\U0001F600.txt"])
+            self.assertListEqual(entry_names("a/b/"),
+                                 ["a/b/2.txt", "a/b/3.txt"])
+            children = test_bucket.list_prefixes("a/")
+            self.assertTrue(isinstance(children[0], BucketObject))
+
+    @helpers.skipIfNoService(['object_store'])
+    def test_list_bucket_objects_lightweight(self):
+        name = "cbtestbucketobjs-{0}".format(uuid.uuid4())
+        test_bucket = self.provider.object_store.create(name)
+
+        with helpers.cleanup_action(
+                lambda: test_bucket.delete(delete_contents=True)):
+            for obj_name in ["light_1.txt", "light_2.txt", "light_3.txt"]:
+                test_bucket.create_object(obj_name).upload(obj_name)
+
+            records = test_bucket.list(limit=2, lightweight=True)
+            self.assertTrue(records.is_truncated)
+            records.extend(test_bucket.list(marker=records.marker,
+                                            lightweight=True))
+            objs = test_bucket.list()
+            self.assertListEqual([r.name for r in records],
+                                 [o.name for o in objs])
+            for record, obj in zip(records, objs):
+                self.assertNotIsInstance(record, BucketObject)
+                self.assertEqual(record.size, obj.size)
+                self.assertEqual(record.etag, obj.etag)
+                self.assertIsInstance(record.last_modified, float)
+
+                full = test_bucket.from_record(record)
+                self.assertIsInstance(full, BucketObject)
+                self.assertEqual(full.name, obj.name)
+                self.assertEqual(full.last_modified[:23],
+                                 obj.last_modified[:23])
+                target_stream = BytesIO()
+                full.save_content(target_stream)
+                self.assertEqual(target_stream.getvalue(),
+                                 obj.name.encode('utf-8'))
+
+    @helpers.skipIfNoService(['object_store'])
+    def test_iter_all_bucket_objects(self):
+        name = "cbtestbucketobjs-{0}".format(uuid.uuid4())
+        test_bucket = self.provider.object_store.create(name)
+
+        with helpers.cleanup_action(
+                lambda: test_bucket.delete(delete_contents=True)):
+            obj_names = sorted("shard/{0:02d}.txt".format(i)
+                               for i in range(12)) + ["zz.txt"]
+            for obj_name in obj_names:
+                test_bucket.create_object(obj_name).upload(obj_name)
+            # Use small pages so that the key ranges get split
+            test_bucket.LIST_PAGE_SIZE = 2
+
+            self.assertListEqual(
+                [obj.name for obj in
+                 test_bucket.iter_all(parallelism=4, ordered=True)],
+                obj_names)
+            self.assertListEqual(
+                sorted(obj.name for obj in
+                       test_bucket.iter_all(parallelism=4)),
+                obj_names)
+            self.assertListEqual(
+                [obj.name for obj in test_bucket.iter_all(
+                    prefix="shard/", parallelism=4, ordered=True)],
+                obj_names[:-1])
+
+            # In order, the shards after the first one stop listing too
+            # once enough results are held for a slow consumer
+            listing = _ShardedListing(test_bucket, None, 4, True,
+                                      test_bucket.LIST_PAGE_SIZE)
+            listing.MAX_BUFFERED = 3
+            names = []
+            buffered = []
+            for obj in listing:
+                names.append(obj.name)
+                # Give the workers time to list ahead
+                time.sleep(0.2)
+                # pylint:disable=protected-access
+                buffered.append(listing._buffered)
+            self.assertListEqual(names, obj_names)
+            # One page over the bound for the first shard, and one for the
+            # others
+            self.assertLessEqual(
+                max(buffered),
+                listing.MAX_BUFFERED + 2 * test_bucket.LIST_PAGE_SIZE)
+
     @helpers.skipIfNoService(['object_store'])
     def test_upload_download_bucket_content(self):
         name = "cbtestbucketobjs-{0}".format(uuid.uuid4())
@@ -153,7 +301,346 @@ class CloudObjectStoreServiceTestCase(ProviderTestBase):
                     target_stream2.write(data)
                 self.assertEqual(target_stream2.getvalue(), content)
 
-    @skip("Skip until OpenStack implementation is provided")
+    @helpers.skipIfNoService(['object_store'])
+    def test_upload_download_compressed_bucket_content(self):
+        name = "cbtestbucketobjs-{0}".format(uuid.uuid4())
+        test_bucket = self.provider.object_store.create(name)
+        content = "".join("chr1\t{0}\t.\tA\tT\n".format(i)
+                          for i in range(5000)).encode('utf-8')
+
+        with helpers.cleanup_action(
+                lambda: test_bucket.delete(delete_contents=True)):
+            obj = test_bucket.create_object("hello_compressed.vcf")
+            obj.upload(content, compression=ContentEncoding.GZIP)
+            obj = test_bucket.get("hello_compressed.vcf")
+            self.assertLess(obj.size, len(content))
+            self.assertEqual(b"".join(obj.iter_content()), content)
+
+            with tempfile.NamedTemporaryFile() as tmp:
+                tmp.write(content)
+                tmp.flush()
+                obj.upload_from_file(tmp.name,
+                                     compression=ContentEncoding.GZIP)
+            target_stream = BytesIO()
+            test_bucket.get("hello_compressed.vcf").save_content(
+                target_stream)
+            self.assertEqual(target_stream.getvalue(), content)
+
+            # Uploading without compression replaces the recorded encoding
+            obj.upload(content)
+            self.assertEqual(
+                b"".join(test_bucket.get(
+                    "hello_compressed.vcf").iter_content()), content)
+
+    @helpers.skipIfNoService(['object_store'])
+    def test_resume_interrupted_upload(self):
+        name = "cbtestbucketobjs-{0}".format(uuid.uuid4())
+        test_bucket = self.provider.object_store.create(name)
+        part_size = 5 * 1024 ** 2
+        tmp_dir = tempfile.mkdtemp()
+        path = os.path.join(tmp_dir, "resumable.bin")
+        checkpoint = os.path.join(tmp_dir, "resumable.ckpt")
+        original = os.urandom(2 * part_size + 1024)
+
+        class UploadInterrupted(Exception):
+            pass
+
+        def cleanup():
+            test_bucket.delete(delete_contents=True)
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        with helpers.cleanup_action(cleanup):
+            obj = test_bucket.create_object("resumable.bin")
+            if self.provider.PROVIDER_ID == ProviderList.AWS:
+                obj.MULTIPART_UPLOAD_THRESHOLD = part_size
+                obj.MULTIPART_UPLOAD_PART_SIZE = part_size
+            else:
+                obj.RESUMABLE_SEGMENT_SIZE = part_size
+            with open(path, 'wb') as f:
+                f.write(original)
+            # A fixed mtime, so that the content can be changed below
+            # without invalidating the checkpoint
+            os.utime(path, (1500000000, 1500000000))
+
+            # Only the part whose progress is reported first may complete
+            first = {}
+
+            def interrupt(transferred, total):
+                current = threading.current_thread()
+                if first.setdefault('thread', current) is not current:
+                    raise UploadInterrupted()
+
+            with self.provider.transfers.settings(callback=interrupt):
+                try:
+                    self.assertFalse(
+                        obj.upload_from_file(path, checkpoint=checkpoint))
+                except UploadInterrupted:
+                    pass
+            self.assertTrue(os.path.exists(checkpoint))
+
+            # Parts already uploaded are not sent again when the upload is
+            # resumed, so they keep the original content
+            changed = os.urandom(len(original))
+            with open(path, 'wb') as f:
+                f.write(changed)
+            os.utime(path, (1500000000, 1500000000))
+            obj.upload_from_file(path, checkpoint=checkpoint)
+            self.assertFalse(os.path.exists(checkpoint))
+
+            target_stream = BytesIO()
+            test_bucket.get("resumable.bin").save_content(target_stream)
+            content = target_stream.getvalue()
+            self.assertEqual(len(content), len(original))
+            kept = 0
+            for start in range(0, len(original), part_size):
+                part = content[start:start + part_size]
+                if part == original[start:start + part_size]:
+                    kept += 1
+                else:
+                    self.assertEqual(part, changed[start:start + part_size])
+            self.assertGreaterEqual(kept, 1)
+            self.assertLess(kept, 3)
+
+    @helpers.skipIfNoService(['object_store'])
+    def test_read_bucket_object_through_cache(self):
+        name = "cbtestbucketobjs-{0}".format(uuid.uuid4())
+        test_bucket = self.provider.object_store.create(name)
+        cache_dir = tempfile.mkdtemp()
+
+        def cleanup():
+            # pylint:disable=protected-access
+            self.provider._object_cache = None
+            test_bucket.delete(delete_contents=True)
+            for entry in os.listdir(cache_dir):
+                os.remove(os.path.join(cache_dir, entry))
+            os.rmdir(cache_dir)
+
+        with helpers.cleanup_action(cleanup):
+            # pylint:disable=protected-access
+            self.provider._object_cache = ObjectCache(cache_dir, 1024, 0)
+            obj = test_bucket.create_object("hello_cached.txt")
+            obj.upload(b"first version")
+            for _ in range(2):
+                target_stream = BytesIO()
+                obj.save_content(target_stream)
+                self.assertEqual(target_stream.getvalue(), b"first version")
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+            # A changed object must not be served from the cache
+            obj.upload(b"second version")
+            self.assertEqual(b"".join(obj.iter_content()), b"second version")
+
+            # An object overwritten between the HEAD and the GET is cached
+            # under the etag of the content downloaded
+            key = (self.provider.PROVIDER_ID, test_bucket.name, obj.name)
+            stale_etag = obj._remote_etag()
+            obj.upload(b"third version")
+            current_etag = obj._remote_etag()
+            obj._remote_etag = lambda: stale_etag
+            self.assertEqual(b"".join(obj.iter_content()), b"third version")
+            cache = self.provider._object_cache
+            self.assertFalse(os.path.exists(os.path.join(
+                cache_dir, cache._entry_name(key, stale_etag))))
+            self.assertTrue(os.path.exists(os.path.join(
+                cache_dir, cache._entry_name(key, current_etag))))
+
+            # Only the etags of the objects still cached are remembered
+            for i in range(3):
+                large = test_bucket.create_object("large_{0}.bin".format(i))
+                large.upload(os.urandom(600))
+                b"".join(large.iter_content())
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            self.assertEqual(len(cache._validated), 1)
+
+    @helpers.skipIfNoService(['object_store'])
+    def test_managed_bucket_object_transfers(self):
+        name = "cbtestbucketobjs-{0}".format(uuid.uuid4())
+        test_bucket = self.provider.object_store.create(name)
+        content = b"managed transfer content" * 1024
+        progress = []
+
+        with helpers.cleanup_action(
+                lambda: test_bucket.delete(delete_contents=True)):
+            obj = test_bucket.create_object("hello_managed.txt")
+            with self.provider.transfers.settings(
+                    priority=TransferPriority.BACKGROUND,
+                    max_rate=1024 ** 2,
+                    callback=lambda done, total: progress.append(
+                        (done, total))):
+                obj.upload(content)
+                self.assertEqual(progress[-1], (len(content), len(content)))
+
+                del progress[:]
+                obj = test_bucket.get("hello_managed.txt")
+                self.assertEqual(b"".join(obj.iter_content()), content)
+                self.assertEqual(progress[-1], (len(content), len(content)))
+
+    @helpers.skipIfNoService(['object_store'])
+    def test_upload_many_bucket_objects(self):
+        name = "cbtestbucketobjs-{0}".format(uuid.uuid4())
+        test_bucket = self.provider.object_store.create(name)
+
+        with helpers.cleanup_action(
+                lambda: test_bucket.delete(delete_contents=True)):
+            # creating an object does not store it until it is uploaded
+            test_bucket.create_object("not_uploaded.txt")
+            self.assertFalse(test_bucket.exists("not_uploaded.txt"))
+
+            items = [("many/{0}.txt".format(i), "content {0}".format(i))
+                     for i in range(10)]
+            items.append(("many/stream.txt", BytesIO(b"streamed")))
+            results = test_bucket.upload_many(iter(items), max_workers=4)
+            self.assertListEqual([obj.name for obj in results],
+                                 [obj_name for obj_name, _ in items])
+            self.assertEqual(len(test_bucket.list(prefix="many/")), 11)
+            target_stream = BytesIO()
+            test_bucket.get("many/stream.txt").save_content(target_stream)
+            self.assertEqual(target_stream.getvalue(), b"streamed")
+
+    @helpers.skipIfNoService(['object_store'])
+    def test_delete_objects_and_bucket_contents(self):
+        name = "cbtestbucketobjs-{0}".format(uuid.uuid4())
+        test_bucket = self.provider.object_store.create(name)
+
+        with helpers.cleanup_action(
+                lambda: test_bucket.delete(delete_contents=True)):
+            obj_names = ["bulk_delete_{0}.txt".format(i) for i in range(3)]
+            for obj_name in obj_names:
+                test_bucket.create_object(obj_name).upload("dummy content")
+
+            self.assertTrue(test_bucket.delete_objects(obj_names[:2]))
+            self.assertListEqual([obj.name for obj in test_bucket],
+                                 obj_names[2:])
+
+        self.assertIsNone(self.provider.object_store.get(name),
+                          "Bucket {0} should have been deleted along with "
+                          "its contents".format(name))
+
+    @helpers.skipIfNoService(['object_store'])
+    def test_sync_bucket_with_directory(self):
+        name = "cbtestbucketobjs-{0}".format(uuid.uuid4())
+        test_bucket = self.provider.object_store.create(name)
+        src_dir = tempfile.mkdtemp()
+        dst_dir = tempfile.mkdtemp()
+
+        def cleanup():
+            test_bucket.delete(delete_contents=True)
+            shutil.rmtree(src_dir, ignore_errors=True)
+            shutil.rmtree(dst_dir, ignore_errors=True)
+
+        with helpers.cleanup_action(cleanup):
+            os.makedirs(os.path.join(src_dir, "nested"))
+            # "nested-sibling.txt" lists between the "nested" directory and
+            # its contents in the bucket, but not in a directory walk
+            rel_paths = ["top.txt", "nested/inner.txt", "nested-sibling.txt"]
+            for rel_path in rel_paths:
+                with open(os.path.join(src_dir, rel_path), 'w') as f:
+                    f.write("contents of {0}".format(rel_path))
+
+            self.assertTrue(test_bucket.sync_from(src_dir, prefix="sync"))
+            self.assertListEqual(
+                sorted(obj.name for obj in test_bucket),
+                sorted("sync/" + rel_path for rel_path in rel_paths))
+            # syncing an unchanged tree again should be a no-op
+            self.assertTrue(test_bucket.sync_from(src_dir, prefix="sync"))
+
+            self.assertTrue(test_bucket.sync_to(dst_dir, prefix="sync"))
+            for rel_path in rel_paths:
+                self.assertTrue(
+                    filecmp.cmp(os.path.join(src_dir, rel_path),
+                                os.path.join(dst_dir, rel_path),
+                                shallow=False),
+                    "Synced file {0} does not match".format(rel_path))
+
+            os.remove(os.path.join(src_dir, "top.txt"))
+            self.assertTrue(test_bucket.sync_from(src_dir, prefix="sync",
+                                                  delete=True))
+            self.assertListEqual([obj.name for obj in test_bucket],
+                                 ["sync/nested-sibling.txt",
+                                  "sync/nested/inner.txt"])
+
+    @helpers.skipIfNoService(['object_store'])
+    def test_copy_bucket_object(self):
+        name = "cbtestbucketobjs-{0}".format(uuid.uuid4())
+        test_bucket = self.provider.object_store.create(name)
+
+        with helpers.cleanup_action(
+                lambda: test_bucket.delete(delete_contents=True)):
+            target_name = "cbtestbucketcopy-{0}".format(uuid.uuid4())
+            target_bucket = self.provider.object_store.create(target_name)
+
+            with helpers.cleanup_action(
+                    lambda: target_bucket.delete(delete_contents=True)):
+                content = b"Hello World. Copy me."
+                obj = test_bucket.create_object("hello_copy.txt")
+                obj.upload(content)
+
+                for bucket, copy_name in [(test_bucket, "hello_copy2.txt"),
+                                          (target_bucket, None)]:
+                    copied = obj.copy_to(bucket, copy_name)
+                    self.assertEqual(copied.name, copy_name or obj.name)
+                    target_stream = BytesIO()
+                    bucket.get(copied.name).save_content(target_stream)
+                    self.assertEqual(target_stream.getvalue(), content)
+
+                # Copy through the client, as between providers, with the
+                # content downloaded as several concurrent ranges
+                obj = test_bucket.get("hello_copy.txt")
+                obj.COPY_PARALLEL_THRESHOLD = 0
+                obj.COPY_PART_SIZE = 4
+                copied = BaseBucketObject.copy_to(obj, target_bucket,
+                                                  "hello_streamed.txt")
+                target_stream = BytesIO()
+                target_bucket.get(copied.name).save_content(target_stream)
+                self.assertEqual(target_stream.getvalue(), content)
+
+                # A multipart copy keeps the metadata, such as the content
+                # encoding
+                if self.provider.PROVIDER_ID == ProviderList.AWS:
+                    obj = test_bucket.create_object("hello_copy.txt.gz")
+                    obj.upload(content, compression=ContentEncoding.GZIP)
+                    obj = test_bucket.get("hello_copy.txt.gz")
+                    obj.MAX_SINGLE_COPY_SIZE = 0
+                    copied = obj.copy_to(target_bucket)
+                    self.assertEqual(b"".join(target_bucket.get(
+                        copied.name).iter_content()), content)
+
+    @helpers.skipIfNoService(['object_store'])
+    def test_replicate_bucket(self):
+        name = "cbtestbucketobjs-{0}".format(uuid.uuid4())
+        src_bucket = self.provider.object_store.create(name)
+
+        with helpers.cleanup_action(
+                lambda: src_bucket.delete(delete_contents=True)):
+            dst_name = "cbtestbucketrepl-{0}".format(uuid.uuid4())
+            dst_bucket = self.provider.object_store.create(dst_name)
+
+            with helpers.cleanup_action(
+                    lambda: dst_bucket.delete(delete_contents=True)):
+                obj_names = ["repl/obj_{0}.txt".format(i) for i in range(3)]
+                for obj_name in obj_names:
+                    src_bucket.create_object(obj_name).upload(obj_name)
+                src_bucket.create_object("other.txt").upload("other")
+
+                summary = replicate(src_bucket, dst_bucket, prefix="repl/")
+                self.assertEqual(summary['copied'], len(obj_names))
+                self.assertListEqual(sorted(obj.name for obj in dst_bucket),
+                                     obj_names)
+
+                # a second run should find everything already replicated
+                summary = replicate(src_bucket, dst_bucket, prefix="repl/")
+                self.assertEqual(summary['copied'], 0)
+                self.assertEqual(summary['skipped'], len(obj_names))
+
+                # an object changed without changing its size is copied again
+                src_bucket.get(obj_names[0]).upload(obj_names[0].upper())
+                summary = replicate(src_bucket, dst_bucket, prefix="repl/")
+                self.assertEqual(summary['copied'], 1)
+                target_stream = BytesIO()
+                dst_bucket.get(obj_names[0]).save_content(target_stream)
+                self.assertEqual(target_stream.getvalue(),
+                                 obj_names[0].upper().encode('utf-8'))
+
     @helpers.skipIfNoService(['object_store'])
     def test_generate_url(self):
         name = "cbtestbucketobjs-{0}".format(uuid.uuid4())
@@ -172,6 +659,23 @@ class CloudObjectStoreServiceTestCase(ProviderTestBase):
                 url = obj.generate_url(100)
                 self.assertEqual(requests.get(url).content, content)
 
+    @helpers.skipIfNoService(['object_store'])
+    def test_generate_urls(self):
+        name = "cbtestbucketobjs-{0}".format(uuid.uuid4())
+        test_bucket = self.provider.object_store.create(name)
+
+        with helpers.cleanup_action(
+                lambda: test_bucket.delete(delete_contents=True)):
+            obj_names = ["hello_url.txt", "sub dir/hello_url_2.txt"]
+            for obj_name in obj_names:
+                test_bucket.create_object(obj_name).upload(obj_name)
+
+            urls = test_bucket.generate_urls(obj_names, 100)
+            self.assertEqual(len(urls), len(obj_names))
+            for obj_name, url in zip(obj_names, urls):
+                self.assertEqual(requests.get(url).content,
+                                 obj_name.encode('utf-8'))
+
     @helpers.skipIfNoService(['object_store'])
     def test_upload_download_bucket_content_from_file(self):
         name = "cbtestbucketobjs-{0}".format(uuid.uuid4())